@@ -0,0 +1,265 @@
+"""Throughput benchmark for the SLZB BLE proxy client.
+
+Runs a local UDP stand-in for the SLZB proxy in a separate process. It answers
+PING with ACK and streams a configurable mix of DATA datagrams at a target rate.
+Each valid advertisement carries its send time in manufacturer data so the
+receiving side can report latency.
+
+    python -m benchmarks.ble_proxy --rate 20000 --duration 5
+    python -m benchmarks.ble_proxy --mix single=60,multi=30,truncated=5,garbage=5
+    python -m benchmarks.ble_proxy --offline --count 200000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import multiprocessing
+import random
+import statistics
+import struct
+import time
+
+from pysmlight.ble_proxy import (
+    BLE_PROXY_HEADER_STRUCT,
+    BLE_PROXY_VERSION,
+    BleProxyClient,
+    BleProxyProtocol,
+)
+from pysmlight.const import ProxyAction
+
+BENCH_COMPANY_ID = 0xFFFF
+BENCH_MARKER = BENCH_COMPANY_ID.to_bytes(2, "little")
+MIX_KINDS = ("single", "multi", "truncated", "garbage")
+
+
+def build_advert(mac: bytes, rssi: int, adv_data: bytes) -> bytes:
+    """Build a single DATA frame as sent by the proxy."""
+    return BLE_PROXY_HEADER_STRUCT.pack(
+        BLE_PROXY_VERSION, ProxyAction.DATA, mac, 0, rssi, len(adv_data)
+    ) + bytes(adv_data)
+
+
+def timestamped_adv_data() -> bytes:
+    """Flags + manufacturer data carrying the monotonic send time in ns."""
+    return b"\x02\x01\x06\x0b\xff" + struct.pack(
+        "<HQ", BENCH_COMPANY_ID, time.monotonic_ns()
+    )
+
+
+class PacketGenerator:
+    """Generate datagrams for a weighted mix of frame kinds."""
+
+    def __init__(self, mix: dict[str, int], multi_size: int, seed: int = 0) -> None:
+        self.rng = random.Random(seed)
+        self.kinds = list(mix)
+        self.weights = [mix[k] for k in self.kinds]
+        self.multi_size = multi_size
+        self.macs = [self.rng.randbytes(6) for _ in range(512)]
+
+    def _advert(self) -> bytes:
+        return build_advert(
+            self.rng.choice(self.macs),
+            self.rng.randint(-100, -30),
+            timestamped_adv_data(),
+        )
+
+    def next(self) -> tuple[bytes, int]:
+        """Return a datagram and the number of valid adverts it contains."""
+        kind = self.rng.choices(self.kinds, self.weights)[0]
+        if kind == "single":
+            return self._advert(), 1
+        if kind == "multi":
+            return b"".join(
+                self._advert() for _ in range(self.multi_size)
+            ), self.multi_size
+        if kind == "truncated":
+            frame = self._advert()
+            return frame[: self.rng.randint(2, len(frame) - 1)] + self._advert(), 1
+        return self.rng.randbytes(self.rng.randint(1, 64)), 0
+
+
+class FakeProxyServer(asyncio.DatagramProtocol):
+    """Answer PING with ACK and remember where to stream DATA packets."""
+
+    def __init__(self) -> None:
+        self.transport: asyncio.DatagramTransport | None = None
+        self.client: tuple[str, int] | None = None
+        self.client_evt = asyncio.Event()
+
+    def connection_made(self, transport) -> None:
+        self.transport = transport
+
+    def datagram_received(self, data: bytes, addr: tuple[str, int]) -> None:
+        if len(data) >= 4 and data[1] == ProxyAction.PING:
+            port = int.from_bytes(data[2:4], "little")
+            self.client = (addr[0], port)
+            self.transport.sendto(
+                bytes([BLE_PROXY_VERSION, ProxyAction.ACK]), self.client
+            )
+            self.client_evt.set()
+        elif len(data) >= 2 and data[1] == ProxyAction.DISCONNECT:
+            self.client = None
+
+
+async def _serve(port_conn, result_conn, args: argparse.Namespace) -> None:
+    loop = asyncio.get_running_loop()
+    transport, server = await loop.create_datagram_endpoint(
+        FakeProxyServer, local_addr=("127.0.0.1", 0)
+    )
+    port_conn.send(transport.get_extra_info("sockname")[1])
+    await server.client_evt.wait()
+
+    generator = PacketGenerator(args.mix, args.multi_size, args.seed)
+    datagrams = adverts = 0
+    start = time.monotonic()
+    while (elapsed := time.monotonic() - start) < args.duration:
+        due = int(args.rate * elapsed) - adverts
+        while due > 0 and server.client:
+            data, count = generator.next()
+            transport.sendto(data, server.client)
+            datagrams += 1
+            adverts += count
+            due -= max(count, 1)
+        await asyncio.sleep(0.001)
+    transport.close()
+    result_conn.send((datagrams, adverts))
+
+
+def _server_process(port_conn, result_conn, args: argparse.Namespace) -> None:
+    asyncio.run(_serve(port_conn, result_conn, args))
+
+
+class Receiver:
+    """Benchmark callback collecting counts and latencies.
+
+    Only adverts carrying the benchmark manufacturer data count as received.
+    Anything else was cut out of a truncated frame or garbage and is counted
+    as misparsed, so resync regressions show up as loss instead of being
+    hidden by bogus adverts.
+    """
+
+    def __init__(self) -> None:
+        self.adverts = 0
+        self.misparsed = 0
+        self.latencies: list[int] = []
+
+    def reset(self) -> None:
+        self.adverts = self.misparsed = 0
+        self.latencies.clear()
+
+    def __call__(
+        self, mac_bytes: bytes, rssi: int, address_type: int, raw_data: bytes
+    ) -> None:
+        if (
+            len(raw_data) == 15
+            and raw_data[:5] == b"\x02\x01\x06\x0b\xff"
+            and raw_data[5:7] == BENCH_MARKER
+        ):
+            self.adverts += 1
+            sent = int.from_bytes(raw_data[7:15], "little")
+            self.latencies.append(time.monotonic_ns() - sent)
+        else:
+            self.misparsed += 1
+
+
+def _percentile(values: list[int], pct: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))] / 1000
+
+
+async def run_live(args: argparse.Namespace) -> None:
+    port_recv, port_send = multiprocessing.Pipe(duplex=False)
+    result_recv, result_send = multiprocessing.Pipe(duplex=False)
+    proc = multiprocessing.Process(
+        target=_server_process, args=(port_send, result_send, args)
+    )
+    proc.start()
+    port = await asyncio.to_thread(port_recv.recv)
+
+    receiver = Receiver()
+    client = BleProxyClient("127.0.0.1", receiver, esp32_port=port)
+    cpu_start = time.process_time()
+    await client.start()
+    datagrams, sent = await asyncio.to_thread(result_recv.recv)
+    await asyncio.sleep(0.2)
+    cpu = time.process_time() - cpu_start
+    client.stop()
+    proc.join()
+
+    received = receiver.adverts
+    print(f"datagrams sent:   {datagrams}")
+    print(f"adverts sent:     {sent}")
+    print(f"adverts received: {received} ({received / args.duration:.0f}/s)")
+    print(f"dropped:          {sent - received}")
+    print(f"misparsed:        {receiver.misparsed}")
+    print(f"cpu per advert:   {cpu / max(received, 1) * 1e6:.2f} us")
+    for pct in (50, 90, 99, 99.9):
+        print(f"latency p{pct}:     {_percentile(receiver.latencies, pct):.1f} us")
+
+
+def run_offline(args: argparse.Namespace) -> None:
+    generator = PacketGenerator(args.mix, args.multi_size, args.seed)
+    datagrams = [generator.next() for _ in range(args.count)]
+    expected = sum(count for _, count in datagrams)
+    receiver = Receiver()
+    protocol = BleProxyProtocol(receiver, lambda: None)
+    addr = ("127.0.0.1", 5050)
+
+    timings = []
+    for _ in range(args.repeat):
+        receiver.reset()
+        start = time.perf_counter()
+        for data, _ in datagrams:
+            protocol.datagram_received(data, addr)
+        timings.append(time.perf_counter() - start)
+
+    best = min(timings)
+    print(f"datagrams:        {len(datagrams)}")
+    print(f"adverts parsed:   {receiver.adverts} (expected {expected})")
+    print(f"dropped:          {expected - receiver.adverts}")
+    print(f"misparsed:        {receiver.misparsed}")
+    print(f"best run:         {best * 1000:.1f} ms")
+    print(f"adverts/s:        {receiver.adverts / best:.0f}")
+    print(f"per advert:       {best / max(receiver.adverts, 1) * 1e6:.2f} us")
+    print(f"median run:       {statistics.median(timings) * 1000:.1f} ms")
+
+
+def parse_mix(value: str) -> dict[str, int]:
+    mix = {}
+    for item in value.split(","):
+        kind, _, weight = item.partition("=")
+        if kind not in MIX_KINDS:
+            raise argparse.ArgumentTypeError(f"unknown packet kind: {kind}")
+        mix[kind] = int(weight)
+    return mix
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate", type=int, default=10000, help="adverts per second")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds")
+    parser.add_argument(
+        "--mix",
+        type=parse_mix,
+        default=parse_mix("single=70,multi=20,truncated=5,garbage=5"),
+    )
+    parser.add_argument("--multi-size", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--offline", action="store_true", help="parse in-process, no sockets"
+    )
+    parser.add_argument("--count", type=int, default=100000, help="offline datagrams")
+    parser.add_argument("--repeat", type=int, default=5, help="offline runs")
+    args = parser.parse_args()
+
+    if args.offline:
+        run_offline(args)
+    else:
+        asyncio.run(run_live(args))
+
+
+if __name__ == "__main__":
+    main()
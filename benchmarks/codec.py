@@ -0,0 +1,78 @@
+"""Compare the binary model codec with the to_dict / JSON path.
+
+Builds a fleet snapshot {host: Sensors} and {host: Info} from the test fixtures
+and reports encoded size and the best encode / decode time of both paths, with
+stdlib json and the configured JSON backend.
+
+    python -m benchmarks.codec --devices 1000 --rounds 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+import time
+
+from pysmlight import codec, json_backend
+from pysmlight.models import Info, Sensors
+
+FIXTURES = Path(__file__).parent.parent / "tests" / "fixtures"
+
+
+def load_model(cls, fixture: str, key: str):
+    return cls.from_dict(json.loads((FIXTURES / fixture).read_text())[key])
+
+
+def json_encode(fleet: dict) -> bytes:
+    return json.dumps({host: value.to_dict() for host, value in fleet.items()}).encode()
+
+
+def json_decode(data: bytes, cls, loads=json_backend.loads) -> dict:
+    return {host: cls.from_dict(value) for host, value in loads(data).items()}
+
+
+def timed(func, rounds: int) -> tuple[float, object]:
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run(name: str, fleet: dict, cls, rounds: int) -> None:
+    enc_json, data_json = timed(lambda: json_encode(fleet), rounds)
+    dec_std, _ = timed(lambda: json_decode(data_json, cls, json.loads), rounds)
+    dec_json, _ = timed(lambda: json_decode(data_json, cls), rounds)
+    enc_bin, data_bin = timed(lambda: codec.encode(fleet), rounds)
+    dec_bin, decoded = timed(lambda: codec.decode(data_bin), rounds)
+    assert decoded == fleet
+
+    print(f"{name} x {len(fleet)}")
+    print(f"  {'':8} {'bytes':>10} {'encode ms':>10} {'decode ms':>10}")
+    rows = (
+        ("json", len(data_json), enc_json, dec_std),
+        (json_backend.BACKEND, len(data_json), enc_json, dec_json),
+        ("binary", len(data_bin), enc_bin, dec_bin),
+    )
+    for label, size, enc, dec in rows:
+        print(f"  {label:8} {size:10} {enc * 1e3:10.2f} {dec * 1e3:10.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+
+    info = load_model(Info, "slzb-ultima-info.json", "Info")
+    sensors = load_model(Sensors, "slzb-ultima-sensors.json", "Sensors")
+    hosts = [f"10.0.{i // 256}.{i % 256}" for i in range(args.devices)]
+
+    run("Sensors", dict.fromkeys(hosts, sensors), Sensors, args.rounds)
+    run("Info", dict.fromkeys(hosts, info), Info, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Cold start benchmark for the package modules.
+
+Imports each module in a fresh interpreter and reports the best wall time
+over a number of runs, the time to the first decoded Info and how long that
+first decode takes once the models are imported.
+
+    python -m benchmarks.import_time --runs 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+
+MODULES = (
+    "pysmlight",
+    "pysmlight.ble_proxy",
+    "pysmlight.models",
+    "pysmlight.web",
+)
+IMPORT_MODELS = "from pysmlight.models import Info"
+DECODE = "Info.from_dict({'model': 'SLZB-06', 'sw_version': 'v2.7.0'})"
+
+TIMER = """
+{setup}
+import time
+start = time.perf_counter()
+{code}
+print(time.perf_counter() - start)
+"""
+
+
+def measure(name: str, code: str, runs: int, setup: str = "") -> None:
+    best = min(
+        float(
+            subprocess.run(
+                [sys.executable, "-c", TIMER.format(setup=setup, code=code)],
+                capture_output=True,
+                check=True,
+                text=True,
+            ).stdout
+        )
+        for _ in range(runs)
+    )
+    print(f"{name:22} {best * 1000:8.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    for module in MODULES:
+        measure(module, f"import {module}", args.runs)
+    measure("first Info.from_dict", f"{IMPORT_MODELS}; {DECODE}", args.runs)
+    # compile cost left on the first poll
+    measure("  after import", DECODE, args.runs, setup=IMPORT_MODELS)
+
+
+if __name__ == "__main__":
+    main()
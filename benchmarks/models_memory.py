@@ -0,0 +1,52 @@
+"""Memory benchmark for model snapshots.
+
+Loads the device fixtures into many Info, Sensors and Firmware instances and
+reports the traced memory per snapshot.
+
+    python -m benchmarks.models_memory --count 10000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+import tracemalloc
+
+from pysmlight.models import Firmware, Info, Sensors
+
+FIXTURES = Path(__file__).parent.parent / "tests" / "fixtures"
+
+
+def load_fixture(name: str) -> dict:
+    return json.loads((FIXTURES / name).read_text())
+
+
+def measure(name: str, build, count: int) -> None:
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    objects = [build() for _ in range(count)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    print(f"{name:10} {count:8} snapshots {size / count:10.1f} bytes each")
+    del objects
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=10000)
+    args = parser.parse_args()
+
+    info = load_fixture("slzb-ultima-info.json")
+    sensors = load_fixture("slzb-ultima-sensors.json")
+    firmware = load_fixture("slzb-06-esp-fw.json")
+    fw_entry = (firmware if isinstance(firmware, list) else firmware["fw"])[0]
+
+    measure("Info", lambda: Info.from_dict(info), args.count)
+    measure("Sensors", lambda: Sensors.from_dict(sensors), args.count)
+    measure("Firmware", lambda: Firmware.from_dict(fw_entry), args.count)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,6 @@
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
 __all__ = [
     "Api2",
     "CmdWrapper",
@@ -6,17 +9,52 @@ __all__ = [
     "Radio",
     "Sensors",
     "SettingsEvent",
+    "BleAdvertisementRouter",
     "BleProxyClient",
     "BleProxyMode",
     "BleProxyProtocol",
 ]
 
-from pysmlight.ble_proxy import BleProxyClient, BleProxyProtocol
-from pysmlight.const import BleProxyMode
-from pysmlight.models import Radio, SettingsEvent
-from pysmlight.web import Api2, CmdWrapper, Firmware, Info, Sensors
+# names are imported from their module on first access, so importing
+# pysmlight.ble_proxy does not pull in aiohttp and the web client
+_LAZY_IMPORTS = {
+    "Api2": "pysmlight.web",
+    "CmdWrapper": "pysmlight.web",
+    "Firmware": "pysmlight.models",
+    "Info": "pysmlight.models",
+    "Radio": "pysmlight.models",
+    "Sensors": "pysmlight.models",
+    "SettingsEvent": "pysmlight.models",
+    "BleAdvertisementRouter": "pysmlight.ble_proxy",
+    "BleProxyClient": "pysmlight.ble_proxy",
+    "BleProxyMode": "pysmlight.const",
+    "BleProxyProtocol": "pysmlight.ble_proxy",
+}
+
+if TYPE_CHECKING:
+    from pysmlight.ble_proxy import (
+        BleAdvertisementRouter,
+        BleProxyClient,
+        BleProxyProtocol,
+    )
+    from pysmlight.const import BleProxyMode
+    from pysmlight.models import Firmware, Info, Radio, Sensors, SettingsEvent
+    from pysmlight.web import Api2, CmdWrapper
 
 try:
     from pysmlight._version import __version__
 except ImportError:  # pragma: no cover
     __version__ = "0.0.0.dev0"
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY_IMPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted({*globals(), *__all__})
@@ -0,0 +1,69 @@
+"""Rows of per-key numeric state kept in flat arrays.
+
+Monitors tracking many keys (devices, MAC and proxy pairs) keep each field as
+one array.array column with a fixed number of values per row, instead of an
+object per key. Rows of removed keys are reset and reused, so the arrays only
+grow to the largest number of keys tracked at once.
+"""
+
+from __future__ import annotations
+
+import array
+from collections.abc import Hashable
+from typing import Any, Generic, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+
+
+class SlotTable(Generic[K]):
+    """Allocate array rows to keys.
+
+    columns maps a column name to (typecode, width, default). The arrays in
+    .columns are extended in place, so references to them stay valid.
+    """
+
+    def __init__(self, columns: dict[str, tuple[str, int, float]]) -> None:
+        self._defaults: dict[str, array.array[Any]] = {
+            name: array.array(typecode, [default] * width)
+            for name, (typecode, width, default) in columns.items()
+        }
+        self.columns: dict[str, array.array[Any]] = {
+            name: array.array(typecode) for name, (typecode, _, _) in columns.items()
+        }
+        self.slots: dict[K, int] = {}
+        # key of each row, stale for free rows
+        self.keys: list[K] = []
+        self._free: list[int] = []
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.slots
+
+    def get(self, key: K) -> int | None:
+        """Return the row of a key, None if it has none."""
+        return self.slots.get(key)
+
+    def add(self, key: K) -> int:
+        """Give a new key a row set to the column defaults."""
+        if self._free:
+            slot = self._free.pop()
+            self.keys[slot] = key
+            for name, default in self._defaults.items():
+                width = len(default)
+                self.columns[name][slot * width : (slot + 1) * width] = default
+        else:
+            slot = len(self.keys)
+            self.keys.append(key)
+            for name, default in self._defaults.items():
+                self.columns[name].extend(default)
+        self.slots[key] = slot
+        return slot
+
+    def remove(self, key: K) -> int | None:
+        """Release the row of a key for reuse and return it."""
+        slot = self.slots.pop(key, None)
+        if slot is not None:
+            self._free.append(slot)
+        return slot
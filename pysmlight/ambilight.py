@@ -0,0 +1,119 @@
+"""Latest-wins streaming of Ambilight frames to Ultima devices."""
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from dataclasses import fields
+import logging
+import time
+from typing import TYPE_CHECKING, Any
+
+from .exceptions import SmlightError
+from .models import AmbilightPayload
+
+if TYPE_CHECKING:
+    from .web import ActionWrapper
+
+_LOGGER = logging.getLogger(__name__)
+
+AMBILIGHT_FIELDS = tuple(f.name for f in fields(AmbilightPayload))
+
+
+class AmbilightStream:
+    """Stream Ambilight frames with at most one request in flight.
+
+    update() never blocks: it merges the frame into the pending state, so
+    frames arriving while a request is in flight collapse into one. Only fields
+    that differ from what the device last accepted are sent.
+    """
+
+    def __init__(self, actions: ActionWrapper, *, max_fps: float | None = None) -> None:
+        self.actions = actions
+        self.min_interval = 1 / max_fps if max_fps else 0.0
+        self.frames_sent = 0
+        self.frames_failed = 0
+        self.frames_merged = 0
+        self._pending: dict[str, Any] = {}
+        self._device: dict[str, Any] = {}
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._sent_at: deque[float] = deque(maxlen=32)
+        self._task: asyncio.Task | None = None
+        self._last_sent = 0.0
+
+    @property
+    def fps(self) -> float:
+        """Achieved frames per second over the recent successful sends."""
+        if len(self._sent_at) < 2:
+            return 0.0
+        elapsed = self._sent_at[-1] - self._sent_at[0]
+        return (len(self._sent_at) - 1) / elapsed if elapsed > 0 else 0.0
+
+    def update(self, payload: AmbilightPayload) -> None:
+        """Queue a frame, replacing any frame not sent yet."""
+        if self._pending:
+            self.frames_merged += 1
+        for name in AMBILIGHT_FIELDS:
+            value = getattr(payload, name)
+            if value is not None:
+                self._pending[name] = value
+        self._idle.clear()
+        self._wakeup.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def flush(self) -> None:
+        """Wait until every queued frame has been sent."""
+        if self._task is not None:
+            await self._idle.wait()
+
+    async def _run(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            if self.min_interval:
+                delay = self._last_sent + self.min_interval - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            self._wakeup.clear()
+
+            try:
+                await self._send(self._take_frame())
+            finally:
+                if not self._pending:
+                    self._idle.set()
+
+    def _take_frame(self) -> dict[str, Any]:
+        frame, self._pending = self._pending, {}
+        return {k: v for k, v in frame.items() if self._device.get(k) != v}
+
+    async def _send(self, changes: dict[str, Any]) -> None:
+        if not changes:
+            return
+        ok = False
+        try:
+            ok = await self.actions.ambilight(AmbilightPayload(**changes))
+        except SmlightError as err:
+            _LOGGER.debug("Ambilight frame failed: %s", err)
+        except Exception:
+            # e.g. a TimeoutError from aiohttp, the stream must keep running
+            _LOGGER.exception("Unexpected error sending Ambilight frame")
+        # failed requests still count for pacing
+        self._last_sent = time.monotonic()
+        if ok:
+            self._device.update(changes)
+            self._sent_at.append(self._last_sent)
+            self.frames_sent += 1
+        else:
+            # device state unknown, send these fields again next time
+            for name in changes:
+                self._device.pop(name, None)
+            self.frames_failed += 1
+
+    def close(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        self._pending.clear()
+        self._idle.set()
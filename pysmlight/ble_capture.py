@@ -0,0 +1,211 @@
+"""Record and replay BLE proxy advertisements in pcap format.
+
+Captures use LINKTYPE_BLUETOOTH_LE_LL_WITH_PHDR so RSSI is preserved and the
+files open directly in Wireshark. Each advertisement is stored as an ADV_IND
+PDU with the address bytes exactly as delivered by the proxy.
+"""
+
+import asyncio
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+import logging
+from pathlib import Path
+import struct
+import time
+from typing import BinaryIO, Self
+
+_LOGGER = logging.getLogger(__name__)
+
+PCAP_MAGIC = 0xA1B2C3D4
+LINKTYPE_BLUETOOTH_LE_LL_WITH_PHDR = 256
+ADV_ACCESS_ADDRESS = 0x8E89BED6
+ADV_CHANNEL = 37
+
+PCAP_GLOBAL_HEADER = struct.Struct("<IHHiIII")
+PCAP_RECORD_HEADER = struct.Struct("<IIII")
+# rf_channel, signal_power, noise_power, access_address_offenses,
+# reference_access_address, flags
+LE_PHDR = struct.Struct("<BbbBIH")
+LE_PHDR_DEWHITENED = 0x0001
+LE_PHDR_SIGNAL_VALID = 0x0002
+# access_address, pdu header (type/TxAdd, length), AdvA
+LE_ADV_HEADER = struct.Struct("<IBB6s")
+# The proxy does not forward the over-the-air CRC. A zero placeholder keeps
+# the LL packet layout and, as the CRC checked flag (0x0400) is not set in the
+# pseudo header, Wireshark does not validate it.
+LE_CRC = b"\x00\x00\x00"
+LE_PDU_TXADD = 0x40
+# the PDU length byte covers AdvA (6 bytes) and the advertising data
+MAX_ADV_DATA = 255 - 6
+
+DEFAULT_FLUSH_SIZE = 64 * 1024
+
+
+@dataclass
+class CaptureRecord:
+    timestamp: float
+    mac_bytes: bytes
+    rssi: int
+    address_type: int
+    raw_data: bytes
+
+
+def encode_record(
+    timestamp: float, mac_bytes: bytes, rssi: int, address_type: int, raw_data: bytes
+) -> bytes:
+    """Encode one advertisement as a pcap record.
+
+    Raises ValueError if raw_data is too long for the PDU length field.
+    """
+    if len(raw_data) > MAX_ADV_DATA:
+        raise ValueError(f"Advertisement data too long: {len(raw_data)} bytes")
+    pdu_type = LE_PDU_TXADD if address_type else 0
+    packet = (
+        LE_PHDR.pack(
+            ADV_CHANNEL,
+            rssi,
+            0,
+            0,
+            ADV_ACCESS_ADDRESS,
+            LE_PHDR_DEWHITENED | LE_PHDR_SIGNAL_VALID,
+        )
+        + LE_ADV_HEADER.pack(ADV_ACCESS_ADDRESS, pdu_type, 6 + len(raw_data), mac_bytes)
+        + raw_data
+        + LE_CRC
+    )
+    sec = int(timestamp)
+    usec = int((timestamp - sec) * 1_000_000)
+    return PCAP_RECORD_HEADER.pack(sec, usec, len(packet), len(packet)) + packet
+
+
+class BleCaptureWriter:
+    """Buffered pcap writer usable as a BLE proxy advertisement callback.
+
+    Records are appended to an in-memory buffer and written by a single
+    background thread once flush_size is reached, so the event loop never
+    blocks on disk I/O. The file is also opened by that thread, use create()
+    to wait for it and see errors. Advertisements longer than MAX_ADV_DATA do
+    not fit an LL PDU and are skipped.
+    """
+
+    def __init__(self, path: str | Path, flush_size: int = DEFAULT_FLUSH_SIZE) -> None:
+        self.path = Path(path)
+        self.flush_size = flush_size
+        self.records = 0
+        self.skipped = 0
+        self._buffer = bytearray(
+            PCAP_GLOBAL_HEADER.pack(
+                PCAP_MAGIC, 2, 4, 0, 0, 65535, LINKTYPE_BLUETOOTH_LE_LL_WITH_PHDR
+            )
+        )
+        self._file: BinaryIO | None = None
+        self._closed = False
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="ble_capture"
+        )
+        # runs before any write, the executor has a single thread
+        self._opened = self._executor.submit(self._open)
+
+    @classmethod
+    async def create(
+        cls, path: str | Path, flush_size: int = DEFAULT_FLUSH_SIZE
+    ) -> Self:
+        """Create a writer once its file is open.
+
+        Raises OSError if the file cannot be created.
+        """
+        writer = cls(path, flush_size)
+        try:
+            await asyncio.wrap_future(writer._opened)
+        except OSError:
+            writer._closed = True
+            writer._executor.shutdown(wait=False)
+            raise
+        return writer
+
+    def _open(self) -> None:
+        try:
+            self._file = self.path.open("wb")
+        except OSError:
+            _LOGGER.exception("Error opening BLE capture %s", self.path)
+            raise
+
+    def __call__(
+        self, mac_bytes: bytes, rssi: int, address_type: int, raw_data: bytes
+    ) -> None:
+        if self._closed:
+            return
+        try:
+            record = encode_record(time.time(), mac_bytes, rssi, address_type, raw_data)
+        except ValueError as err:
+            _LOGGER.debug("Skipping advertisement from %s: %s", mac_bytes.hex(), err)
+            self.skipped += 1
+            return
+        self._buffer += record
+        self.records += 1
+        if len(self._buffer) >= self.flush_size:
+            self.flush()
+
+    def _write(self, data: bytes) -> None:
+        try:
+            if self._file is not None:
+                self._file.write(data)
+        except OSError:
+            _LOGGER.exception("Error writing BLE capture to %s", self.path)
+
+    def flush(self) -> None:
+        """Hand the buffered records to the writer thread."""
+        if self._buffer and not self._closed:
+            data = bytes(self._buffer)
+            self._buffer.clear()
+            self._executor.submit(self._write, data)
+
+    def close(self) -> None:
+        """Flush remaining records and close the file."""
+        if self._closed:
+            return
+        self.flush()
+        self._closed = True
+        self._executor.shutdown(wait=True)
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def read_capture(path: str | Path) -> Iterator[CaptureRecord]:
+    """Iterate over advertisements stored in a pcap capture."""
+    with Path(path).open("rb") as f:
+        header = f.read(PCAP_GLOBAL_HEADER.size)
+        if len(header) < PCAP_GLOBAL_HEADER.size:
+            raise ValueError("Not a pcap file")
+        magic, *_, linktype = PCAP_GLOBAL_HEADER.unpack(header)
+        if magic != PCAP_MAGIC or linktype != LINKTYPE_BLUETOOTH_LE_LL_WITH_PHDR:
+            raise ValueError("Unsupported capture format")
+
+        prefix = LE_PHDR.size + LE_ADV_HEADER.size
+        while len(rec := f.read(PCAP_RECORD_HEADER.size)) == PCAP_RECORD_HEADER.size:
+            sec, usec, incl_len, _ = PCAP_RECORD_HEADER.unpack(rec)
+            packet = f.read(incl_len)
+            if len(packet) < incl_len or incl_len < prefix + len(LE_CRC):
+                break
+            _, rssi, _, _, _, _ = LE_PHDR.unpack_from(packet)
+            _, pdu_type, _, mac_bytes = LE_ADV_HEADER.unpack_from(packet, LE_PHDR.size)
+            yield CaptureRecord(
+                timestamp=sec + usec / 1_000_000,
+                mac_bytes=mac_bytes,
+                rssi=rssi,
+                address_type=1 if pdu_type & LE_PDU_TXADD else 0,
+                raw_data=packet[prefix : incl_len - len(LE_CRC)],
+            )
+
+
+def replay_capture(
+    path: str | Path, callback: Callable[[bytes, int, int, bytes], None]
+) -> int:
+    """Feed every advertisement in a capture to callback. Returns the count."""
+    count = 0
+    for record in read_capture(path):
+        callback(record.mac_bytes, record.rssi, record.address_type, record.raw_data)
+        count += 1
+    return count
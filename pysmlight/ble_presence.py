@@ -0,0 +1,244 @@
+"""Room presence from RSSI of BLE proxy advertisements.
+
+RSSI samples are kept per (MAC, proxy) in fixed size ring buffers that live in
+flat arrays. Adding a sample is O(1) and does no math. Smoothing is deferred
+to process(), which updates every slot with new samples in one pass: the
+exponential moving average over a slot's pending samples is computed in closed
+form as one dot product with precomputed weights (sum(map(mul, ...))), so the
+per-sample arithmetic runs in C. The pass itself is a plain Python loop over
+the dirty slots, there is no numpy here to vectorize across slots.
+"""
+
+import asyncio
+from collections.abc import Callable
+from dataclasses import dataclass
+import logging
+from operator import mul
+import time
+
+from ._slots import SlotTable
+
+_LOGGER = logging.getLogger(__name__)
+
+NAN = float("nan")
+
+
+@dataclass
+class PresenceChange:
+    mac_bytes: bytes
+    present: bool
+    proxy: str | None = None  # nearest proxy while present
+    rssi: float | None = None  # smoothed RSSI at nearest proxy
+
+
+class BlePresenceEngine:
+    """Track presence and nearest proxy of BLE devices across several proxies."""
+
+    def __init__(
+        self,
+        on_change: Callable[[PresenceChange], None] | None = None,
+        *,
+        window: int = 16,
+        alpha: float = 0.25,
+        present_rssi: int = -90,
+        timeout: float = 30.0,
+        hysteresis: float = 3.0,
+    ) -> None:
+        if not 0 < alpha <= 1:
+            raise ValueError("alpha must be in (0, 1]")
+        self.on_change = on_change
+        self.window = window
+        self.present_rssi = present_rssi
+        self.timeout = timeout
+        self.hysteresis = hysteresis
+
+        # EMA over k new samples: s = s0 * decay[k] + sum(weights[k][i] * x[i])
+        self._decay = [(1 - alpha) ** k for k in range(window + 1)]
+        self._weights = [
+            [alpha * (1 - alpha) ** (k - 1 - i) for i in range(k)]
+            for k in range(window + 1)
+        ]
+
+        self._table: SlotTable[tuple[bytes, str]] = SlotTable(
+            {
+                "ring": ("b", window, 0),
+                "head": ("H", 1, 0),
+                "pending": ("H", 1, 0),
+                "smoothed": ("d", 1, NAN),
+                "last_seen": ("d", 1, 0.0),
+            }
+        )
+        self._slots = self._table.slots
+        self._keys = self._table.keys
+        columns = self._table.columns
+        self._ring = columns["ring"]
+        self._head = columns["head"]
+        self._pending = columns["pending"]
+        self._smoothed = columns["smoothed"]
+        self._last_seen = columns["last_seen"]
+        self._by_mac: dict[bytes, list[int]] = {}
+        self._dirty: set[int] = set()
+        self._state: dict[bytes, PresenceChange] = {}
+        self._task: asyncio.Task | None = None
+
+    def _new_slot(self, key: tuple[bytes, str]) -> int:
+        slot = self._table.add(key)
+        self._by_mac.setdefault(key[0], []).append(slot)
+        return slot
+
+    def add(
+        self, mac_bytes: bytes, proxy: str, rssi: int, now: float | None = None
+    ) -> None:
+        """Record one RSSI sample."""
+        key = (mac_bytes, proxy)
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = self._new_slot(key)
+        head = self._head[slot]
+        self._ring[slot * self.window + head] = max(-128, min(127, rssi))
+        self._head[slot] = head + 1 if head + 1 < self.window else 0
+        if self._pending[slot] < self.window:
+            self._pending[slot] += 1
+        self._last_seen[slot] = time.monotonic() if now is None else now
+        self._dirty.add(slot)
+
+    def callback_for(self, proxy: str) -> Callable[[bytes, int, int, bytes], None]:
+        """Return a BLE proxy advertisement callback feeding this engine."""
+
+        def callback(
+            mac_bytes: bytes, rssi: int, address_type: int, raw_data: bytes
+        ) -> None:
+            self.add(mac_bytes, proxy, rssi)
+
+        return callback
+
+    def _smooth_dirty(self) -> set[bytes]:
+        """Fold pending samples of all dirty slots into their averages.
+
+        Returns the MACs that received samples.
+        """
+        window = self.window
+        ring = self._ring
+        heads = self._head
+        pending = self._pending
+        smoothed = self._smoothed
+        decay = self._decay
+        weights = self._weights
+        keys = self._keys
+        macs: set[bytes] = set()
+        for slot in self._dirty:
+            count = pending[slot]
+            head = heads[slot]
+            base = slot * window
+            start = head - count
+            if start >= 0:
+                samples = ring[base + start : base + head].tolist()
+            else:
+                samples = (
+                    ring[base + window + start : base + window]
+                    + ring[base : base + head]
+                ).tolist()
+
+            value = smoothed[slot]
+            if value != value:  # first samples for this slot
+                value = samples.pop(0)
+            if k := len(samples):
+                value = value * decay[k] + sum(map(mul, weights[k], samples))
+            smoothed[slot] = value
+            pending[slot] = 0
+            macs.add(keys[slot][0])
+        self._dirty.clear()
+        return macs
+
+    def _evaluate(self, mac_bytes: bytes, cutoff: float) -> PresenceChange | None:
+        previous = self._state.get(mac_bytes)
+        best_slot = -1
+        best_rssi = -1e9
+        current_rssi = None
+        for slot in self._by_mac.get(mac_bytes, ()):
+            if self._last_seen[slot] < cutoff:
+                continue
+            rssi = self._smoothed[slot]
+            if rssi > best_rssi:
+                best_slot, best_rssi = slot, rssi
+            if previous and previous.present and self._keys[slot][1] == previous.proxy:
+                current_rssi = rssi
+
+        present = best_slot >= 0 and best_rssi >= self.present_rssi
+        proxy = None
+        rssi_out = None
+        if present:
+            proxy = self._keys[best_slot][1]
+            rssi_out = best_rssi
+            # stay with the current proxy unless another is clearly closer
+            if (
+                previous is not None
+                and current_rssi is not None
+                and current_rssi >= self.present_rssi
+                and best_rssi - current_rssi < self.hysteresis
+            ):
+                proxy = previous.proxy
+                rssi_out = current_rssi
+
+        if previous is None and not present:
+            return None
+        state = PresenceChange(mac_bytes, present, proxy, rssi_out)
+        self._state[mac_bytes] = state
+        if previous is not None and (
+            previous.present == present and previous.proxy == proxy
+        ):
+            return None
+        return PresenceChange(mac_bytes, present, proxy, rssi_out)
+
+    def process(self, now: float | None = None) -> list[PresenceChange]:
+        """Smooth pending samples and return presence / nearest proxy changes."""
+        if now is None:
+            now = time.monotonic()
+        macs = self._smooth_dirty()
+        # present devices may time out without new samples
+        macs.update(mac for mac, state in self._state.items() if state.present)
+
+        cutoff = now - self.timeout
+        changes = []
+        for mac in macs:
+            if change := self._evaluate(mac, cutoff):
+                changes.append(change)
+        if self.on_change:
+            for change in changes:
+                try:
+                    self.on_change(change)
+                except Exception:
+                    _LOGGER.exception("Error in presence change callback")
+        return changes
+
+    def prune(self, max_age: float, now: float | None = None) -> None:
+        """Release buffers of (MAC, proxy) pairs not seen for max_age seconds."""
+        if now is None:
+            now = time.monotonic()
+        cutoff = now - max_age
+        for key, slot in list(self._slots.items()):
+            if self._last_seen[slot] >= cutoff or slot in self._dirty:
+                continue
+            self._table.remove(key)
+            slots = self._by_mac[key[0]]
+            slots.remove(slot)
+            if not slots:
+                del self._by_mac[key[0]]
+                self._state.pop(key[0], None)
+
+    async def _run(self, interval: float) -> None:
+        try:
+            while True:
+                await asyncio.sleep(interval)
+                self.process()
+        except asyncio.CancelledError:
+            pass
+
+    def start(self, interval: float = 1.0) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(interval))
+
+    def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
@@ -1,7 +1,10 @@
 import asyncio
 from collections.abc import Callable
+from dataclasses import dataclass
 import logging
 import struct
+import time
+import uuid
 
 from .const import BleProxyMode, ProxyAction
 from .exceptions import SmlightConnectionError
@@ -19,6 +22,129 @@ _LOGGER = logging.getLogger(__name__)
 BLE_PROXY_HEADER_STRUCT = struct.Struct("<BB6sBbB")
 BLE_PROXY_VERSION = 0
 
+PING_INTERVAL = 2.0
+MAX_MISSED_ACKS = 3
+
+BleAdvCallback = Callable[[bytes, int, int, bytes], None]
+
+# Advertising data (AD) structure types used for routing
+AD_TYPE_UUID16 = (0x02, 0x03)
+AD_TYPE_UUID32 = (0x04, 0x05)
+AD_TYPE_UUID128 = (0x06, 0x07)
+AD_TYPE_SERVICE_DATA16 = 0x16
+AD_TYPE_SERVICE_DATA32 = 0x20
+AD_TYPE_SERVICE_DATA128 = 0x21
+AD_TYPE_MANUFACTURER_DATA = 0xFF
+AD_TYPE_LOCAL_NAME = (0x08, 0x09)
+
+BLUETOOTH_BASE_UUID = "-0000-1000-8000-00805f9b34fb"
+
+
+def mac_to_bytes(mac: str) -> bytes:
+    """Convert a MAC string (AA:BB:CC:DD:EE:FF) to the proxy wire format.
+
+    The proxy sends addresses least significant byte first.
+    """
+    return bytes.fromhex(mac.replace(":", "").replace("-", ""))[::-1]
+
+
+def normalize_uuid(service_uuid: str | int) -> str:
+    """Expand a 16/32-bit or 128-bit service UUID to lowercase 128-bit form."""
+    if isinstance(service_uuid, int):
+        return f"{service_uuid:08x}{BLUETOOTH_BASE_UUID}"
+    value = service_uuid.lower().removeprefix("0x")
+    if len(value) <= 8:
+        return f"{int(value, 16):08x}{BLUETOOTH_BASE_UUID}"
+    return str(uuid.UUID(value))
+
+
+def _uuid_from_le(data: bytes) -> str:
+    if len(data) == 16:
+        return str(uuid.UUID(bytes=data[::-1]))
+    return f"{int.from_bytes(data, 'little'):08x}{BLUETOOTH_BASE_UUID}"
+
+
+def parse_adv_data(
+    raw_data: bytes, *, companies: bool = True, services: bool = True
+) -> tuple[set[int], set[str]]:
+    """Extract manufacturer company IDs and service UUIDs from advertising data."""
+    company_ids: set[int] = set()
+    service_uuids: set[str] = set()
+    offset = 0
+    end = len(raw_data)
+    while offset < end:
+        length = raw_data[offset]
+        if length == 0 or offset + 1 + length > end:
+            break
+        ad_type = raw_data[offset + 1]
+        value = raw_data[offset + 2 : offset + 1 + length]
+        offset += 1 + length
+
+        if ad_type == AD_TYPE_MANUFACTURER_DATA:
+            if companies and len(value) >= 2:
+                company_ids.add(value[0] | value[1] << 8)
+        elif not services:
+            continue
+        elif ad_type in AD_TYPE_UUID16:
+            for i in range(0, len(value) - 1, 2):
+                service_uuids.add(_uuid_from_le(value[i : i + 2]))
+        elif ad_type in AD_TYPE_UUID32:
+            for i in range(0, len(value) - 3, 4):
+                service_uuids.add(_uuid_from_le(value[i : i + 4]))
+        elif ad_type in AD_TYPE_UUID128:
+            for i in range(0, len(value) - 15, 16):
+                service_uuids.add(_uuid_from_le(value[i : i + 16]))
+        elif ad_type == AD_TYPE_SERVICE_DATA16 and len(value) >= 2:
+            service_uuids.add(_uuid_from_le(value[:2]))
+        elif ad_type == AD_TYPE_SERVICE_DATA32 and len(value) >= 4:
+            service_uuids.add(_uuid_from_le(value[:4]))
+        elif ad_type == AD_TYPE_SERVICE_DATA128 and len(value) >= 16:
+            service_uuids.add(_uuid_from_le(value[:16]))
+    return company_ids, service_uuids
+
+
+class BleProxyCounters:
+    """Running link counters updated by BleProxyProtocol."""
+
+    __slots__ = (
+        "packets",
+        "bytes",
+        "adverts",
+        "parse_errors",
+        "resyncs",
+        "last_seen",
+    )
+
+    def __init__(self) -> None:
+        self.packets = 0
+        self.bytes = 0
+        self.adverts = 0
+        self.parse_errors = 0
+        self.resyncs = 0
+        self.last_seen: float | None = None  # time.monotonic()
+
+
+@dataclass
+class BleProxyStats:
+    """Snapshot of BLE proxy link statistics."""
+
+    connected: bool = False
+    rtt: float | None = None  # last PING->ACK round trip, seconds
+    rtt_avg: float | None = None  # smoothed round trip, seconds
+    pings_sent: int = 0
+    acks_received: int = 0
+    missed_acks: int = 0
+    reconnects: int = 0
+    packets: int = 0
+    bytes: int = 0
+    adverts: int = 0
+    parse_errors: int = 0
+    resyncs: int = 0
+    packets_per_sec: float = 0.0
+    bytes_per_sec: float = 0.0
+    adverts_per_sec: float = 0.0
+    last_seen: float | None = None  # wall clock time of last packet
+
 
 class BleProxyProtocol(asyncio.DatagramProtocol):
     """Protocol to handle incoming UDP packets from SLZB BLE Proxy server."""
@@ -27,19 +153,31 @@ class BleProxyProtocol(asyncio.DatagramProtocol):
         self,
         callback: Callable[[bytes, int, int, bytes], None],
         on_ack: Callable[[], None],
+        counters: BleProxyCounters | None = None,
     ) -> None:
         self.callback = callback
         self.on_ack = on_ack
+        self.counters = counters if counters is not None else BleProxyCounters()
 
     def datagram_received(self, data: bytes, addr: tuple[str, int]) -> None:
+        counters = self.counters
+        counters.packets += 1
+        counters.bytes += len(data)
+        counters.last_seen = time.monotonic()
+        adverts = 0
+        errors = 0
+        resyncs = 0
         try:
             offset = 0
             while offset < len(data):
                 if len(data) - offset < 2:
+                    errors += 1
                     break
 
                 version = data[offset]
                 if version != BLE_PROXY_VERSION:
+                    errors += 1
+                    resyncs += 1
                     offset = data.find(BLE_PROXY_VERSION, offset + 1)
                     if offset == -1:
                         break
@@ -55,6 +193,7 @@ class BleProxyProtocol(asyncio.DatagramProtocol):
 
                     if action == ProxyAction.DATA:
                         if len(data) - offset < BLE_PROXY_HEADER_STRUCT.size:
+                            errors += 1
                             break
 
                         (
@@ -70,6 +209,8 @@ class BleProxyProtocol(asyncio.DatagramProtocol):
                             len(data) - offset
                             < BLE_PROXY_HEADER_STRUCT.size + adv_data_len
                         ):
+                            errors += 1
+                            resyncs += 1
                             offset = data.find(BLE_PROXY_VERSION, offset + 1)
                             if offset == -1:
                                 break
@@ -89,15 +230,120 @@ class BleProxyProtocol(asyncio.DatagramProtocol):
                                 address_type,
                                 adv_data_len,
                             )
+                        adverts += 1
                         self.callback(mac_bytes, rssi, address_type, raw_data)
                         offset += BLE_PROXY_HEADER_STRUCT.size + adv_data_len
                         continue
 
+                errors += 1
+                resyncs += 1
                 offset = data.find(BLE_PROXY_VERSION, offset + 1)
                 if offset == -1:
                     break
         except Exception:
+            errors += 1
             _LOGGER.exception("Error parsing SLZB Bluetooth proxy packet from %s", addr)
+        finally:
+            counters.adverts += adverts
+            if errors:
+                counters.parse_errors += errors
+                counters.resyncs += resyncs
+
+
+class BleAdvertisementRouter:
+    """Fan out proxy advertisements to subscribers using hash indexes.
+
+    Pass an instance as the ``callback`` of BleProxyClient. Subscribers may
+    filter on exact address, address prefix (e.g. OUI), manufacturer company ID
+    or service UUID. Filters given to one subscription are OR-ed, and a callback
+    is called at most once per advertisement.
+    """
+
+    def __init__(self) -> None:
+        self._all: list[BleAdvCallback] = []
+        self._by_address: dict[bytes, list[BleAdvCallback]] = {}
+        # prefix length -> {wire bytes suffix: callbacks}
+        self._by_prefix: dict[int, dict[bytes, list[BleAdvCallback]]] = {}
+        self._by_company: dict[int, list[BleAdvCallback]] = {}
+        self._by_service: dict[str, list[BleAdvCallback]] = {}
+
+    def subscribe(
+        self,
+        callback: BleAdvCallback,
+        *,
+        address: str | None = None,
+        address_prefix: str | None = None,
+        manufacturer_id: int | None = None,
+        service_uuid: str | int | None = None,
+    ) -> Callable[[], None]:
+        """Register a callback for matching advertisements.
+
+        Without any filter the callback receives every advertisement.
+        Returns a function to remove the subscription.
+        """
+        entries: list[tuple[dict, object]] = []
+        if address is not None:
+            entries.append((self._by_address, mac_to_bytes(address)))
+        if address_prefix is not None:
+            prefix = mac_to_bytes(address_prefix)
+            if not 0 < len(prefix) < 6:
+                raise ValueError(f"Invalid address prefix: {address_prefix}")
+            entries.append((self._by_prefix.setdefault(len(prefix), {}), prefix))
+        if manufacturer_id is not None:
+            entries.append((self._by_company, manufacturer_id))
+        if service_uuid is not None:
+            entries.append((self._by_service, normalize_uuid(service_uuid)))
+
+        for index, key in entries:
+            index.setdefault(key, []).append(callback)
+        if not entries:
+            self._all.append(callback)
+
+        def remove_callback() -> None:
+            for index, key in entries:
+                if (callbacks := index.get(key)) and callback in callbacks:
+                    callbacks.remove(callback)
+                    if not callbacks:
+                        del index[key]
+            if not entries and callback in self._all:
+                self._all.remove(callback)
+            for length in [k for k, v in self._by_prefix.items() if not v]:
+                del self._by_prefix[length]
+
+        return remove_callback
+
+    def match(self, mac_bytes: bytes, raw_data: bytes) -> list[BleAdvCallback]:
+        """Return the callbacks subscribed to an advertisement."""
+        matched: list[BleAdvCallback] = self._all.copy()
+        if callbacks := self._by_address.get(mac_bytes):
+            matched.extend(callbacks)
+        for length, index in self._by_prefix.items():
+            if callbacks := index.get(mac_bytes[-length:]):
+                matched.extend(callbacks)
+        if self._by_company or self._by_service:
+            company_ids, service_uuids = parse_adv_data(
+                raw_data,
+                companies=bool(self._by_company),
+                services=bool(self._by_service),
+            )
+            for company_id in company_ids:
+                if callbacks := self._by_company.get(company_id):
+                    matched.extend(callbacks)
+            for service in service_uuids:
+                if callbacks := self._by_service.get(service):
+                    matched.extend(callbacks)
+        if len(matched) > 1:
+            matched = list(dict.fromkeys(matched))
+        return matched
+
+    def __call__(
+        self, mac_bytes: bytes, rssi: int, address_type: int, raw_data: bytes
+    ) -> None:
+        for callback in self.match(mac_bytes, raw_data):
+            try:
+                callback(mac_bytes, rssi, address_type, raw_data)
+            except Exception:
+                _LOGGER.exception("Error in BLE advertisement subscriber %s", callback)
 
 
 class BleProxyClient:
@@ -108,10 +354,12 @@ class BleProxyClient:
         esp32_ip: str,
         callback: Callable[[bytes, int, int, bytes], None],
         esp32_port: int = 5050,
+        max_missed_acks: int = MAX_MISSED_ACKS,
     ) -> None:
         self.esp32_ip = esp32_ip
         self.esp32_port = esp32_port
         self.callback = callback
+        self.max_missed_acks = max_missed_acks
         self.transport: asyncio.DatagramTransport | None = None
         self.protocol: BleProxyProtocol | None = None
         self._connect_task: asyncio.Task | None = None
@@ -119,6 +367,19 @@ class BleProxyClient:
         self._connected_evt = asyncio.Event()
         self.running = False
 
+        self.counters = BleProxyCounters()
+        self._ping_sent_at: float | None = None
+        self._pings_unacked = 0
+        self._missed_acks = 0
+        self._rtt: float | None = None
+        self._rtt_avg: float | None = None
+        self._pings_sent = 0
+        self._acks_received = 0
+        self._total_missed_acks = 0
+        self._reconnects = 0
+        self._rates = (0.0, 0.0, 0.0)
+        self._rate_sample: tuple[float, int, int, int] | None = None
+
     async def start(self) -> None:
         self.running = True
         self._connect_task = asyncio.create_task(self._connect_loop())
@@ -130,11 +391,15 @@ class BleProxyClient:
                 loop = asyncio.get_running_loop()
 
                 self.transport, self.protocol = await loop.create_datagram_endpoint(
-                    lambda: BleProxyProtocol(self.callback, self._on_ack),
+                    lambda: BleProxyProtocol(
+                        self.callback, self._on_ack, self.counters
+                    ),
                     local_addr=("0.0.0.0", 0),
                 )
 
                 self.local_port = self.transport.get_extra_info("sockname")[1]
+                # pings of a failed attempt are not missed ACKs of this one
+                self._reset_ping()
                 self._send_ping()
 
                 await asyncio.wait_for(self._connected_evt.wait(), timeout=2.0)
@@ -150,27 +415,104 @@ class BleProxyClient:
                 await asyncio.sleep(backoff)
                 backoff = min(backoff * 2, 60.0)
 
+    def _reset_ping(self) -> None:
+        self._ping_sent_at = None
+        self._pings_unacked = 0
+        self._missed_acks = 0
+
     def _on_ack(self) -> None:
         self._connected_evt.set()
+        self._acks_received += 1
+        # ACKs carry no sequence number, with several pings outstanding this
+        # may answer an older one, so only a single outstanding ping is timed
+        if self._ping_sent_at is not None and self._pings_unacked == 1:
+            rtt = time.monotonic() - self._ping_sent_at
+            self._rtt = rtt
+            self._rtt_avg = (
+                rtt if self._rtt_avg is None else self._rtt_avg * 0.875 + rtt * 0.125
+            )
+        self._reset_ping()
 
     def _send_ping(self) -> None:
         if self.transport and self.local_port != 0:
             ping_packet = struct.pack(
                 "<BBH", BLE_PROXY_VERSION, ProxyAction.PING, self.local_port
             )
+            if self._ping_sent_at is not None:
+                self._missed_acks += 1
+                self._total_missed_acks += 1
             try:
                 self.transport.sendto(ping_packet, (self.esp32_ip, self.esp32_port))
             except OSError as ex:
                 _LOGGER.warning("Error sending ping to SLZB BLE Proxy: %s", ex)
+            self._ping_sent_at = time.monotonic()
+            self._pings_unacked += 1
+            self._pings_sent += 1
 
     async def _ping_loop(self) -> None:
         try:
             while True:
-                await asyncio.sleep(2.0)
+                await asyncio.sleep(PING_INTERVAL)
+                self._update_rates()
+                if self._missed_acks >= self.max_missed_acks:
+                    _LOGGER.warning(
+                        "SLZB BLE Proxy missed %d ACKs, reconnecting",
+                        self._missed_acks,
+                    )
+                    self._reconnect()
+                    return
                 self._send_ping()
         except asyncio.CancelledError:
             pass
 
+    def _reconnect(self) -> None:
+        self._ping_task = None
+        self.stop_transport()
+        self._connected_evt.clear()
+        self._reset_ping()
+        self._reconnects += 1
+        if self.running:
+            self._connect_task = asyncio.create_task(self._connect_loop())
+
+    def _update_rates(self) -> None:
+        counters = self.counters
+        now = time.monotonic()
+        sample = (now, counters.packets, counters.bytes, counters.adverts)
+        if self._rate_sample is not None:
+            elapsed = now - self._rate_sample[0]
+            if elapsed > 0:
+                self._rates = (
+                    (sample[1] - self._rate_sample[1]) / elapsed,
+                    (sample[2] - self._rate_sample[2]) / elapsed,
+                    (sample[3] - self._rate_sample[3]) / elapsed,
+                )
+        self._rate_sample = sample
+
+    def get_stats(self) -> BleProxyStats:
+        """Return a snapshot of link statistics."""
+        counters = self.counters
+        last_seen = None
+        if counters.last_seen is not None:
+            last_seen = time.time() - (time.monotonic() - counters.last_seen)
+        return BleProxyStats(
+            connected=self._connected_evt.is_set(),
+            rtt=self._rtt,
+            rtt_avg=self._rtt_avg,
+            pings_sent=self._pings_sent,
+            acks_received=self._acks_received,
+            missed_acks=self._total_missed_acks,
+            reconnects=self._reconnects,
+            packets=counters.packets,
+            bytes=counters.bytes,
+            adverts=counters.adverts,
+            parse_errors=counters.parse_errors,
+            resyncs=counters.resyncs,
+            packets_per_sec=self._rates[0],
+            bytes_per_sec=self._rates[1],
+            adverts_per_sec=self._rates[2],
+            last_seen=last_seen,
+        )
+
     def stop_transport(self) -> None:
         if self.transport:
             try:
@@ -225,3 +567,131 @@ class BleProxyClient:
                 raise SmlightConnectionError(
                     f"Error requesting active scan window from SLZB BLE Proxy: {ex}"
                 ) from ex
+
+
+def has_local_name(raw_data: bytes) -> bool:
+    """Return true if advertising data carries a (shortened) local name."""
+    offset = 0
+    end = len(raw_data)
+    while offset + 1 < end:
+        length = raw_data[offset]
+        if length == 0:
+            break
+        if raw_data[offset + 1] in AD_TYPE_LOCAL_NAME:
+            return True
+        offset += 1 + length
+    return False
+
+
+class BleActiveScanScheduler:
+    """Request short active scan windows only while unresolved devices appear.
+
+    Subscribe an instance to the advertisement stream (directly as callback or
+    via BleAdvertisementRouter) and call start(). A device is resolved once it
+    has been seen during an active window or advertises its local name. Devices
+    that stay unresolved after max_attempts windows are treated as not scannable.
+    Without new unknown devices the interval between windows backs off up to
+    max_interval.
+    """
+
+    def __init__(
+        self,
+        client: BleProxyClient,
+        *,
+        window_ms: int = 500,
+        min_interval: float = 5.0,
+        max_interval: float = 300.0,
+        max_attempts: int = 3,
+        resolved_ttl: float = 3600.0,
+    ) -> None:
+        self.client = client
+        self.window_ms = window_ms
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.max_attempts = max_attempts
+        self.resolved_ttl = resolved_ttl
+        self.windows_requested = 0
+        self._resolved: dict[bytes, float] = {}  # mac -> last seen
+        self._pending: dict[bytes, int] = {}  # mac -> windows attempted
+        self._new_unknown = 0
+        self._interval = min_interval
+        self._next_window = 0.0
+        self._window_until = 0.0
+        self._task: asyncio.Task | None = None
+
+    @property
+    def unresolved(self) -> int:
+        return len(self._pending)
+
+    def __call__(
+        self, mac_bytes: bytes, rssi: int, address_type: int, raw_data: bytes
+    ) -> None:
+        now = time.monotonic()
+        if mac_bytes in self._resolved:
+            self._resolved[mac_bytes] = now
+        elif now < self._window_until or has_local_name(raw_data):
+            self._resolved[mac_bytes] = now
+            self._pending.pop(mac_bytes, None)
+        elif mac_bytes not in self._pending:
+            self._pending[mac_bytes] = 0
+            self._new_unknown += 1
+
+    def tick(self, now: float | None = None) -> bool:
+        """Request an active window if one is due. Returns true if requested."""
+        if now is None:
+            now = time.monotonic()
+        if not self._pending or now < self._next_window:
+            return False
+
+        try:
+            self.client.set_active_window(self.window_ms)
+        except SmlightConnectionError as err:
+            _LOGGER.warning("Active scan window request failed: %s", err)
+            return False
+
+        self.windows_requested += 1
+        # allow for packets of the window still in flight
+        self._window_until = now + self.window_ms / 1000 + 0.5
+        if self._new_unknown:
+            self._interval = self.min_interval
+        else:
+            self._interval = min(self._interval * 2, self.max_interval)
+        self._new_unknown = 0
+        self._next_window = now + self._interval
+
+        for mac, attempts in list(self._pending.items()):
+            if attempts >= self.max_attempts:
+                del self._pending[mac]
+                self._resolved[mac] = now
+            else:
+                self._pending[mac] = attempts + 1
+        return True
+
+    def expire(self, now: float | None = None) -> None:
+        """Forget resolved devices not seen within resolved_ttl."""
+        if now is None:
+            now = time.monotonic()
+        cutoff = now - self.resolved_ttl
+        self._resolved = {k: v for k, v in self._resolved.items() if v >= cutoff}
+
+    async def _run(self) -> None:
+        ticks = 0
+        try:
+            while True:
+                await asyncio.sleep(1.0)
+                if self.client.transport is not None:
+                    self.tick()
+                ticks += 1
+                if ticks % 60 == 0:
+                    self.expire()
+        except asyncio.CancelledError:
+            pass
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
@@ -0,0 +1,439 @@
+"""Compact binary encoding of model snapshots.
+
+encode() accepts a model, or any list / dict tree of models and plain values,
+for example a whole fleet snapshot {host: Sensors}. Layout:
+
+    header  magic "SMLB", format version (B)
+    schemas count (H), then per model class: name, field count (B) and the
+            name and kind of each field
+    value   one tagged value, models refer to their schema by index
+
+Fields typed bool, int or float (optionally None) form a fixed struct block
+per model: a bitmap of None fields followed by the values packed in one call.
+Other fields follow as tagged values. Field names and kinds are written once
+per schema and decoding uses the writer's layout and matches fields by name,
+so data written by an older or newer version of a model decodes with defaults
+for fields it lacks and ignores fields the model no longer has. Models are
+built directly from the unpacked values, without an intermediate from_dict.
+"""
+
+from __future__ import annotations
+
+from dataclasses import fields
+from enum import Enum
+from functools import cache
+from operator import attrgetter
+import struct
+from types import NoneType, UnionType
+from typing import Any, Union, get_args, get_origin, get_type_hints
+
+from mashumaro import DataClassDictMixin
+
+from .models import (
+    AmbilightPayload,
+    BleFeatures,
+    BleSession,
+    BuzzerPayload,
+    CapabilityProfile,
+    Firmware,
+    Info,
+    IRPayload,
+    Radio,
+    Sensors,
+    SettingsEvent,
+)
+
+MAGIC = b"SMLB"
+FORMAT_VERSION = 1
+
+MODELS: dict[str, type[DataClassDictMixin]] = {
+    cls.__name__: cls
+    for cls in (
+        AmbilightPayload,
+        BleFeatures,
+        BleSession,
+        BuzzerPayload,
+        CapabilityProfile,
+        Firmware,
+        Info,
+        IRPayload,
+        Radio,
+        Sensors,
+        SettingsEvent,
+    )
+}
+
+T_NONE = 0
+T_FALSE = 1
+T_TRUE = 2
+T_INT8 = 3
+T_INT32 = 4
+T_INT64 = 5
+T_FLOAT = 6
+T_STR = 7
+T_LIST = 8
+T_DICT = 9
+T_MODEL = 10
+T_STR_REF = 11  # index of a string written earlier
+T_BOOLS = 12  # list of bools as a bitmap
+
+U16 = struct.Struct("<H")
+U32 = struct.Struct("<I")
+I8_VALUE = struct.Struct("<Bb")
+I32_VALUE = struct.Struct("<Bi")
+I64_VALUE = struct.Struct("<Bq")
+FLOAT_VALUE = struct.Struct("<Bd")
+I8 = struct.Struct("<b")
+I32 = struct.Struct("<i")
+I64 = struct.Struct("<q")
+FLOAT = struct.Struct("<d")
+HEADER = struct.Struct("<4sB")
+# lengths below LONG_LENGTH take one byte, others LONG_LENGTH and a u32
+LONG_LENGTH = 0xFF
+
+
+# field kinds, fixed ones are struct format characters
+KIND_BOOL = "?"
+KIND_INT = "q"
+KIND_FLOAT = "d"
+KIND_VALUE = "v"
+
+
+def _field_kind(hint: Any) -> str:
+    if get_origin(hint) in (Union, UnionType):
+        args = [arg for arg in get_args(hint) if arg is not NoneType]
+        if len(args) != 1:
+            return KIND_VALUE
+        hint = args[0]
+    if hint is bool:
+        return KIND_BOOL
+    if hint is float:
+        return KIND_FLOAT
+    if isinstance(hint, type) and issubclass(hint, int):
+        return KIND_INT
+    return KIND_VALUE
+
+
+class _Layout:
+    """Order in which the fields of a model are written."""
+
+    def __init__(self, names: tuple[str, ...], kinds: str) -> None:
+        self.names = names
+        self.kinds = kinds
+        self.fixed = tuple(i for i, k in enumerate(kinds) if k != KIND_VALUE)
+        self.variable = tuple(i for i, k in enumerate(kinds) if k == KIND_VALUE)
+        self.fixed_names = tuple(names[i] for i in self.fixed)
+        self.variable_names = tuple(names[i] for i in self.variable)
+        self.mask_size = (len(self.fixed) + 7) // 8
+        self.struct = struct.Struct("<" + "".join(kinds[i] for i in self.fixed))
+
+
+@cache
+def _schema(cls: type) -> tuple[_Layout, attrgetter]:
+    hints = get_type_hints(cls)
+    names = tuple(f.name for f in fields(cls))
+    kinds = "".join(_field_kind(hints[name]) for name in names)
+    return _Layout(names, kinds), attrgetter(*names)
+
+
+@cache
+def _decode_info(cls: type) -> tuple[frozenset[str], tuple[tuple[str, type], ...]]:
+    """Field names of a model and the enum type of enum fields."""
+    hints = get_type_hints(cls)
+    enums = []
+    for f in fields(cls):
+        hint = hints[f.name]
+        if get_origin(hint) in (Union, UnionType):
+            args = [arg for arg in get_args(hint) if arg is not NoneType]
+            hint = args[0] if len(args) == 1 else None
+        if isinstance(hint, type) and issubclass(hint, Enum):
+            enums.append((f.name, hint))
+    return frozenset(f.name for f in fields(cls)), tuple(enums)
+
+
+def _write_length(out: bytearray, length: int) -> None:
+    if length < LONG_LENGTH:
+        out.append(length)
+    else:
+        out.append(LONG_LENGTH)
+        out += U32.pack(length)
+
+
+def _write_str(out: bytearray, value: str) -> None:
+    data = value.encode()
+    _write_length(out, len(data))
+    out += data
+
+
+class _Encoder:
+    def __init__(self) -> None:
+        self.out = bytearray()
+        self.schemas: dict[type, int] = {}
+        self.strings: dict[str, int] = {}
+
+    def write(self, value: Any) -> None:
+        out = self.out
+        if value is None:
+            out.append(T_NONE)
+        elif isinstance(value, str):
+            # fleet snapshots repeat models, versions and chips many times
+            ref = self.strings.get(value)
+            if ref is None:
+                self.strings[value] = len(self.strings)
+                out.append(T_STR)
+                _write_str(out, value)
+            else:
+                out.append(T_STR_REF)
+                _write_length(out, ref)
+        elif value is True:
+            out.append(T_TRUE)
+        elif value is False:
+            out.append(T_FALSE)
+        elif isinstance(value, Enum):
+            self.write(value.value)
+        elif isinstance(value, int):
+            if -128 <= value < 128:
+                out += I8_VALUE.pack(T_INT8, value)
+            elif -(2**31) <= value < 2**31:
+                out += I32_VALUE.pack(T_INT32, value)
+            else:
+                out += I64_VALUE.pack(T_INT64, value)
+        elif isinstance(value, float):
+            out += FLOAT_VALUE.pack(T_FLOAT, value)
+        elif isinstance(value, DataClassDictMixin):
+            cls = type(value)
+            index = self.schemas.get(cls)
+            if index is None:
+                if MODELS.get(cls.__name__) is not cls:
+                    raise TypeError(f"Cannot encode {cls.__name__}")
+                index = self.schemas[cls] = len(self.schemas)
+            out.append(T_MODEL)
+            out += U16.pack(index)
+            layout, getter = _schema(cls)
+            items = getter(value)
+            mask = 0
+            packed = []
+            for bit, i in enumerate(layout.fixed):
+                item = items[i]
+                if item is None:
+                    mask |= 1 << bit
+                    item = 0
+                packed.append(item)
+            out += mask.to_bytes(layout.mask_size, "little")
+            try:
+                out += layout.struct.pack(*packed)
+            except struct.error as err:
+                raise TypeError(f"Cannot encode {cls.__name__}: {err}") from err
+            for i in layout.variable:
+                self.write(items[i])
+        elif (
+            isinstance(value, list | tuple)
+            and value
+            and all(item is True or item is False for item in value)
+        ):
+            out.append(T_BOOLS)
+            _write_length(out, len(value))
+            out += sum(1 << i for i, item in enumerate(value) if item).to_bytes(
+                (len(value) + 7) // 8, "little"
+            )
+        elif isinstance(value, list | tuple):
+            out.append(T_LIST)
+            _write_length(out, len(value))
+            for item in value:
+                self.write(item)
+        elif isinstance(value, dict):
+            out.append(T_DICT)
+            _write_length(out, len(value))
+            for key, item in value.items():
+                self.write(key)
+                self.write(item)
+        else:
+            raise TypeError(f"Cannot encode {type(value).__name__}")
+
+    def finish(self) -> bytes:
+        header = bytearray(HEADER.pack(MAGIC, FORMAT_VERSION))
+        header += U16.pack(len(self.schemas))
+        for cls in self.schemas:
+            layout = _schema(cls)[0]
+            _write_str(header, cls.__name__)
+            header.append(len(layout.names))
+            for name, kind in zip(layout.names, layout.kinds):
+                _write_str(header, name)
+                header += kind.encode()
+        header += self.out
+        return bytes(header)
+
+
+class _Decoder:
+    def __init__(self, data: bytes) -> None:
+        self.data = bytes(data)
+        self.pos = 0
+        # model, writer layout, fields the model no longer has, enum fields
+        self.schemas: list[
+            tuple[
+                type[DataClassDictMixin],
+                _Layout,
+                tuple[str, ...],
+                tuple[tuple[str, type], ...],
+            ]
+        ] = []
+        self.strings: list[str] = []
+
+    def read_length(self) -> int:
+        length = self.data[self.pos]
+        self.pos += 1
+        if length == LONG_LENGTH:
+            (length,) = U32.unpack_from(self.data, self.pos)
+            self.pos += U32.size
+        return length
+
+    def read_str(self) -> str:
+        length = self.read_length()
+        end = self.pos + length
+        if end > len(self.data):
+            raise ValueError("Truncated data")
+        value = str(self.data[self.pos : end], "utf-8")
+        self.pos = end
+        return value
+
+    def read_header(self) -> None:
+        magic, version = HEADER.unpack_from(self.data)
+        if magic != MAGIC:
+            raise ValueError("Not an encoded model snapshot")
+        if version > FORMAT_VERSION:
+            raise ValueError(f"Unsupported format version {version}")
+        self.pos = HEADER.size
+        (count,) = U16.unpack_from(self.data, self.pos)
+        self.pos += U16.size
+        for _ in range(count):
+            name = self.read_str()
+            cls = MODELS.get(name)
+            if cls is None:
+                raise ValueError(f"Unknown model {name}")
+            names = []
+            kinds = []
+            n_fields = self.data[self.pos]
+            self.pos += 1
+            for _ in range(n_fields):
+                names.append(self.read_str())
+                kind = chr(self.data[self.pos])
+                self.pos += 1
+                if kind not in (KIND_BOOL, KIND_INT, KIND_FLOAT, KIND_VALUE):
+                    raise ValueError(f"Unknown field kind {kind}")
+                kinds.append(kind)
+            known, enums = _decode_info(cls)
+            unknown = tuple(name for name in names if name not in known)
+            self.schemas.append(
+                (cls, _Layout(tuple(names), "".join(kinds)), unknown, enums)
+            )
+
+    def read(self) -> Any:
+        """Read one value."""
+        data = self.data
+        pos = self.pos
+        tag = data[pos]
+        pos += 1
+        # most frequent tags first, fleet snapshots are mostly string refs
+        if tag == T_STR_REF:
+            ref = data[pos]
+            if ref != LONG_LENGTH:
+                self.pos = pos + 1
+                return self.strings[ref]
+            self.pos = pos
+            return self.strings[self.read_length()]
+        if tag == T_NONE:
+            self.pos = pos
+            return None
+        if tag == T_MODEL:
+            self.pos = pos
+            return self.read_model()
+        if tag == T_STR:
+            self.pos = pos
+            value = self.read_str()
+            self.strings.append(value)
+            return value
+        if tag == T_INT8:
+            self.pos = pos + 1
+            return I8.unpack_from(data, pos)[0]
+        if tag == T_TRUE:
+            self.pos = pos
+            return True
+        if tag == T_FALSE:
+            self.pos = pos
+            return False
+        if tag == T_INT32:
+            self.pos = pos + 4
+            return I32.unpack_from(data, pos)[0]
+        if tag == T_INT64:
+            self.pos = pos + 8
+            return I64.unpack_from(data, pos)[0]
+        if tag == T_FLOAT:
+            self.pos = pos + 8
+            return FLOAT.unpack_from(data, pos)[0]
+        self.pos = pos
+        if tag == T_BOOLS:
+            length = self.read_length()
+            end = self.pos + (length + 7) // 8
+            bits = int.from_bytes(data[self.pos : end], "little")
+            self.pos = end
+            return [bool(bits >> i & 1) for i in range(length)]
+        if tag == T_LIST:
+            return [self.read() for _ in range(self.read_length())]
+        if tag == T_DICT:
+            return {self.read(): self.read() for _ in range(self.read_length())}
+        raise ValueError(f"Unknown tag {tag}")
+
+    def read_model(self) -> Any:
+        """Build a model from its fixed block and variable fields."""
+        data = self.data
+        pos = self.pos
+        (index,) = U16.unpack_from(data, pos)
+        cls, layout, unknown, enums = self.schemas[index]
+        pos += 2
+        end = pos + layout.mask_size
+        mask = int.from_bytes(data[pos:end], "little")
+        fixed = layout.struct.unpack_from(data, end)
+        self.pos = end + layout.struct.size
+        if mask:
+            fixed = tuple(
+                None if mask >> bit & 1 else item for bit, item in enumerate(fixed)
+            )
+        kwargs = dict(zip(layout.fixed_names, fixed))
+        strings = self.strings
+        read = self.read
+        for name in layout.variable_names:
+            # inline the string ref and None cases of read()
+            pos = self.pos
+            tag = data[pos]
+            if tag == T_STR_REF and data[pos + 1] != LONG_LENGTH:
+                kwargs[name] = strings[data[pos + 1]]
+                self.pos = pos + 2
+            elif tag == T_NONE:
+                kwargs[name] = None
+                self.pos = pos + 1
+            else:
+                kwargs[name] = read()
+        for name in unknown:
+            del kwargs[name]
+        for name, enum in enums:
+            item = kwargs.get(name)
+            if item is not None:
+                kwargs[name] = enum(item)
+        return cls(**kwargs)
+
+
+def encode(value: Any) -> bytes:
+    """Encode a model, or a list / dict tree containing models."""
+    encoder = _Encoder()
+    encoder.write(value)
+    return encoder.finish()
+
+
+def decode(data: bytes) -> Any:
+    """Decode data written by encode()."""
+    decoder = _Decoder(data)
+    try:
+        decoder.read_header()
+        return decoder.read()
+    except (IndexError, struct.error) as err:
+        raise ValueError("Truncated data") from err
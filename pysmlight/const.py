@@ -324,3 +324,30 @@ class ProxyAction(IntEnum):
     DATA = 3
     SET_SCAN_MODE = 4
     REQ_ACTIVE_WINDOW = 5
+
+
+class IRProtocol(Enum):
+    RAW = "raw"
+    NEC = "nec"
+    NEC_EXT = "nec_ext"
+    SAMSUNG = "samsung"
+    SONY12 = "sony12"
+    SONY15 = "sony15"
+    SONY20 = "sony20"
+    RC5 = "rc5"
+    RC6 = "rc6"
+
+
+class UptimeEventType(Enum):
+    REBOOT = "reboot"
+    SOCKET_RECONNECT = "socket_reconnect"
+    OTBR_RESTART = "otbr_restart"
+
+
+class RequestPriority(IntEnum):
+    """Order in which queued requests to a device are started."""
+
+    CONTROL = 0  # commands, toggles, IR, Ambilight
+    FIRMWARE = 1
+    POLLING = 2  # info and sensors
+    BULK = 3  # page and parameter reads
@@ -0,0 +1,72 @@
+"""Capabilities of SMLIGHT device models.
+
+Compiled once at import from Devices, UDevices, MR_DEVICE_RADIO_MAP and
+PERIPHERAL_MODELS so lookups are a single dict access per model.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from .const import MR_DEVICE_RADIO_MAP, PERIPHERAL_MODELS, Devices, UDevices
+
+U_DEVICE_IDS = frozenset(udev.value for udev in UDevices)
+# bound on models not known at import that are cached after first lookup
+MAX_UNKNOWN_MODELS = 256
+
+
+@dataclass(frozen=True, slots=True)
+class DeviceModel:
+    model: str
+    device_id: int | None
+    u_device: bool  # ESP32-S3 based
+    ultima: bool
+    peripherals: bool  # Ambilight, buzzer, IR
+    esp_fw_type: str
+    zigbee_model: str  # zigbee firmware model for radios without a mapping
+    radio_models: tuple[str, ...]  # zigbee firmware model per radio index
+
+    def radio_model(self, idx: int) -> str:
+        """Return the model to look up zigbee firmware for radio idx."""
+        if 0 <= idx < len(self.radio_models):
+            return self.radio_models[idx]
+        return self.zigbee_model
+
+
+def _compile(model: str) -> DeviceModel:
+    device_id = Devices.get(model)
+    u_device = (
+        model.endswith("U") or device_id in U_DEVICE_IDS or "ultima" in model.lower()
+    )
+    zigbee_model = model
+    if model.endswith("U") and not MR_DEVICE_RADIO_MAP.get(model):
+        zigbee_model = model[:-1]
+    return DeviceModel(
+        model=model,
+        device_id=device_id,
+        u_device=u_device,
+        ultima="Ultima" in model,
+        peripherals=any(s in model for s in PERIPHERAL_MODELS),
+        esp_fw_type="ESPs3" if u_device else "ESP",
+        zigbee_model=zigbee_model,
+        radio_models=MR_DEVICE_RADIO_MAP.get(zigbee_model, ()),
+    )
+
+
+DEVICE_MODELS: dict[str, DeviceModel] = {
+    model: _compile(model) for model in (*Devices, *MR_DEVICE_RADIO_MAP, "")
+}
+_unknown: dict[str, DeviceModel] = {}
+
+
+def get_device_model(model: str | None) -> DeviceModel:
+    """Return the capabilities of a model, also for models not in Devices."""
+    record = DEVICE_MODELS.get(model or "")
+    if record is None:
+        assert model is not None
+        record = _unknown.get(model)
+        if record is None:
+            record = _compile(model)
+            if len(_unknown) < MAX_UNKNOWN_MODELS:
+                _unknown[model] = record
+    return record
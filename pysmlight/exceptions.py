@@ -11,3 +11,7 @@ class SmlightConnectionError(SmlightError):
 
 class SmlightAuthError(SmlightError):
     """SMLIGHT authentication exception."""
+
+
+class SmlightTimeoutError(SmlightConnectionError):
+    """SMLIGHT request not started before its deadline."""
@@ -0,0 +1,315 @@
+"""In-memory time series of device sensor readings.
+
+Samples are stored column by column in fixed size ring buffers backed by
+float64 arrays, one column per sensor plus a timestamp column, so a sample
+costs 56 bytes instead of a Sensors instance. float64 keeps byte counters such
+as fs_used exact, float32 would round them above 2**24. Every sample is also
+folded into fixed interval min / max / mean / count buckets kept in a second,
+much longer ring, so older data stays available in downsampled form after the
+raw samples have been overwritten.
+"""
+
+from __future__ import annotations
+
+import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from itertools import filterfalse
+import math
+import time
+
+from .models import Sensors
+
+SENSOR_COLUMNS = (
+    "esp32_temp",
+    "zb_temp",
+    "zb_temp2",
+    "ram_usage",
+    "psram_usage",
+    "fs_used",
+)
+ROLLUP_STATS = ("min", "max", "mean", "count")
+NAN = float("nan")
+
+
+@dataclass(slots=True)
+class Rollup:
+    start: float
+    min: float
+    max: float
+    mean: float
+    count: int
+
+
+class _Ring:
+    """Fixed capacity ring of a timestamp column and float64 value columns."""
+
+    def __init__(self, capacity: int, columns: Iterable[str]) -> None:
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.head = 0
+        self.count = 0
+        self.time = array.array("d", bytes(8 * capacity))
+        self.columns = {name: array.array("d", bytes(8 * capacity)) for name in columns}
+
+    def append(self, timestamp: float, values: Sequence[float]) -> None:
+        head = self.head
+        self.time[head] = timestamp
+        for column, value in zip(self.columns.values(), values):
+            column[head] = value
+        self.head = head + 1 if head + 1 < self.capacity else 0
+        if self.count < self.capacity:
+            self.count += 1
+
+    def ordered(self, data: array.array) -> array.array:
+        """Return a column in chronological order."""
+        if self.count < self.capacity:
+            return data[: self.count]
+        return data[self.head :] + data[: self.head]
+
+    def export(self) -> dict[str, array.array]:
+        out = {"time": self.ordered(self.time)}
+        for name, column in self.columns.items():
+            out[name] = self.ordered(column)
+        return out
+
+    @property
+    def last_time(self) -> float | None:
+        if not self.count:
+            return None
+        return self.time[self.head - 1]
+
+
+class SensorSeries:
+    """Sensor history of one device.
+
+    capacity raw samples are kept at full resolution. Rollups cover
+    rollup_interval seconds each and rollup_capacity of them are kept, by
+    default 15 minute buckets for 93 days.
+    """
+
+    def __init__(
+        self,
+        *,
+        capacity: int = 2880,
+        rollup_interval: float = 900.0,
+        rollup_capacity: int = 8928,
+        columns: Sequence[str] = SENSOR_COLUMNS,
+    ) -> None:
+        self.column_names = tuple(columns)
+        self.rollup_interval = rollup_interval
+        self.raw = _Ring(capacity, self.column_names)
+        self.rollups = _Ring(
+            rollup_capacity,
+            (f"{name}_{stat}" for name in self.column_names for stat in ROLLUP_STATS),
+        )
+        self._bucket_start: float | None = None
+        # running [min, max, sum, count] per column of the current bucket
+        self._acc = [[math.inf, -math.inf, 0.0, 0] for _ in self.column_names]
+
+    def __len__(self) -> int:
+        return self.raw.count
+
+    def add(self, sensors: Sensors, timestamp: float | None = None) -> None:
+        """Record the numeric readings of a Sensors snapshot."""
+        values = [getattr(sensors, name) for name in self.column_names]
+        self.add_values(values, time.time() if timestamp is None else timestamp)
+
+    def add_values(self, values: Sequence[float | None], timestamp: float) -> None:
+        """Record one sample, None for missing readings.
+
+        Samples older than the newest one recorded are dropped.
+        """
+        last = self.raw.last_time
+        if last is not None and timestamp < last:
+            return
+        row = [NAN if v is None else float(v) for v in values]
+        self.raw.append(timestamp, row)
+
+        bucket = timestamp - timestamp % self.rollup_interval
+        if self._bucket_start != bucket:
+            self._close_bucket()
+            self._bucket_start = bucket
+        for acc, value in zip(self._acc, row):
+            if value == value:
+                if value < acc[0]:
+                    acc[0] = value
+                if value > acc[1]:
+                    acc[1] = value
+                acc[2] += value
+                acc[3] += 1
+
+    def _close_bucket(self) -> None:
+        if self._bucket_start is None:
+            return
+        row: list[float] = []
+        for acc in self._acc:
+            lo, hi, total, n = acc
+            row += (lo, hi, total / n, n) if n else (NAN, NAN, NAN, 0)
+            acc[:] = (math.inf, -math.inf, 0.0, 0)
+        self.rollups.append(self._bucket_start, row)
+        self._bucket_start = None
+
+    def rollup(
+        self,
+        column: str,
+        window: float,
+        start: float | None = None,
+        end: float | None = None,
+    ) -> list[Rollup]:
+        """Aggregate column into window second buckets.
+
+        Buckets are aligned to multiples of window and empty buckets are
+        omitted. Before the oldest raw sample the completed rollups are
+        aggregated instead, each counted in the bucket of its start time, so
+        older data has rollup_interval resolution.
+        """
+        if window <= 0:
+            raise ValueError("window must be positive")
+        times = self.raw.ordered(self.raw.time)
+        if not times:
+            return []
+        rollup_times = self.rollups.ordered(self.rollups.time)
+        if start is None:
+            start = rollup_times[0] if rollup_times else times[0]
+        if end is None:
+            end = times[-1] + window
+
+        # completed rollups up to the one holding the oldest raw sample, raw
+        # samples after it, so every sample is counted once
+        cut = times[0]
+        count = bisect_right(rollup_times, cut)
+        if count:
+            cut = max(cut, rollup_times[count - 1] + self.rollup_interval)
+        old = self._aggregate_rollups(
+            column, rollup_times[:count], window, start, min(end, cut)
+        )
+        new = self._aggregate_raw(column, times, window, max(start, cut), end)
+        if old and new and old[-1].start == new[0].start:
+            a, b = old.pop(), new[0]
+            n = a.count + b.count
+            new[0] = Rollup(
+                a.start,
+                min(a.min, b.min),
+                max(a.max, b.max),
+                (a.mean * a.count + b.mean * b.count) / n,
+                n,
+            )
+        return old + new
+
+    def _aggregate_raw(
+        self,
+        column: str,
+        times: array.array,
+        window: float,
+        start: float,
+        end: float,
+    ) -> list[Rollup]:
+        values = self.raw.ordered(self.raw.columns[column])
+        result = []
+        bucket = start - start % window
+        i = bisect_left(times, start)
+        while bucket < end and i < len(times):
+            j = bisect_left(times, min(bucket + window, end), i)
+            chunk = list(filterfalse(math.isnan, values[i:j]))
+            if chunk:
+                result.append(
+                    Rollup(
+                        bucket,
+                        min(chunk),
+                        max(chunk),
+                        math.fsum(chunk) / len(chunk),
+                        len(chunk),
+                    )
+                )
+            i = j
+            bucket += window
+            if i < len(times) and times[i] >= bucket + window:
+                # skip ahead over a gap without samples
+                bucket = times[i] - times[i] % window
+        return result
+
+    def _aggregate_rollups(
+        self,
+        column: str,
+        times: array.array,
+        window: float,
+        start: float,
+        end: float,
+    ) -> list[Rollup]:
+        rollups = self.rollups
+        mins = rollups.ordered(rollups.columns[f"{column}_min"])
+        maxs = rollups.ordered(rollups.columns[f"{column}_max"])
+        means = rollups.ordered(rollups.columns[f"{column}_mean"])
+        counts = rollups.ordered(rollups.columns[f"{column}_count"])
+        result = []
+        i = bisect_left(times, start)
+        last = bisect_left(times, end, i)
+        while i < last:
+            bucket = times[i] - times[i] % window
+            j = bisect_left(times, bucket + window, i, last)
+            # buckets without readings of column hold NaN
+            rows = [k for k in range(i, j) if counts[k]]
+            if rows:
+                n = int(math.fsum(counts[i:j]))
+                result.append(
+                    Rollup(
+                        bucket,
+                        min(mins[k] for k in rows),
+                        max(maxs[k] for k in rows),
+                        math.fsum(means[k] * counts[k] for k in rows) / n,
+                        n,
+                    )
+                )
+            i = j
+        return result
+
+    def export(self) -> dict[str, array.array]:
+        """Return raw samples as chronological columns, keyed time and column."""
+        return self.raw.export()
+
+    def export_rollups(self) -> dict[str, array.array]:
+        """Return completed rollup buckets as columns such as zb_temp_max."""
+        return self.rollups.export()
+
+
+class SensorHistory:
+    """Sensor histories of many devices keyed by host."""
+
+    def __init__(self, **series_options) -> None:
+        self.series_options = series_options
+        self._series: dict[str, SensorSeries] = {}
+
+    def __contains__(self, host: str) -> bool:
+        return host in self._series
+
+    def add(self, host: str, sensors: Sensors, timestamp: float | None = None) -> None:
+        series = self._series.get(host)
+        if series is None:
+            series = self._series[host] = SensorSeries(**self.series_options)
+        series.add(sensors, timestamp)
+
+    def get(self, host: str) -> SensorSeries | None:
+        return self._series.get(host)
+
+    def remove(self, host: str) -> None:
+        self._series.pop(host, None)
+
+    def rollup(
+        self,
+        column: str,
+        window: float,
+        start: float | None = None,
+        end: float | None = None,
+    ) -> dict[str, list[Rollup]]:
+        """Aggregate column for every device."""
+        return {
+            host: series.rollup(column, window, start, end)
+            for host, series in self._series.items()
+        }
+
+    def export(self) -> dict[str, dict[str, array.array]]:
+        """Return raw samples of every device."""
+        return {host: series.export() for host, series in self._series.items()}
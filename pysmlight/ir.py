@@ -0,0 +1,515 @@
+"""Infrared code handling on top of IRPayload."""
+
+from __future__ import annotations
+
+import array
+import asyncio
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from dataclasses import dataclass, field
+import heapq
+import itertools
+import logging
+import math
+import statistics
+from typing import TYPE_CHECKING
+
+from .const import Events, IRProtocol
+from .exceptions import SmlightConnectionError
+from .models import IR_TICK_US, IRPayload
+
+if TYPE_CHECKING:
+    from .sse import sseClient
+    from .web import ActionWrapper
+
+_LOGGER = logging.getLogger(__name__)
+
+MAX_TICKS = 0xFFFF
+# pulses this close to x.5 units are looked up under both neighbouring units
+SIGNATURE_BOUNDARY = 0.15
+MAX_AMBIGUOUS_PULSES = 4
+LINEAR_UNITS = 4
+# time the emitter needs between transmissions
+IR_RECOVERY_TIME = 0.3
+
+
+def _to_ticks(timings: Sequence[int]) -> array.array:
+    return array.array("H", [min(MAX_TICKS, max(1, t // IR_TICK_US)) for t in timings])
+
+
+def _unit_ratios(ticks: Sequence[int]) -> list[float]:
+    """Pulse lengths in base units, log-compressed above LINEAR_UNITS.
+
+    Long header pulses are only a few ticks away from their neighbours in
+    relative terms, so they are bucketed on a logarithmic scale.
+    """
+    shortest = min(ticks)
+    unit = statistics.fmean([t for t in ticks if t <= shortest * 1.5])
+    ratios = [t / unit for t in ticks]
+    return [
+        r if r < LINEAR_UNITS else LINEAR_UNITS + 2 * math.log2(r / LINEAR_UNITS)
+        for r in ratios
+    ]
+
+
+def timing_signature(ticks: Sequence[int]) -> tuple[int, ...]:
+    """Quantize pulse lengths to multiples of the code's base unit.
+
+    Captures of the same button differ by a few percent per pulse but map to
+    the same signature, e.g. NEC becomes (8, 6, 1, 1, 1, 3, ...).
+    """
+    if not ticks:
+        return ()
+    return tuple(round(r) for r in _unit_ratios(ticks))
+
+
+def signature_candidates(ticks: Sequence[int]) -> list[tuple[int, ...]]:
+    """Return the signature plus variants for pulses near a rounding boundary."""
+    if not ticks:
+        return [()]
+    ratios = _unit_ratios(ticks)
+    base = [round(r) for r in ratios]
+    candidates = [base]
+    ambiguous = [
+        i for i, r in enumerate(ratios) if abs(r % 1 - 0.5) < SIGNATURE_BOUNDARY
+    ]
+    for i in ambiguous[:MAX_AMBIGUOUS_PULSES]:
+        other = int(ratios[i]) + (base[i] == int(ratios[i]))
+        candidates += [[*c[:i], other, *c[i + 1 :]] for c in candidates]
+    return [tuple(c) for c in candidates]
+
+
+def neighbour_signatures(signature: tuple[int, ...]) -> Iterator[tuple[int, ...]]:
+    """Yield the signatures with one pulse a unit shorter or longer."""
+    for i, units in enumerate(signature):
+        for other in (units - 1, units + 1):
+            if other >= 0:
+                yield (*signature[:i], other, *signature[i + 1 :])
+
+
+class IRCodeLibrary:
+    """Store IR codes compactly and match learned captures by tolerance.
+
+    Codes are kept as 16-bit tick arrays (50 us per tick) and indexed by their
+    timing signature. A lookup hashes the signature of the incoming capture
+    (plus variants for pulses on a quantization boundary) and only verifies the
+    few codes sharing it, so matching does not scan the library. If none
+    matches, the signatures with any one pulse a unit off are probed too.
+
+    tolerance (relative, per pulse) verifies the codes found by the lookup. A
+    capture with two or more pulses rounding to other units than the stored
+    code, away from the rounding boundary, is not matched or deduplicated even
+    if every pulse is within tolerance.
+    """
+
+    def __init__(self, tolerance: float = 0.25) -> None:
+        self.tolerance = tolerance
+        self._codes: dict[str, tuple[array.array, int | None]] = {}
+        self._by_signature: dict[tuple[int, ...], list[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._codes
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._codes)
+
+    def add(
+        self,
+        name: str,
+        code: IRPayload | Sequence[int],
+        freq: int | None = None,
+        *,
+        dedup: bool = True,
+    ) -> str:
+        """Store a code from an IRPayload or raw timings in microseconds.
+
+        freq (Hz) only applies to raw timings. With dedup, a code matching an
+        existing entry is not stored again and the name of the existing entry
+        is returned, compare it with name to tell.
+        """
+        if isinstance(code, IRPayload):
+            freq_khz = code.freq
+            code = code.to_raw_timings()
+        else:
+            freq_khz = round(freq / 1000) if freq else None
+        ticks = _to_ticks(code)
+        if dedup and (existing := self._match_ticks(ticks)) is not None:
+            if existing != name:
+                _LOGGER.debug("IR code %s matches stored code %s", name, existing)
+            return existing
+        if name in self._codes:
+            self.remove(name)
+
+        self._codes[name] = (ticks, freq_khz)
+        self._by_signature.setdefault(timing_signature(ticks), []).append(name)
+        return name
+
+    def remove(self, name: str) -> None:
+        ticks, _ = self._codes.pop(name)
+        signature = timing_signature(ticks)
+        names = self._by_signature[signature]
+        names.remove(name)
+        if not names:
+            del self._by_signature[signature]
+
+    def get(self, name: str) -> IRPayload:
+        """Return the stored code as an IRPayload ready to send."""
+        ticks, freq_khz = self._codes[name]
+        payload = IRPayload.from_raw_timings([t * IR_TICK_US for t in ticks])
+        if freq_khz is not None:
+            payload.freq = freq_khz
+        return payload
+
+    def _close(self, a: array.array, b: array.array) -> bool:
+        if len(a) != len(b):
+            return False
+        tolerance = self.tolerance
+        for x, y in zip(a, b):
+            if abs(x - y) > tolerance * max(x, y) + 2:
+                return False
+        return True
+
+    def _lookup(
+        self, ticks: array.array, signatures: Iterable[tuple[int, ...]]
+    ) -> str | None:
+        for signature in signatures:
+            for name in self._by_signature.get(signature, ()):
+                if self._close(ticks, self._codes[name][0]):
+                    return name
+        return None
+
+    def _match_ticks(self, ticks: array.array) -> str | None:
+        if not self._codes:
+            return None
+        candidates = signature_candidates(ticks)
+        if (name := self._lookup(ticks, candidates)) is not None:
+            return name
+        # a pulse within tolerance may still round across a unit boundary
+        return self._lookup(ticks, neighbour_signatures(candidates[0]))
+
+    def match(self, timings: Sequence[int]) -> str | None:
+        """Return the name of the stored code matching raw timings, if any.
+
+        Only codes with the signature of timings, a boundary variant of it or
+        one pulse a unit off are compared against tolerance.
+        """
+        if not timings:
+            return None
+        return self._match_ticks(_to_ticks(timings))
+
+    def attach(
+        self, sse: sseClient, callback: Callable[[str | None, list[int]], None]
+    ) -> Callable[[], None]:
+        """Register for IR_CODE events, calling back with (name, timings)."""
+
+        def on_ir_code(timings: list[int]) -> None:
+            callback(self.match(timings), timings)
+
+        return sse.register_callback(Events.IR_CODE, on_ir_code)
+
+    async def send(self, actions: ActionWrapper, name: str) -> bool:
+        """Send a stored code through ActionWrapper.send_ir_code."""
+        return await actions.send_ir_code(self.get(name))
+
+
+@dataclass
+class IRCommand:
+    """Decoded IR code, raw holds the timings when no protocol matched."""
+
+    protocol: IRProtocol
+    address: int | None = None
+    command: int | None = None
+    raw: list[int] | None = None
+
+
+def _near(value: int, target: int, tolerance: float = 0.35) -> bool:
+    return abs(value - target) <= target * tolerance
+
+
+def _pulse_distance(
+    timings: Sequence[int],
+    header: tuple[int, int],
+    bit_mark: int,
+    zero_space: int,
+    one_space: int,
+    bits: int,
+) -> int | None:
+    """Decode LSB first pulse distance coding (NEC, Samsung)."""
+    if len(timings) < 2 + 2 * bits:
+        return None
+    if not (_near(timings[0], header[0], 0.2) and _near(timings[1], header[1], 0.2)):
+        return None
+    value = 0
+    for i in range(bits):
+        mark = timings[2 + 2 * i]
+        space = timings[3 + 2 * i]
+        if not _near(mark, bit_mark):
+            return None
+        if _near(space, one_space):
+            value |= 1 << i
+        elif not _near(space, zero_space):
+            return None
+    return value
+
+
+def _decode_nec(timings: Sequence[int]) -> IRCommand | None:
+    value = _pulse_distance(timings, (9000, 4500), 560, 560, 1690, 32)
+    if value is None:
+        return None
+    command = value >> 16 & 0xFF
+    if command ^ (value >> 24) != 0xFF:
+        return None
+    address = value & 0xFF
+    if address ^ (value >> 8 & 0xFF) == 0xFF:
+        return IRCommand(IRProtocol.NEC, address, command)
+    return IRCommand(IRProtocol.NEC_EXT, value & 0xFFFF, command)
+
+
+def _decode_samsung(timings: Sequence[int]) -> IRCommand | None:
+    value = _pulse_distance(timings, (4500, 4500), 560, 560, 1690, 32)
+    if value is None:
+        return None
+    command = value >> 16 & 0xFF
+    if command ^ (value >> 24) != 0xFF:
+        return None
+    address = value & 0xFF
+    if address != value >> 8 & 0xFF:
+        address = value & 0xFFFF
+    return IRCommand(IRProtocol.SAMSUNG, address, command)
+
+
+SONY_PROTOCOLS = {12: IRProtocol.SONY12, 15: IRProtocol.SONY15, 20: IRProtocol.SONY20}
+
+
+def _decode_sony(timings: Sequence[int]) -> IRCommand | None:
+    """Sony SIRC, 2400 us header then pulse width coded bits, LSB first."""
+    if len(timings) < 3 or not (
+        _near(timings[0], 2400, 0.2) and _near(timings[1], 600)
+    ):
+        return None
+    marks = timings[2::2]
+    bits = len(marks)
+    if bits not in SONY_PROTOCOLS:
+        return None
+    value = 0
+    for i, mark in enumerate(marks):
+        if _near(mark, 1200, 0.25):
+            value |= 1 << i
+        elif not _near(mark, 600):
+            return None
+        if 3 + 2 * i < len(timings) and not _near(timings[3 + 2 * i], 600):
+            return None
+    return IRCommand(SONY_PROTOCOLS[bits], value >> 7, value & 0x7F)
+
+
+def _half_bits(
+    timings: Sequence[int], unit: int, max_units: int, first_level: int = 1
+) -> list[int] | None:
+    """Expand marks/spaces to a list of half bit levels (1 = mark)."""
+    levels: list[int] = []
+    level = first_level
+    for t in timings:
+        count = round(t / unit)
+        if not 1 <= count <= max_units or not _near(t, count * unit, 0.3):
+            return None
+        levels += [level] * count
+        level ^= 1
+    return levels
+
+
+def _manchester(levels: list[int], one: tuple[int, int]) -> int | None:
+    value = 0
+    for i in range(0, len(levels) - 1, 2):
+        pair = (levels[i], levels[i + 1])
+        if pair == one:
+            value = value << 1 | 1
+        elif pair == (one[1], one[0]):
+            value <<= 1
+        else:
+            return None
+    return value
+
+
+def _decode_rc5(timings: Sequence[int]) -> IRCommand | None:
+    """Philips RC5, 889 us half bits, 1 = space then mark, MSB first."""
+    levels = _half_bits(timings, 889, 2)
+    if levels is None:
+        return None
+    # first half of the start bit is a space and never captured
+    levels.insert(0, 0)
+    if len(levels) % 2:
+        levels.append(0)
+    if len(levels) != 28:
+        return None
+    value = _manchester(levels, (0, 1))
+    if value is None or not value >> 13:
+        return None
+    # second start bit is the inverted 7th command bit (RC5X)
+    command = (value & 0x3F) | (0 if value >> 12 & 1 else 0x40)
+    return IRCommand(IRProtocol.RC5, value >> 6 & 0x1F, command)
+
+
+def _decode_rc6(timings: Sequence[int]) -> IRCommand | None:
+    """Philips RC6 mode 0, 444 us half bits, 1 = mark then space, MSB first."""
+    if len(timings) < 3 or not (
+        _near(timings[0], 2666, 0.2) and _near(timings[1], 889, 0.3)
+    ):
+        return None
+    levels = _half_bits(timings[2:], 444, 3)
+    if levels is None:
+        return None
+    if len(levels) % 2:
+        levels.append(0)
+    # start bit, 3 mode bits, double width trailer bit, 16 data bits
+    if len(levels) != 44:
+        return None
+    header = _manchester(levels[:8], (1, 0))
+    if header != 0b1000 or levels[8:12] not in ([1, 1, 0, 0], [0, 0, 1, 1]):
+        return None
+    data = _manchester(levels[12:], (1, 0))
+    if data is None:
+        return None
+    return IRCommand(IRProtocol.RC6, data >> 8, data & 0xFF)
+
+
+IR_DECODERS: tuple[Callable[[Sequence[int]], IRCommand | None], ...] = (
+    _decode_nec,
+    _decode_samsung,
+    _decode_sony,
+    _decode_rc6,
+    _decode_rc5,
+)
+
+
+def decode_ir(timings: list[int]) -> IRCommand:
+    """Decode raw timings (us) into a protocol command, or fall back to raw."""
+    if timings:
+        for decoder in IR_DECODERS:
+            if command := decoder(timings):
+                return command
+    return IRCommand(IRProtocol.RAW, raw=timings)
+
+
+@dataclass(order=True)
+class _IRJob:
+    priority: int
+    seq: int
+    payloads: list[IRPayload] = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    key: tuple[str | None, int | None] | None = field(default=None, compare=False)
+
+
+class IRTransmitQueue:
+    """Per-device IR transmit queue with pacing, priorities and merging.
+
+    Transmissions run one at a time, at least recovery_time apart. Lower
+    priority values are sent first. Sending a code that is already waiting in
+    the queue joins the pending transmission instead of repeating it. A batch
+    (macro) is sent back to back over the session's keep-alive connection
+    without other codes interleaved.
+    """
+
+    def __init__(
+        self, actions: ActionWrapper, *, recovery_time: float = IR_RECOVERY_TIME
+    ) -> None:
+        self.actions = actions
+        self.recovery_time = recovery_time
+        self._heap: list[_IRJob] = []
+        self._pending: dict[tuple[str | None, int | None], _IRJob] = {}
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._last_sent: float | None = None
+        self._current: _IRJob | None = None
+        self._task: asyncio.Task | None = None
+
+    def _submit(
+        self, payloads: list[IRPayload], priority: int, merge: bool
+    ) -> asyncio.Future:
+        key = (payloads[0].code, payloads[0].freq) if merge else None
+        if key is not None and (job := self._pending.get(key)):
+            if priority < job.priority:
+                # promote the pending transmission
+                job.priority = priority
+                heapq.heapify(self._heap)
+            return job.future
+
+        job = _IRJob(
+            priority,
+            next(self._seq),
+            payloads,
+            asyncio.get_running_loop().create_future(),
+            key,
+        )
+        heapq.heappush(self._heap, job)
+        if key is not None:
+            self._pending[key] = job
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        self._wakeup.set()
+        return job.future
+
+    async def send(self, payload: IRPayload, priority: int = 0) -> bool:
+        """Queue a code and wait for it to be sent."""
+        return await asyncio.shield(self._submit([payload], priority, True))
+
+    async def send_batch(
+        self, payloads: list[IRPayload], priority: int = 0
+    ) -> list[bool | Exception]:
+        """Send a sequence of codes back to back, returning per item results."""
+        if not payloads:
+            return []
+        return await asyncio.shield(self._submit(list(payloads), priority, False))
+
+    async def _transmit(self, payload: IRPayload) -> bool:
+        loop = asyncio.get_running_loop()
+        if self._last_sent is not None:
+            delay = self._last_sent + self.recovery_time - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        try:
+            return await self.actions.send_ir_code(payload)
+        finally:
+            self._last_sent = loop.time()
+
+    async def _run(self) -> None:
+        while True:
+            if not self._heap:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            job = self._current = heapq.heappop(self._heap)
+            if job.key is not None:
+                self._pending.pop(job.key, None)
+                try:
+                    result = await self._transmit(job.payloads[0])
+                except Exception as err:
+                    if not job.future.done():
+                        job.future.set_exception(err)
+                else:
+                    if not job.future.done():
+                        job.future.set_result(result)
+            else:
+                results: list[bool | Exception] = []
+                for payload in job.payloads:
+                    try:
+                        results.append(await self._transmit(payload))
+                    except Exception as err:
+                        results.append(err)
+                if not job.future.done():
+                    job.future.set_result(results)
+            self._current = None
+
+    def close(self) -> None:
+        """Stop the queue, failing codes that were not sent yet."""
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        jobs = [self._current, *self._heap] if self._current else self._heap
+        self._current = None
+        for job in jobs:
+            if not job.future.done():
+                job.future.set_exception(SmlightConnectionError("IR queue closed"))
+        self._heap.clear()
+        self._pending.clear()
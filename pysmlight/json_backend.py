@@ -0,0 +1,75 @@
+"""Pluggable JSON decoding.
+
+Uses orjson or msgspec when installed and falls back to the standard library.
+Set PYSMLIGHT_JSON_BACKEND to "orjson", "msgspec" or "json" to force one.
+Every backend raises a ValueError on invalid input, like json.loads.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+import json
+import logging
+import os
+from typing import Any, TypeVar
+
+from mashumaro import DataClassDictMixin
+
+_LOGGER = logging.getLogger(__name__)
+
+BACKENDS = ("orjson", "msgspec", "json")
+
+T = TypeVar("T", bound=DataClassDictMixin)
+
+
+def _load_backend(
+    name: str,
+) -> tuple[Callable[[str | bytes], Any], tuple[type[Exception], ...]]:
+    """Return the loads function and decode errors of a backend."""
+    if name == "orjson":
+        import orjson
+
+        return orjson.loads, (orjson.JSONDecodeError,)
+    if name == "msgspec":
+        import msgspec
+
+        decode = msgspec.json.decode
+        decode_error = msgspec.DecodeError
+
+        def msgspec_loads(data: str | bytes) -> Any:
+            # DecodeError is not a ValueError, unlike the other backends
+            try:
+                return decode(data)
+            except decode_error as err:
+                raise ValueError(str(err)) from err
+
+        return msgspec_loads, (ValueError,)
+    if name == "json":
+        # invalid UTF-8 in bytes fails before parsing
+        return json.loads, (json.JSONDecodeError, UnicodeDecodeError)
+    raise ValueError(f"Unknown JSON backend {name}")
+
+
+def select_backend(
+    preferred: str | None = None,
+) -> tuple[str, Callable[[str | bytes], Any], tuple[type[Exception], ...]]:
+    """Pick the preferred backend, else the fastest one installed."""
+    for name in (preferred,) if preferred else BACKENDS:
+        try:
+            return name, *_load_backend(name)
+        except ImportError:
+            _LOGGER.debug("JSON backend %s not available", name)
+    return "json", *_load_backend("json")
+
+
+BACKEND, loads, DECODE_ERRORS = select_backend(os.environ.get("PYSMLIGHT_JSON_BACKEND"))
+
+
+def model_decoder(model: type[T], key: str) -> Callable[[str | bytes], T]:
+    """Return a decoder for responses wrapping one model under key."""
+
+    def decode(data: str | bytes) -> T:
+        # looked up per call, mashumaro replaces from_dict once compiled
+        return model.from_dict(loads(data)[key])
+
+    return decode
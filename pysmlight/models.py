@@ -1,16 +1,90 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
+from functools import cache
+from operator import attrgetter
 import re
+from typing import Any, Self
 
 from mashumaro import DataClassDictMixin
+from mashumaro.config import BaseConfig
 
-from .const import PERIPHERAL_MODELS, AmbiEffect, BleState, PppUSBState
+from .const import AmbiEffect, BleState, PppUSBState
+from .devices import get_device_model
 from .payload import Payload
 
+PLUS_SUFFIX_RE = re.compile(r"\.plus(\d*)$")
 
-@dataclass
-class Firmware(DataClassDictMixin):
+
+class LazyDictMixin(DataClassDictMixin):
+    """DataClassDictMixin that compiles from_dict / to_dict on first use.
+
+    For models that are rarely decoded. Models decoded on every poll (Info,
+    Sensors and their nested models) use DataClassDictMixin directly, so the
+    compile cost is paid at import rather than by the first poll.
+    """
+
+    __slots__ = ()
+
+    class Config(BaseConfig):
+        lazy_compilation = True
+
+
+@cache
+def _field_getter(cls: type) -> tuple[tuple[str, ...], attrgetter]:
+    names = tuple(f.name for f in fields(cls))
+    return names, attrgetter(*names)
+
+
+class DiffMixin:
+    """Structural diff between two snapshots of the same model."""
+
+    __slots__ = ()
+
+    def diff(self, previous: Self | None) -> dict[str, Any]:
+        """Return the fields of self that differ from previous.
+
+        Nested models map to their own diff and lists of models of equal length
+        map index to diff, so only changed leaves are included. Anything else
+        maps to the new value. Returns an empty dict when nothing changed.
+        """
+        if previous is None:
+            names, getter = _field_getter(type(self))
+            return dict(zip(names, getter(self)))
+        if self is previous or self == previous:
+            return {}
+
+        names, getter = _field_getter(type(self))
+        changes: dict[str, Any] = {}
+        for name, new, old in zip(names, getter(self), getter(previous)):
+            if new == old:
+                continue
+            if isinstance(new, DiffMixin) and type(new) is type(old):
+                changes[name] = new.diff(old)
+            elif (
+                isinstance(new, list)
+                and isinstance(old, list)
+                and len(new) == len(old)
+                and all(isinstance(item, DiffMixin) for item in new)
+            ):
+                changes[name] = {
+                    i: a.diff(b) for i, (a, b) in enumerate(zip(new, old)) if a != b
+                }
+            else:
+                changes[name] = new
+        return changes
+
+    def copy(self) -> Self:
+        """Return a shallow copy, faster than copy.copy on slots dataclasses."""
+        cls = type(self)
+        new = object.__new__(cls)
+        for name in _field_getter(cls)[0]:
+            setattr(new, name, getattr(self, name))
+        return new
+
+
+@dataclass(slots=True)
+class Firmware(LazyDictMixin):
     mode: str | None = None  # ESP|ZB|ESPs3
     type: int | None = None
     notes: str | None = None
@@ -34,8 +108,16 @@ class Firmware(DataClassDictMixin):
 FirmwareList = list[Firmware] | None
 
 
-@dataclass
-class Radio(DataClassDictMixin):
+@dataclass(slots=True)
+class DeviceFirmware:
+    """Available ESP firmware and zigbee firmware for each radio of a device."""
+
+    esp: FirmwareList = None
+    radios: list[FirmwareList] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class Radio(DiffMixin, DataClassDictMixin):
     chip_index: int | None = None
     zb_channel: int | None = None
     zb_flash_size: int | None = None
@@ -46,14 +128,14 @@ class Radio(DataClassDictMixin):
     radioModes: list[bool] | None = None
 
 
-@dataclass
-class BleFeatures(DataClassDictMixin):
+@dataclass(slots=True)
+class BleFeatures(DiffMixin, DataClassDictMixin):
     ble_enabled: bool | None = None
     proxy_enabled: bool | None = None
 
 
-@dataclass
-class Info(DataClassDictMixin):
+@dataclass(slots=True)
+class Info(DiffMixin, DataClassDictMixin):
     addons: dict[str, bool] = field(default_factory=dict)
     ble: BleFeatures | None = None
     coord_mode: int | None = None  # Enum
@@ -92,10 +174,22 @@ class Info(DataClassDictMixin):
             zb_version=None if zb_version_val == -1 else str(zb_version_val),
         )
 
+    def copy(self) -> Self:
+        """Return a copy that shares no mutable state with this Info."""
+        info = super(Info, self).copy()
+        info.addons = self.addons.copy()
+        if self.ble is not None:
+            info.ble = self.ble.copy()
+        info.radios = [radio.copy() for radio in self.radios]
+        for radio in info.radios:
+            if radio.radioModes is not None:
+                radio.radioModes = radio.radioModes.copy()
+        return info
+
     @property
     def has_peripherals(self) -> bool:
         """Return true if the device supports peripheral features (e.g. Ambilight, buzzer, IR)."""
-        return any(s in (self.model or "") for s in PERIPHERAL_MODELS)
+        return get_device_model(self.model).peripherals
 
     def check_zb_version(self, radio: Radio) -> Radio:
         if radio.zb_version is not None:
@@ -118,20 +212,18 @@ class Info(DataClassDictMixin):
             self.model = self.model.replace("P", "p")
             self.model = self.model.replace("MG", "Mg")
 
+            device = get_device_model(self.model)
             if self.u_device is None:
-                self.u_device = (
-                    self.model.endswith("U") or "ultima" in self.model.lower()
-                )
+                self.u_device = device.u_device
 
             # Zwave is optional module for Ultima, remove radio instance if not present
-            if "Ultima" in self.model and not self.addons.get("zwave", False):
+            if device.ultima and not self.addons.get("zwave", False):
                 self.radios = self.radios[:2]
 
         # Factory firmware may have invalid .plus suffix, convert to valid version
         if self.sw_version:
             if "plus" in self.sw_version:
-                self.sw_version = re.sub(
-                    r"\.plus(\d*)$",
+                self.sw_version = PLUS_SUFFIX_RE.sub(
                     lambda m: f".{m.group(1) if m.group(1) else '1'}",
                     self.sw_version,
                 )
@@ -156,8 +248,8 @@ class Info(DataClassDictMixin):
             self.check_zb_version(r)
 
 
-@dataclass
-class AmbilightPayload(DataClassDictMixin):
+@dataclass(slots=True)
+class AmbilightPayload(DiffMixin, LazyDictMixin):
     ultLedMode: AmbiEffect | None = None
     ultLedColor: str | None = None
     ultLedColor2: str | None = None
@@ -166,14 +258,14 @@ class AmbilightPayload(DataClassDictMixin):
     ultLedDir: int | None = None
 
 
-@dataclass
-class BleSession(DataClassDictMixin):
+@dataclass(slots=True)
+class BleSession(DiffMixin, DataClassDictMixin):
     state: BleState | None = None
     proxy_connected: bool | None = None
 
 
-@dataclass
-class Sensors(DataClassDictMixin):
+@dataclass(slots=True)
+class Sensors(DiffMixin, DataClassDictMixin):
     esp32_temp: float | None = None
     zb_temp: float | None = None
     zb_temp2: float | None = None
@@ -215,60 +307,104 @@ class Sensors(DataClassDictMixin):
                 setattr(self, field_name, None)
 
 
-@dataclass
-class SettingsEvent(DataClassDictMixin):
+@dataclass(slots=True)
+class CapabilityProfile(LazyDictMixin):
+    """API features of a device, detected once from its info response."""
+
+    info_api: bool = True  # /ha_info available, else dashboard page fallback
+    api_path: str = "/api2"  # /api on firmware that answers URL NOT FOUND
+    legacy_api: bool = False
+    legacy_sse: bool = False  # SSE on /events instead of port 81
+    radios: int = 1
+    model: str | None = None
+    sw_version: str | None = None
+
+
+@dataclass(slots=True)
+class SettingsEvent(LazyDictMixin):
     page: int | None = None
     origin: str | None = None
     needReboot: bool = False
     setting: dict[str, bool | int] | None = None
 
 
-@dataclass
-class IRPayload(DataClassDictMixin):
+IR_TICK_US = 50
+IR_CONTINUATION = b"\xff\x00"
+
+
+def _encode_ir_ticks(timings: list[int]) -> str:
+    """Encode pulse timings (us) to hex ticks, 255+ ticks continue with ff 00."""
+    ticks = [int(interval / IR_TICK_US) for interval in timings]
+    if not ticks:
+        return ""
+    if 1 <= min(ticks) and max(ticks) <= 255:
+        return bytes(ticks).hex()
+
+    out = bytearray()
+    for tick in ticks:
+        if tick > 255:
+            count = (tick - 1) // 255
+            out += IR_CONTINUATION * count
+            tick -= 255 * count
+        out.append(max(1, tick))
+    return out.hex()
+
+
+def _decode_ir_ticks(code: str) -> list[int]:
+    """Decode hex ticks to pulse timings (us), folding ff 00 continuations."""
+    if len(code) % 2:
+        data = bytes.fromhex(code[:-1]) + bytes([int(code[-1], 16)])
+    else:
+        data = bytes.fromhex(code)
+    if IR_CONTINUATION not in data:
+        return [tick * IR_TICK_US for tick in data]
+
+    timings: list[int] = []
+    carry = 0
+    for i, part in enumerate(data.split(IR_CONTINUATION)):
+        if i:
+            carry += 255
+        if part:
+            timings.append((carry + part[0]) * IR_TICK_US)
+            timings.extend([tick * IR_TICK_US for tick in part[1:]])
+            carry = 0
+    return timings
+
+
+@dataclass(slots=True)
+class IRPayload(LazyDictMixin):
     code: str | None = None
     freq: int | None = None
 
     @classmethod
     def from_raw_timings(cls, timings: list[int], freq: int | None = None) -> IRPayload:
         """Create an IRPayload from raw pulse timings in microseconds."""
-        timings_hex: list[str] = []
-        for interval in timings:
-            ticks = int(interval / 50)
-            while ticks > 255:
-                timings_hex.extend(["ff", "00"])
-                ticks -= 255
-            timings_hex.append(f"{max(1, ticks):02x}")
         freq_khz = round(freq / 1000) if freq else 38
-        return cls(code="".join(timings_hex), freq=freq_khz)
+        return cls(code=_encode_ir_ticks(timings), freq=freq_khz)
+
+    @classmethod
+    def from_raw_timings_batch(
+        cls, timings_list: list[list[int]], freq: int | None = None
+    ) -> list[IRPayload]:
+        """Create IRPayloads for many raw timing captures in one call."""
+        freq_khz = round(freq / 1000) if freq else 38
+        return [
+            cls(code=_encode_ir_ticks(timings), freq=freq_khz)
+            for timings in timings_list
+        ]
 
     def to_raw_timings(self) -> list[int]:
         """Convert IRPayload code to raw pulse timings in microseconds."""
         if not self.code:
             raise ValueError("IRPayload code is empty")
+        return _decode_ir_ticks(self.code)
 
-        timings: list[int] = []
-        current_ticks = 0
-        skip_next = False
-
-        hex_pairs = [self.code[i : i + 2] for i in range(0, len(self.code), 2)]
-
-        for i, pair in enumerate(hex_pairs):
-            if skip_next:
-                skip_next = False
-                continue
-
-            ticks = int(pair, 16)
-
-            if ticks == 255 and i + 1 < len(hex_pairs) and hex_pairs[i + 1] == "00":
-                current_ticks += 255
-                skip_next = True
-            else:
-                timings.append((current_ticks + ticks) * 50)
-                current_ticks = 0
-
-        return timings
+    @staticmethod
+    def to_raw_timings_batch(payloads: list[IRPayload]) -> list[list[int]]:
+        """Convert many IRPayload codes to raw pulse timings in one call."""
+        return [payload.to_raw_timings() for payload in payloads]
 
 
-@dataclass
-class BuzzerPayload(DataClassDictMixin):
+@dataclass(slots=True)
+class BuzzerPayload(LazyDictMixin):
     code: str | None = None
@@ -0,0 +1,99 @@
+"""Synchronized Ambilight and buzzer commands across many devices."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+import logging
+from typing import Any
+import urllib.parse
+
+from .models import AmbilightPayload, BuzzerPayload
+from .web import ActionWrapper, Api2
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class SceneResult:
+    """Per device results and timing of a dispatch.
+
+    Times are taken when each device's response completed, the requests all
+    start in the same loop iteration. spread is therefore the difference in
+    response completion, which includes device processing, not the skew of
+    the sends.
+    """
+
+    results: dict[str, bool | Exception] = field(default_factory=dict)
+    spread: float = 0.0  # seconds between first and last response completion
+    duration: float = 0.0  # seconds from dispatch to last response completion
+
+    @property
+    def ok(self) -> bool:
+        return all(r is True for r in self.results.values())
+
+
+class Scene:
+    """Send the same Ambilight or buzzer payload to many devices at once.
+
+    The request body is urlencoded once and every device request is started
+    in the same event loop iteration. Call warm() beforehand so each device
+    already has an open keep-alive connection in the session pool.
+    """
+
+    def __init__(self, clients: Iterable[Api2]) -> None:
+        self.clients = list(clients)
+
+    async def warm(self) -> None:
+        """Open a keep-alive connection to every device ahead of dispatch.
+
+        The session's connector must keep at least one connection per host.
+        """
+        results = await asyncio.gather(
+            *(client.check_auth_needed() for client in self.clients),
+            return_exceptions=True,
+        )
+        for client, result in zip(self.clients, results):
+            if isinstance(result, Exception):
+                _LOGGER.debug("Warm up of %s failed: %s", client.host, result)
+
+    async def dispatch(
+        self, params: dict[str, Any], *, settings_page: bool
+    ) -> SceneResult:
+        """POST prepared form params to every device concurrently."""
+        body = urllib.parse.urlencode(params)
+        loop = asyncio.get_running_loop()
+        arrivals: list[float] = []
+
+        async def send(client: Api2) -> bool:
+            url = client.setting_url if settings_page else client.url
+            try:
+                return await client.post(body, url=url)
+            finally:
+                arrivals.append(loop.time())
+
+        start = loop.time()
+        results = await asyncio.gather(
+            *(send(client) for client in self.clients), return_exceptions=True
+        )
+        scene = SceneResult()
+        for client, result in zip(self.clients, results):
+            if isinstance(result, BaseException) and not isinstance(result, Exception):
+                # CancelledError, the results of the other devices are moot
+                raise result
+            scene.results[client.host] = result
+        if arrivals:
+            scene.spread = max(arrivals) - min(arrivals)
+            scene.duration = max(arrivals) - start
+        return scene
+
+    async def ambilight(self, payload: AmbilightPayload) -> SceneResult:
+        return await self.dispatch(
+            ActionWrapper.ambilight_params(payload), settings_page=True
+        )
+
+    async def buzzer(self, payload: BuzzerPayload) -> SceneResult:
+        return await self.dispatch(
+            ActionWrapper.buzzer_params(payload), settings_page=False
+        )
@@ -0,0 +1,172 @@
+"""Per-host scheduling of requests to the device web server.
+
+The ESP32 web server handles few requests at a time and slows down for all of
+them when overloaded. With max_concurrent set, each request waits for one of
+that many slots, and queued requests start in order of priority class, then
+deadline. Polling and bulk reads leave the reserved slots free, so commands
+start at once however busy polling is.
+
+Optionally, a token bucket refilled at rate per second paces all requests but
+control commands, and deadlines drop requests that waited too long in the
+queue. The cap, the token bucket and deadlines are all off by default, so a
+default scheduler starts every request at once.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+import heapq
+import itertools
+import math
+
+from .const import RequestPriority
+from .exceptions import SmlightTimeoutError
+
+# suggested seconds a request may wait in the queue, pass as deadlines
+SUGGESTED_DEADLINES: dict[RequestPriority, float] = {
+    RequestPriority.POLLING: 10.0,
+    RequestPriority.BULK: 30.0,
+}
+
+
+@dataclass(order=True, slots=True)
+class _Waiter:
+    priority: int
+    deadline: float
+    seq: int
+    future: asyncio.Future[None] = field(compare=False)
+
+
+class RequestScheduler:
+    """Optional concurrency cap, priority queue and token bucket for one device.
+
+    max_concurrent caps requests in flight, None leaves them uncapped and
+    reserved then has no effect. rate (requests per second) enables the token
+    bucket, control commands are never paced by it. deadlines maps priority
+    classes to the seconds their requests may wait in the queue, classes not
+    in it wait as long as needed.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int | None = None,
+        *,
+        rate: float | None = None,
+        burst: int = 5,
+        reserved: int = 1,
+        deadlines: dict[RequestPriority, float] | None = None,
+    ) -> None:
+        if max_concurrent is not None and max_concurrent < 1:
+            raise ValueError("max_concurrent must be at least 1")
+        self.max_concurrent = max_concurrent
+        # slots only control and firmware requests may use
+        self.reserved = (
+            0 if max_concurrent is None else max(0, min(reserved, max_concurrent - 1))
+        )
+        self.rate = rate
+        self.burst = burst
+        self.deadlines = dict(deadlines or {})
+        self.active = 0
+        self._tokens = float(burst)
+        self._refilled: float | None = None
+        self._queue: list[_Waiter] = []
+        self._seq = itertools.count()
+        self._timer: asyncio.TimerHandle | None = None
+
+    @property
+    def queued(self) -> int:
+        """Number of requests waiting to start."""
+        return sum(not waiter.future.done() for waiter in self._queue)
+
+    def _limit(self, priority: int) -> float:
+        if self.max_concurrent is None:
+            return math.inf
+        if priority <= RequestPriority.FIRMWARE:
+            return self.max_concurrent
+        return self.max_concurrent - self.reserved
+
+    def _token_wait(self, priority: int, now: float) -> float:
+        """Take a token, else return the seconds until one is available."""
+        if self.rate is None or priority == RequestPriority.CONTROL:
+            return 0.0
+        if self._refilled is not None:
+            elapsed = now - self._refilled
+            self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+        self._refilled = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+    def _dispatch(self) -> None:
+        """Start queued requests while slots and tokens are available."""
+        queue = self._queue
+        while queue:
+            waiter = queue[0]
+            if waiter.future.done():
+                # cancelled or past its deadline
+                heapq.heappop(queue)
+                continue
+            if self.active >= self._limit(waiter.priority):
+                # everything behind the head has the same or a lower priority
+                return
+            loop = waiter.future.get_loop()
+            wait = self._token_wait(waiter.priority, loop.time())
+            if wait:
+                if self._timer is None:
+                    self._timer = loop.call_later(wait, self._on_timer)
+                return
+            heapq.heappop(queue)
+            self.active += 1
+            waiter.future.set_result(None)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._dispatch()
+
+    def _release(self) -> None:
+        self.active -= 1
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        priority: RequestPriority = RequestPriority.POLLING,
+        *,
+        timeout: float | None = None,
+    ) -> AsyncIterator[None]:
+        """Wait for a turn to send a request and hold it for the block.
+
+        Raises SmlightTimeoutError when the request has not started within
+        timeout, which defaults to the deadline of its priority class, if any.
+        """
+        loop = asyncio.get_running_loop()
+        budget = self.deadlines.get(priority) if timeout is None else timeout
+        deadline = math.inf if budget is None else loop.time() + budget
+        waiter = _Waiter(priority, deadline, next(self._seq), loop.create_future())
+        heapq.heappush(self._queue, waiter)
+        self._dispatch()
+
+        try:
+            async with asyncio.timeout_at(None if budget is None else deadline):
+                await waiter.future
+        except BaseException as err:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # started just as it was cancelled
+                self._release()
+            else:
+                waiter.future.cancel()
+                self._dispatch()
+            if isinstance(err, TimeoutError):
+                raise SmlightTimeoutError(
+                    f"{priority.name} request not started within {budget}s"
+                ) from err
+            raise
+
+        try:
+            yield
+        finally:
+            self._release()
@@ -2,7 +2,6 @@
 
 import asyncio
 from collections.abc import Callable
-import json
 import logging
 
 import aiohttp
@@ -11,6 +10,8 @@ from aiohttp_sse_client2.client import EventSource, MessageEvent
 from awesomeversion import AwesomeVersion
 
 from .const import Events, Pages, Settings
+from .ir import IRCommand, decode_ir
+from .json_backend import DECODE_ERRORS, loads
 from .models import IRPayload, SettingsEvent
 
 _LOGGER = logging.getLogger(__name__)
@@ -29,7 +30,13 @@ class sseClient:
         self.callbacks: dict[Events, Callable] = {}
         self.settings_cb: dict[Settings, Callable] = {}
         self.page_cb: dict[Pages, Callable] = {}
+        self.ir_command_cb: Callable[[IRCommand], None] | None = None
         self.legacy_api = False
+        # SSE served on legacy_url, None to decide from sw_version
+        self.legacy_sse: bool | None = None
+        self.esp_update_cb: Callable[[], None] | None = None
+        # called on ESP_UPD_done before esp_update_cb, e.g. by Api2
+        self._esp_update_listeners: list[Callable[[], None]] = []
         self.sw_version: AwesomeVersion | None = None
         self.session = session
         self.url = f"http://{host}:81"  # Introduced in firmware v2.6.8.dev26
@@ -61,7 +68,9 @@ class sseClient:
 
     async def sse_stream(self) -> None:
         """Process incoming events on the message stream"""
-        if self.sw_version is not None and self.sw_version <= LEGACY_SSE_VERSION:
+        if self.legacy_sse is None and self.sw_version is not None:
+            self.legacy_sse = self.sw_version <= LEGACY_SSE_VERSION
+        if self.legacy_sse:
             self.url = self.legacy_url
         async with EventSource(
             self.url, session=self.session, timeout=self.timeout, max_connect_retry=8
@@ -76,12 +85,23 @@ class sseClient:
     async def _message_handler(self, event: MessageEvent) -> None:
         """Match event with callback for event type"""
         if event_type := getattr(Events, event.type, None):
-            if event_type == Events.IR_CODE and event_type in self.callbacks:
+            if event_type == Events.ESP_UPD_done:
+                for listener in self._esp_update_listeners.copy():
+                    listener()
+                if self.esp_update_cb:
+                    self.esp_update_cb()
+            if event_type == Events.IR_CODE and (
+                event_type in self.callbacks or self.ir_command_cb
+            ):
                 try:
-                    data = json.loads(event.data)
+                    data = loads(event.data)
                     payload = IRPayload(code=data.get("raw"), freq=data.get("freq"))
-                    self.callbacks[event_type](payload.to_raw_timings())
-                except (json.JSONDecodeError, KeyError, ValueError):
+                    timings = payload.to_raw_timings()
+                    if ir_code_cb := self.callbacks.get(event_type):
+                        ir_code_cb(timings)
+                    if self.ir_command_cb:
+                        self.ir_command_cb(decode_ir(timings))
+                except DECODE_ERRORS + (KeyError, ValueError):
                     pass
             else:
                 self.callbacks.get(event_type, lambda x: None)(event)
@@ -99,6 +119,16 @@ class sseClient:
 
         return remove_callback
 
+    def add_esp_update_listener(self, cb: Callable[[], None]) -> Callable[[], None]:
+        """Call cb after an ESP firmware update, alongside esp_update_cb."""
+        self._esp_update_listeners.append(cb)
+
+        def remove_callback() -> None:
+            if cb in self._esp_update_listeners:
+                self._esp_update_listeners.remove(cb)
+
+        return remove_callback
+
     def deregister_callback(self, event: Events) -> None:
         """Deregister callback for event type"""
         if event in self.callbacks:
@@ -106,7 +136,7 @@ class sseClient:
 
     def _handle_settings(self, event: Events) -> None:
         """Process event and match callback for settings changes"""
-        data = json.loads(event.data)
+        data = loads(event.data)
         try:
             page = Pages(data["page"])
         except ValueError:
@@ -157,3 +187,14 @@ class sseClient:
             self.page_cb.pop(page, None)
 
         return remove_callback
+
+    def register_ir_command_cb(
+        self, cb: Callable[[IRCommand], None]
+    ) -> Callable[[], None]:
+        """Register a callback for decoded IR codes (protocol, address, command)."""
+        self.ir_command_cb = cb
+
+        def remove_callback() -> None:
+            self.ir_command_cb = None
+
+        return remove_callback
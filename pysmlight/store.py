@@ -0,0 +1,228 @@
+"""Persistent per-host device state for warm starts.
+
+The last Info, Sensors, firmware lists and capability results of each device
+are kept in a small SQLite database. At startup they can be restored in one
+query as provisional state and refreshed from the devices in the background.
+All database work runs on a single worker thread that owns the connection.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+import json
+import logging
+from pathlib import Path
+import sqlite3
+import time
+from typing import TYPE_CHECKING, Any, TypeVar
+
+from .exceptions import SmlightError
+from .json_backend import loads
+from .models import CapabilityProfile, Firmware, Info, Sensors
+
+if TYPE_CHECKING:
+    from .web import Api2
+
+_LOGGER = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS device_state (
+    host TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    data TEXT NOT NULL,
+    updated REAL NOT NULL,
+    PRIMARY KEY (host, kind)
+) WITHOUT ROWID
+"""
+KIND_INFO = "info"
+KIND_SENSORS = "sensors"
+KIND_CAPABILITIES = "capabilities"
+KIND_FIRMWARE = "firmware:"
+
+
+@dataclass
+class DeviceState:
+    host: str
+    info: Info | None = None
+    sensors: Sensors | None = None
+    firmware: dict[str, list[Firmware]] = field(default_factory=dict)
+    capabilities: dict[str, Any] = field(default_factory=dict)
+    updated: float = 0.0  # newest save of any part
+
+
+class DeviceStateStore:
+    """SQLite backed store of the last known state of each device.
+
+    Queries run on a worker thread, so the event loop never blocks on disk
+    I/O. The database is opened on first use.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self._db: sqlite3.Connection | None = None
+        self._closed = False
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="device_state"
+        )
+
+    async def _run(self, func: Callable[..., T], *args: Any) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            db = sqlite3.connect(self.path)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(SCHEMA)
+            db.commit()
+            self._db = db
+        return self._db
+
+    def _write(self, host: str, parts: list[tuple[str, Any]]) -> None:
+        """Save (kind, data) parts of a host in one transaction."""
+        db = self._connect()
+        now = time.time()
+        with db:
+            db.executemany(
+                "INSERT OR REPLACE INTO device_state VALUES (?, ?, ?, ?)",
+                [
+                    (host, kind, json.dumps(data, separators=(",", ":")), now)
+                    for kind, data in parts
+                ],
+            )
+
+    async def _save(self, host: str, parts: list[tuple[str, Any]]) -> None:
+        if parts:
+            await self._run(self._write, host, parts)
+
+    async def save_info(self, host: str, info: Info) -> None:
+        await self._save(host, [(KIND_INFO, info.to_dict())])
+
+    async def save_sensors(self, host: str, sensors: Sensors) -> None:
+        await self._save(host, [(KIND_SENSORS, sensors.to_dict())])
+
+    async def save_firmware(
+        self, host: str, key: str, firmware: list[Firmware] | None
+    ) -> None:
+        """Save a firmware list, key identifies it, e.g. esp32 or zigbee:0."""
+        await self._save(
+            host, [(KIND_FIRMWARE + key, [fw.to_dict() for fw in firmware or ()])]
+        )
+
+    async def save_capabilities(self, host: str, capabilities: dict[str, Any]) -> None:
+        await self._save(host, [(KIND_CAPABILITIES, capabilities)])
+
+    def _decode(self, state: DeviceState, kind: str, data: str) -> None:
+        value = loads(data)
+        if kind == KIND_INFO:
+            state.info = Info.from_dict(value)
+        elif kind == KIND_SENSORS:
+            state.sensors = Sensors.from_dict(value)
+        elif kind == KIND_CAPABILITIES:
+            state.capabilities = value
+        elif kind.startswith(KIND_FIRMWARE):
+            state.firmware[kind.removeprefix(KIND_FIRMWARE)] = [
+                Firmware.from_dict(fw) for fw in value
+            ]
+
+    async def load(self, host: str) -> DeviceState | None:
+        """Return the saved state of host, None if nothing was saved."""
+        states = await self._run(self._load, "WHERE host = ?", (host,))
+        return states.get(host)
+
+    async def load_all(self) -> dict[str, DeviceState]:
+        """Return the saved state of every host."""
+        return await self._run(self._load, "", ())
+
+    def _load(self, where: str, args: tuple) -> dict[str, DeviceState]:
+        states: dict[str, DeviceState] = {}
+        rows = self._connect().execute(
+            f"SELECT host, kind, data, updated FROM device_state {where}", args
+        )
+        for host, kind, data, updated in rows:
+            state = states.get(host)
+            if state is None:
+                state = states[host] = DeviceState(host)
+            try:
+                self._decode(state, kind, data)
+            except (ValueError, KeyError, TypeError) as err:
+                # stale schema after an upgrade, it is refreshed from the device
+                _LOGGER.debug("Ignoring stored %s of %s: %s", kind, host, err)
+                continue
+            state.updated = max(state.updated, updated)
+        return states
+
+    def _delete(self, host: str) -> None:
+        with self._connect() as db:
+            db.execute("DELETE FROM device_state WHERE host = ?", (host,))
+
+    async def delete(self, host: str) -> None:
+        await self._run(self._delete, host)
+
+    def _close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    async def close(self) -> None:
+        """Close the database and stop the worker thread, once."""
+        if self._closed:
+            return
+        self._closed = True
+        await self._run(self._close)
+        self._executor.shutdown()
+
+    async def restore(self, client: Api2) -> DeviceState | None:
+        """Apply the saved state of a client's host as provisional state.
+
+        Seeds the firmware version the client uses to pick legacy behaviour
+        and the saved capability profile, so commands work and get_info goes
+        to the right endpoint without probing.
+        """
+        state = await self.load(client.host)
+        if state is not None and state.info is not None:
+            client.seed_info(state.info)
+        if state is not None and state.capabilities:
+            try:
+                client.apply_profile(CapabilityProfile.from_dict(state.capabilities))
+            except (ValueError, KeyError, TypeError) as err:
+                _LOGGER.debug("Ignoring stored profile of %s: %s", client.host, err)
+        return state
+
+    async def refresh(self, client: Api2) -> DeviceState:
+        """Fetch Info, Sensors, the capability profile and firmware and save them.
+
+        Whatever was fetched before an error is saved in one transaction.
+        Firmware lists are saved as esp32 and zigbee:<radio index>, catalogs
+        that could not be fetched keep their saved list.
+        """
+        state = DeviceState(client.host, updated=time.time())
+        parts: list[tuple[str, Any]] = []
+        try:
+            state.info = await client.get_info()
+            parts.append((KIND_INFO, state.info.to_dict()))
+            if client.profile is not None:
+                state.capabilities = client.profile.to_dict()
+                parts.append((KIND_CAPABILITIES, state.capabilities))
+            state.sensors = await client.get_sensors()
+            parts.append((KIND_SENSORS, state.sensors.to_dict()))
+            firmware = await client.get_all_firmware(state.info)
+            lists = {"esp32": firmware.esp}
+            for idx, radio in enumerate(firmware.radios):
+                lists[f"zigbee:{idx}"] = radio
+            for key, fw_list in lists.items():
+                if fw_list is not None:
+                    state.firmware[key] = fw_list
+                    parts.append(
+                        (KIND_FIRMWARE + key, [fw.to_dict() for fw in fw_list])
+                    )
+        except SmlightError as err:
+            _LOGGER.debug("Refresh of %s failed: %s", client.host, err)
+        await self._save(client.host, parts)
+        return state
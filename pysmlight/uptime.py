@@ -0,0 +1,138 @@
+"""Detect reboots and reconnects from the uptime counters in Sensors.
+
+uptime counts seconds since the ESP started, the socket uptimes count seconds
+since a Zigbee socket client connected and otbr_uptime since the OpenThread
+border router started. Between two samples a counter should grow by about the
+elapsed time, so a counter that falls short of that has been reset. The reset
+happened counter seconds before the sample that shows it.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+import logging
+import time
+
+from ._slots import SlotTable
+from .const import UptimeEventType
+from .models import Sensors
+
+_LOGGER = logging.getLogger(__name__)
+
+NAN = float("nan")
+UPTIME_COUNTERS = (
+    "uptime",
+    "socket_uptime",
+    "socket2_uptime",
+    "socket3_uptime",
+    "otbr_uptime",
+)
+COUNTER_EVENTS = (
+    UptimeEventType.REBOOT,
+    UptimeEventType.SOCKET_RECONNECT,
+    UptimeEventType.SOCKET_RECONNECT,
+    UptimeEventType.SOCKET_RECONNECT,
+    UptimeEventType.OTBR_RESTART,
+)
+
+
+@dataclass(slots=True)
+class UptimeEvent:
+    host: str
+    type: UptimeEventType
+    counter: str  # Sensors field that was reset
+    timestamp: float  # estimated wall clock time of the reset
+    uptime: int  # counter value in the sample that showed the reset
+
+
+class UptimeMonitor:
+    """Emit reboot, socket reconnect and OTBR restart events for many devices.
+
+    Feed it every Sensors sample, polled or kept up to date from SSE. State is
+    one row of flat arrays per host, the comparison itself is a Python loop
+    over the counters of each sample. tolerance allows for counter granularity
+    and clock jitter between the device and the sample timestamps.
+    """
+
+    def __init__(
+        self,
+        on_event: Callable[[UptimeEvent], None] | None = None,
+        *,
+        tolerance: float = 5.0,
+    ) -> None:
+        self.on_event = on_event
+        self.tolerance = tolerance
+        # last value of each counter per host, NaN when unknown or disconnected
+        self._table: SlotTable[str] = SlotTable(
+            {"time": ("d", 1, 0.0), "values": ("d", len(UPTIME_COUNTERS), NAN)}
+        )
+        self._time = self._table.columns["time"]
+        self._values = self._table.columns["values"]
+
+    def update(
+        self, host: str, sensors: Sensors, timestamp: float | None = None
+    ) -> list[UptimeEvent]:
+        """Compare a sample with the previous one of the same host."""
+        return self.update_many([(host, sensors)], timestamp)
+
+    def update_many(
+        self,
+        samples: Iterable[tuple[str, Sensors]],
+        timestamp: float | None = None,
+    ) -> list[UptimeEvent]:
+        """Compare a batch of samples taken at the same time."""
+        if timestamp is None:
+            timestamp = time.time()
+        width = len(UPTIME_COUNTERS)
+        values = self._values
+        events: list[UptimeEvent] = []
+        for host, sensors in samples:
+            slot = self._table.get(host)
+            new = [getattr(sensors, name) for name in UPTIME_COUNTERS]
+            if slot is None:
+                slot = self._table.add(host)
+                self._time[slot] = timestamp
+                for i, value in enumerate(new, slot * width):
+                    if value is not None:
+                        values[i] = value
+                continue
+
+            base = slot * width
+            expected = timestamp - self._time[slot] - self.tolerance
+            self._time[slot] = timestamp
+            old = values[base : base + width]
+            for i, value in enumerate(new):
+                values[base + i] = NAN if value is None else value
+                if value is None:
+                    continue
+                previous = old[i]
+                # NaN: the counter restarted after being disconnected
+                if previous == previous and value >= previous + expected:
+                    continue
+                events.append(
+                    UptimeEvent(
+                        host,
+                        COUNTER_EVENTS[i],
+                        UPTIME_COUNTERS[i],
+                        timestamp - value,
+                        value,
+                    )
+                )
+                if i == 0:
+                    # a reboot restarts every other counter too
+                    for j in range(1, width):
+                        values[base + j] = NAN if new[j] is None else new[j]
+                    break
+
+        if self.on_event:
+            for event in events:
+                try:
+                    self.on_event(event)
+                except Exception:
+                    _LOGGER.exception("Error in uptime event callback")
+        return events
+
+    def remove(self, host: str) -> None:
+        """Forget a host, its next sample starts a new baseline."""
+        self._table.remove(host)
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
+import asyncio
 from collections.abc import Callable
-import json
+from contextlib import AbstractAsyncContextManager, nullcontext
 import logging
 import re
 from typing import Any, Self
@@ -10,27 +11,49 @@ from aiohttp import ClientSession, encode_basic_auth
 from aiohttp.client_exceptions import ClientConnectionError
 from awesomeversion import AwesomeVersion
 
+from .ambilight import AmbilightStream
 from .const import (
     FW_URL,
-    MR_DEVICE_RADIO_MAP,
     PARAM_LIST,
     Actions,
     Commands,
     Devices,
     Events,
     Pages,
-    UDevices,
+    RequestPriority,
+)
+from .devices import get_device_model
+from .exceptions import SmlightAuthError, SmlightConnectionError, SmlightError
+from .ir import IRTransmitQueue
+from .json_backend import loads, model_decoder
+from .models import (
+    AmbilightPayload,
+    BuzzerPayload,
+    CapabilityProfile,
+    DeviceFirmware,
+    Firmware,
+    FirmwareList,
+    Info,
+    IRPayload,
+    Sensors,
 )
-from .exceptions import SmlightAuthError, SmlightConnectionError
-from .models import AmbilightPayload, BuzzerPayload, Firmware, Info, IRPayload, Sensors
 from .payload import Payload
-from .sse import sseClient
+from .scheduler import RequestScheduler
+from .sse import LEGACY_SSE_VERSION, sseClient
 
 _LOGGER = logging.getLogger(__name__)
 
+decode_info = model_decoder(Info, "Info")
+decode_sensors = model_decoder(Sensors, "Sensors")
+
 
 class webClient:
-    def __init__(self, host: str, session: ClientSession | None = None) -> None:
+    def __init__(
+        self,
+        host: str,
+        session: ClientSession | None = None,
+        scheduler: RequestScheduler | None = None,
+    ) -> None:
         self.auth: str | None = None
         # we can't modify headers on the passed in session from HA,
         #  if needed can be overridden at request level
@@ -40,9 +63,21 @@ class webClient:
         self.session = session
         self.close_session = False
         self.core_version: AwesomeVersion | None = None
+        # last ha_info response, the Info decoded from it and its version
+        self._info_cache: tuple[str, Info, AwesomeVersion] | None = None
+        # uncapped unless a configured scheduler is passed, firmware catalogs
+        # bypass it
+        self.scheduler = scheduler or RequestScheduler()
 
         self.set_urls()
 
+    def _slot(
+        self, priority: RequestPriority | None
+    ) -> AbstractAsyncContextManager[None]:
+        if priority is None:
+            return nullcontext()
+        return self.scheduler.slot(priority)
+
     async def authenticate(self, user: str, password: str) -> bool:
         """Pass in credentials and check auth is successful"""
         self.auth = encode_basic_auth(user, password)
@@ -63,9 +98,14 @@ class webClient:
 
         try:
             params = {"action": Actions.API_GET_PAGE.value, "page": 1}
-            async with self.session.get(
-                self.url, headers=headers or None, params=params
-            ) as response:
+            async with (
+                self._slot(RequestPriority.CONTROL),
+                self.session.get(
+                    self.url, headers=headers or None, params=params
+                ) as response,
+            ):
+                # read the body so the connection is kept alive for reuse
+                await response.read()
                 if response.status == 401:
                     res = True
                     if authenticate:
@@ -76,7 +116,14 @@ class webClient:
 
         return res
 
-    async def get(self, params: dict[str, Any], url: str | None = None) -> str | None:
+    async def get(
+        self,
+        params: dict[str, Any] | None,
+        url: str | None = None,
+        *,
+        priority: RequestPriority | None = RequestPriority.POLLING,
+    ) -> str | None:
+        """GET from the device, priority None sends at once (non-device URLs)."""
         assert self.session is not None, "Session not created"
 
         if url is None:
@@ -87,9 +134,10 @@ class webClient:
             headers["Authorization"] = self.auth
 
         try:
-            async with self.session.get(
-                url, headers=headers, params=params
-            ) as response:
+            async with (
+                self._slot(priority),
+                self.session.get(url, headers=headers, params=params) as response,
+            ):
                 if response.status == 404:
                     return None
                 elif response.status == 401:
@@ -105,24 +153,30 @@ class webClient:
         except ClientConnectionError as err:
             raise SmlightConnectionError("Connection failed") from err
 
-    async def post(self, params, url: str | None = None) -> bool:
+    async def post(
+        self,
+        params: dict[str, Any] | str,
+        url: str | None = None,
+        *,
+        priority: RequestPriority = RequestPriority.CONTROL,
+    ) -> bool:
+        """POST form params, or an already urlencoded body, to the device."""
         assert self.session is not None, "Session not created"
 
         if url is None:
             url = self.setting_url
 
-        data = urllib.parse.urlencode(params)
+        data = params if isinstance(params, str) else urllib.parse.urlencode(params)
 
         headers = self.post_headers.copy()
         if self.auth:
             headers["Authorization"] = self.auth
 
         try:
-            async with self.session.post(
-                url,
-                data=data,
-                headers=headers,
-            ) as response:
+            async with (
+                self._slot(priority),
+                self.session.post(url, data=data, headers=headers) as response,
+            ):
                 if response.status == 404:
                     raise SmlightConnectionError("endpoint not found")
                 elif response.status == 401:
@@ -134,6 +188,7 @@ class webClient:
 
     def set_host(self, host: str) -> None:
         self.host = host
+        self._info_cache = None
         self.set_urls()
 
     def set_urls(self) -> None:
@@ -173,10 +228,11 @@ class Api2(webClient):
         *,
         session: ClientSession | None = None,
         sse: sseClient | None = None,
+        scheduler: RequestScheduler | None = None,
     ) -> None:
         self.cmds = CmdWrapper(self.set_cmd)
         self.actions = ActionWrapper(self.post, self.get)
-        super().__init__(host, session=session)
+        super().__init__(host, session=session, scheduler=scheduler)
 
         if session is None:
             self.session = ClientSession(headers=self.headers)
@@ -186,6 +242,10 @@ class Api2(webClient):
             self.sse = sse
         else:
             self.sse = sseClient(host, session)
+        self._version_seeded = False
+        self.profile: CapabilityProfile | None = None
+        # keeps any esp_update_cb set on a shared sse client
+        self.sse.add_esp_update_listener(self.invalidate_profile)
 
     async def get_device_payload(self) -> Payload:
         data = await self.get_page(Pages.API2_PAGE_DASHBOARD)
@@ -194,19 +254,14 @@ class Api2(webClient):
 
     def _resolve_zigbee_device(self, device: str, idx: int) -> str | None:
         """Resolve the actual zigbee device model for multi-radio devices."""
-        if device.endswith("U") and not MR_DEVICE_RADIO_MAP.get(device):
-            device = device[:-1]
-        sub_devices = MR_DEVICE_RADIO_MAP.get(device)
-        if sub_devices and 0 <= idx < len(sub_devices):
-            return sub_devices[idx]
-        return device
+        return get_device_model(device).radio_model(idx)
 
     def _determine_firmware_type(self, mode: str, device: str | None) -> str:
         """Determine the firmware type string based on mode and device."""
         if mode == "zigbee":
             return "ZB"
         elif mode == "esp32":
-            return "ESPs3" if self.device_is_u(device) else "ESP"
+            return get_device_model(device).esp_fw_type
         return "ESP"
 
     async def _fetch_firmware_data(
@@ -219,8 +274,8 @@ class Api2(webClient):
             if device is not None:
                 params["device"] = str(Devices[device])
 
-        response = await self.get(params=params, url=FW_URL)
-        return json.loads(response)
+        response = await self.get(params=params, url=FW_URL, priority=None)
+        return loads(response)
 
     def _extract_firmware_list(
         self, data: list[dict], mode: str, device: str | None
@@ -295,17 +350,82 @@ class Api2(webClient):
 
         return self._filter_firmware(firmware_data, fw_type, channel, zb_type)
 
+    async def get_all_firmware(
+        self, info: Info, channel: str | None = None
+    ) -> DeviceFirmware:
+        """Get ESP firmware and zigbee firmware for every radio of a device.
+
+        Radios that resolve to the same catalog share one request, and the
+        distinct catalogs are fetched concurrently. channel defaults to the
+        device's firmware channel. A catalog that fails is logged and its
+        lists are None, the error is raised only if every catalog failed.
+        """
+        if channel is None:
+            channel = info.fw_channel
+        model = info.model
+
+        keys = [("esp32", self._determine_firmware_type("esp32", model), model)]
+        if model is not None:
+            for idx in range(len(info.radios)):
+                device = self._resolve_zigbee_device(model, idx)
+                keys.append(
+                    ("zigbee", self._determine_firmware_type("zigbee", device), device)
+                )
+
+        unique = list(dict.fromkeys(keys))
+        responses = await asyncio.gather(
+            *(
+                self._fetch_firmware_data(mode, fw_type, dev)
+                for mode, fw_type, dev in unique
+            ),
+            return_exceptions=True,
+        )
+        catalogs: dict[tuple[str, str, str | None], Any] = {}
+        errors: list[Exception] = []
+        for key, response in zip(unique, responses):
+            if isinstance(response, SmlightError | ValueError):
+                _LOGGER.warning(
+                    "Fetching %s firmware %s failed: %s", *key[:2], response
+                )
+                errors.append(response)
+                catalogs[key] = None
+            elif isinstance(response, BaseException):
+                raise response
+            else:
+                catalogs[key] = response
+        if len(errors) == len(unique):
+            raise errors[0]
+
+        def select(
+            key: tuple[str, str, str | None], zb_type: int | None
+        ) -> FirmwareList:
+            mode, fw_type, device = key
+            data = catalogs[key]
+            firmware_data = (
+                self._extract_firmware_list(data, mode, device) if data else None
+            )
+            if firmware_data is None:
+                return None
+            return self._filter_firmware(firmware_data, fw_type, channel, zb_type)
+
+        return DeviceFirmware(
+            esp=select(keys[0], None),
+            radios=[
+                select(key, radio.zb_type) for key, radio in zip(keys[1:], info.radios)
+            ],
+        )
+
     async def get_page(self, page: Pages) -> dict | None:
         """Extract Respvaluesarr json from page response header"""
         params = {"action": Actions.API_GET_PAGE.value, "page": page.value}
-        res = await self.get(params)
-        data = json.loads(res)
+        res = await self.get(params, priority=RequestPriority.BULK)
+        data = loads(res)
         return data if data else None
 
     async def get_param(self, param: str) -> str | None:
         if param in PARAM_LIST:
             params = {"action": Actions.API_GET_PARAM.value, "param": param}
-            return await self.get(params)
+            return await self.get(params, priority=RequestPriority.BULK)
         return None
 
     async def get_info_old(self) -> Info:
@@ -314,29 +434,84 @@ class Api2(webClient):
         return Info.load_payload(payload)
 
     async def get_info(self) -> Info:
-        res = await self.get(params=None, url=self.info_url)
-        if res is None:
-            return await self.get_info_old()
-        elif res == "URL NOT FOUND":
-            self.url = f"http://{self.host}/api"
-            return await self.get_info_old()
+        """Get device info.
 
-        data = json.loads(res)
+        An unchanged response returns a copy of the Info decoded last time.
+        """
+        if self.profile is not None and not self.profile.info_api:
+            return await self.get_info_old()
 
-        info = Info.from_dict(data["Info"])
-        core_version = AwesomeVersion(info.sw_version)
+        res = await self.get(params=None, url=self.info_url)
+        if res is None or res == "URL NOT FOUND":
+            if res is not None:
+                self.url = f"http://{self.host}/api"
+            info = await self.get_info_old()
+            if self.profile is None:
+                self._detect_profile(info, info_api=False)
+            return info
+
+        if self._info_cache is not None and self._info_cache[0] == res:
+            _, cached, core_version = self._info_cache
+            info = cached.copy()
+        else:
+            info = decode_info(res)
+            core_version = AwesomeVersion(info.sw_version)
+            # callers may modify the returned Info, keep a private copy
+            self._info_cache = (res, info.copy(), core_version)
 
-        if self.core_version is None:
+        if self.core_version is None or self._version_seeded:
             self.core_version = core_version
-        if self.sse.sw_version is None:
+        if self.sse.sw_version is None or self._version_seeded:
             self.sse.sw_version = core_version
+        self._version_seeded = False
+        if self.profile is None:
+            self._detect_profile(info, info_api=True)
+
+        return info
+
+    def _detect_profile(self, info: Info, *, info_api: bool) -> None:
+        sw_version = AwesomeVersion(info.sw_version) if info.sw_version else None
+        self.apply_profile(
+            CapabilityProfile(
+                info_api=info_api,
+                api_path=urllib.parse.urlsplit(self.url).path,
+                legacy_api=self.sse.legacy_api,
+                legacy_sse=sw_version is not None and sw_version <= LEGACY_SSE_VERSION,
+                radios=len(info.radios),
+                model=info.model,
+                sw_version=info.sw_version,
+            )
+        )
 
-        return Info.from_dict(data["Info"])
+    def apply_profile(self, profile: CapabilityProfile) -> None:
+        """Use a detected or saved profile, skipping API probes."""
+        self.profile = profile
+        self.url = f"http://{self.host}{profile.api_path}"
+        self.sse.legacy_api = profile.legacy_api
+        self.sse.legacy_sse = profile.legacy_sse
+
+    def set_host(self, host: str) -> None:
+        super().set_host(host)
+        self.invalidate_profile()
+
+    def invalidate_profile(self) -> None:
+        """Forget the profile, e.g. after a firmware update changed the API."""
+        self.profile = None
+        self._info_cache = None
+        self._version_seeded = self.core_version is not None
+        self.sse.legacy_api = False
+        self.sse.legacy_sse = None
+        self.set_urls()
+
+    def seed_info(self, info: Info) -> None:
+        """Use a previously saved Info for version checks until get_info runs."""
+        if info.sw_version and self.core_version is None:
+            self.core_version = self.sse.sw_version = AwesomeVersion(info.sw_version)
+            self._version_seeded = True
 
     async def get_sensors(self) -> Sensors:
         res = await self.get(params=None, url=self.sensor_url)
-        data = json.loads(res)
-        return Sensors.from_dict(data["Sensors"])
+        return decode_sensors(res)
 
     async def set_cmd(self, cmd: Commands, extra: str | None = None) -> bool:
         params = {"action": Actions.API_CMD.value, "cmd": cmd.value}
@@ -345,7 +520,7 @@ class Api2(webClient):
             val = int(v)
             if val > 0:
                 params[k] = val
-        res = await self.get(params)
+        res = await self.get(params, priority=RequestPriority.CONTROL)
         return res == "ok"
 
     async def fw_update(
@@ -373,7 +548,7 @@ class Api2(webClient):
                 params["zbChipNum"] = 5
         else:
             params = {"action": Actions.API_FLASH_ESP.value, "fwUrl": firmware.link}
-        res = await self.get(params)
+        res = await self.get(params, priority=RequestPriority.FIRMWARE)
         return res == "ok"
 
     async def set_toggle(self, page: Pages, toggle: str, value: bool) -> bool:
@@ -408,14 +583,11 @@ class Api2(webClient):
 
         remove_cb = self.sse.register_callback(Events.API2_WIFISCANSTATUS, callback)
         params = {"action": Actions.API_STARTWIFISCAN.value}
-        await self.get(params)
+        await self.get(params, priority=RequestPriority.CONTROL)
         return remove_cb
 
     def device_is_u(self, model: str) -> bool:
-        if model.endswith("U"):
-            return True
-        device_id = Devices.get(model, None)
-        return device_id in [udev.value for udev in UDevices] if device_id else False
+        return get_device_model(model).u_device
 
 
 class CmdWrapper:
@@ -443,18 +615,44 @@ class ActionWrapper:
     def __init__(self, post_action: Callable, get_action: Callable) -> None:
         self.post = post_action
         self.get = get_action
+        self._ir_queue: IRTransmitQueue | None = None
+        self._ambilight_stream: AmbilightStream | None = None
+
+    @property
+    def ir_queue(self) -> IRTransmitQueue:
+        """Paced transmit queue for IR codes on this device."""
+        if self._ir_queue is None:
+            self._ir_queue = IRTransmitQueue(self)
+        return self._ir_queue
+
+    @property
+    def ambilight_stream(self) -> AmbilightStream:
+        """Latest-wins Ambilight frame stream for this device."""
+        if self._ambilight_stream is None:
+            self._ambilight_stream = AmbilightStream(self)
+        return self._ambilight_stream
+
+    @staticmethod
+    def ambilight_params(payload: AmbilightPayload) -> dict[str, Any]:
+        """Form params for an ambilight command."""
+        data = {k: v for k, v in payload.to_dict().items() if v is not None}
+        return {"pageId": Pages.API2_PAGE_AMBILIGHT.value, **data}
+
+    @staticmethod
+    def buzzer_params(payload: BuzzerPayload) -> dict[str, Any]:
+        """Form params for a buzzer command."""
+        data = {k: v for k, v in payload.to_dict().items() if v is not None}
+        return {"action": Actions.API_BUZZER.value, **data}
 
     async def ambilight(self, payload: AmbilightPayload) -> bool:
         """Send ambilight commands."""
-        data = {k: v for k, v in payload.to_dict().items() if v is not None}
-        params = {"pageId": Pages.API2_PAGE_AMBILIGHT.value, **data}
-        return await self.post(params)
+        return await self.post(self.ambilight_params(payload))
 
     async def get_ir_code(self, payload: IRPayload) -> str | None:
         """Get last IR code."""
         data = {k: v for k, v in payload.to_dict().items() if v is not None}
         params = {"pageId": Pages.API2_PAGE_IR.value, **data}
-        return await self.get(params)
+        return await self.get(params, priority=RequestPriority.CONTROL)
 
     async def send_ir_code(self, payload: IRPayload) -> bool:
         """Send IR code."""
@@ -464,6 +662,4 @@ class ActionWrapper:
 
     async def buzzer(self, payload: BuzzerPayload) -> bool:
         """Send buzzer RTTTL code."""
-        data = {k: v for k, v in payload.to_dict().items() if v is not None}
-        params = {"action": Actions.API_BUZZER.value, **data}
-        return await self.post(params, url=self.post.__self__.url)
+        return await self.post(self.buzzer_params(payload), url=self.post.__self__.url)
@@ -0,0 +1,96 @@
+"""Tests for streaming Ambilight frames."""
+
+import asyncio
+from unittest.mock import AsyncMock, Mock
+
+from pysmlight.ambilight import AmbilightStream
+from pysmlight.const import AmbiEffect
+from pysmlight.exceptions import SmlightConnectionError
+from pysmlight.models import AmbilightPayload
+from pysmlight.web import ActionWrapper
+
+
+async def test_ambilight_stream_latest_wins() -> None:
+    """Test frames queued during a request merge and only changes are sent."""
+    sent: list[AmbilightPayload] = []
+    release = asyncio.Event()
+
+    async def ambilight(payload: AmbilightPayload) -> bool:
+        sent.append(payload)
+        await release.wait()
+        return True
+
+    actions = Mock()
+    actions.ambilight = ambilight
+    stream = AmbilightStream(actions)
+
+    stream.update(
+        AmbilightPayload(
+            ultLedMode=AmbiEffect.WSULT_SOLID, ultLedColor="#ff0000", ultLedBri=100
+        )
+    )
+    await asyncio.sleep(0)
+    # request in flight, these frames collapse into one
+    stream.update(AmbilightPayload(ultLedColor="#00ff00", ultLedBri=100))
+    stream.update(AmbilightPayload(ultLedColor="#0000ff", ultLedBri=100))
+    release.set()
+    await stream.flush()
+
+    assert sent == [
+        AmbilightPayload(
+            ultLedMode=AmbiEffect.WSULT_SOLID, ultLedColor="#ff0000", ultLedBri=100
+        ),
+        AmbilightPayload(ultLedColor="#0000ff"),
+    ]
+    assert stream.frames_sent == 2
+    assert stream.frames_merged == 1
+    assert stream.fps > 0
+
+    # nothing changed, nothing sent
+    stream.update(AmbilightPayload(ultLedColor="#0000ff"))
+    await stream.flush()
+    assert len(sent) == 2
+    stream.close()
+
+
+async def test_ambilight_stream_failure_resends() -> None:
+    """Test fields of a failed frame are sent again with the next frame."""
+    actions = Mock()
+    actions.ambilight = AsyncMock(side_effect=[SmlightConnectionError("down"), True])
+    stream = AmbilightStream(actions, max_fps=1000)
+
+    stream.update(AmbilightPayload(ultLedBri=10, ultLedColor="#ffffff"))
+    await stream.flush()
+    stream.update(AmbilightPayload(ultLedBri=10))
+    await stream.flush()
+
+    assert actions.ambilight.call_args_list[1].args[0] == AmbilightPayload(ultLedBri=10)
+    # only the frame the device accepted counts
+    assert stream.frames_sent == 1
+    assert stream.frames_failed == 1
+    assert stream.fps == 0.0
+    stream.close()
+    await stream.flush()
+
+
+async def test_ambilight_stream_unexpected_error() -> None:
+    """Test the stream keeps running after a non Smlight exception."""
+    actions = Mock()
+    actions.ambilight = AsyncMock(side_effect=[TimeoutError(), True])
+    stream = AmbilightStream(actions)
+
+    stream.update(AmbilightPayload(ultLedBri=10))
+    await asyncio.wait_for(stream.flush(), 1)
+    assert stream._task is not None and not stream._task.done()
+
+    stream.update(AmbilightPayload(ultLedBri=10))
+    await asyncio.wait_for(stream.flush(), 1)
+    assert actions.ambilight.await_count == 2
+    assert stream.frames_sent == 1
+    assert stream.frames_failed == 1
+    stream.close()
+
+
+def test_action_wrapper_ambilight_stream() -> None:
+    actions = ActionWrapper(Mock(), Mock())
+    assert actions.ambilight_stream is actions.ambilight_stream
@@ -136,3 +136,19 @@ async def test_auth_request_headers(aresponses: ResponsesMockServer) -> None:
 
         req_post = aresponses.history[1][0]
         assert req_post.headers.get("Authorization") == "Basic YWRtaW46YWRtaW4="
+
+
+async def test_auth_check_keeps_connection(aresponses: ResponsesMockServer) -> None:
+    """Test the auth check reads the body so the connection is pooled."""
+    # larger than the socket buffers, so it is not received unread
+    aresponses.add(
+        host,
+        "/api2",
+        "GET",
+        aresponses.Response(status=200, text="x" * 4_000_000),
+    )
+    async with ClientSession() as session:
+        client = Api2(host, session=session)
+        assert await client.check_auth_needed() is False
+        pooled = session.connector._conns  # type: ignore[union-attr]
+        assert sum(map(len, pooled.values())) == 1
@@ -0,0 +1,89 @@
+"""Tests for recording and replaying BLE proxy captures."""
+
+from pathlib import Path
+from unittest.mock import Mock, call
+
+import pytest
+
+from pysmlight.ble_capture import (
+    LE_PHDR,
+    LINKTYPE_BLUETOOTH_LE_LL_WITH_PHDR,
+    PCAP_GLOBAL_HEADER,
+    PCAP_RECORD_HEADER,
+    BleCaptureWriter,
+    read_capture,
+    replay_capture,
+)
+from pysmlight.ble_proxy import BleProxyProtocol
+
+
+async def test_capture_round_trip(tmp_path: Path) -> None:
+    """Test adverts parsed by the protocol are recorded and replayed unchanged."""
+    path = tmp_path / "adverts.pcap"
+    writer = await BleCaptureWriter.create(path, flush_size=64)
+    protocol = BleProxyProtocol(writer, Mock())
+
+    mac_1 = b"\x55\x44\x33\x22\x11\x00"
+    payload_1 = b"\x02\x01\x06"
+    mac_2 = b"\xaa\xbb\xcc\xdd\xee\xff"
+    payload_2 = bytes(range(249))
+    packet = (
+        b"\x00\x03" + mac_1 + b"\x01\xab\x03" + payload_1
+        + b"\x00\x03" + mac_2 + b"\x00\xb0\xf9" + payload_2
+    )  # fmt: skip
+    protocol.datagram_received(packet, ("127.0.0.1", 12345))
+    writer(mac_2, -80, 0, bytes(250))  # does not fit the PDU length field
+    writer.close()
+    writer(mac_1, -85, 1, payload_1)  # ignored after close
+    assert writer.records == 2
+    assert writer.skipped == 1
+
+    data = path.read_bytes()
+    assert PCAP_GLOBAL_HEADER.unpack_from(data)[-1] == (
+        LINKTYPE_BLUETOOTH_LE_LL_WITH_PHDR
+    )
+    # PDU length field matches AdvA plus the data in every record
+    offset = PCAP_GLOBAL_HEADER.size
+    for payload in (payload_1, payload_2):
+        _, _, incl_len, _ = PCAP_RECORD_HEADER.unpack_from(data, offset)
+        pdu_length = data[offset + PCAP_RECORD_HEADER.size + LE_PHDR.size + 5]
+        assert pdu_length == 6 + len(payload)
+        offset += PCAP_RECORD_HEADER.size + incl_len
+
+    records = list(read_capture(path))
+    assert [(r.mac_bytes, r.rssi, r.address_type, r.raw_data) for r in records] == [
+        (mac_1, -85, 1, payload_1),
+        (mac_2, -80, 0, payload_2),
+    ]
+    assert records[0].timestamp > 0
+
+    callback = Mock()
+    assert replay_capture(path, callback) == 2
+    assert callback.call_args_list == [
+        call(mac_1, -85, 1, payload_1),
+        call(mac_2, -80, 0, payload_2),
+    ]
+
+
+def test_capture_invalid_file(tmp_path: Path) -> None:
+    """Test reading a file that is not a BLE pcap capture."""
+    path = tmp_path / "invalid.pcap"
+    path.write_bytes(b"\x00" * 4)
+    with pytest.raises(ValueError):
+        list(read_capture(path))
+    path.write_bytes(PCAP_GLOBAL_HEADER.pack(0xA1B2C3D4, 2, 4, 0, 0, 65535, 1))
+    with pytest.raises(ValueError):
+        list(read_capture(path))
+
+
+async def test_capture_open_error(tmp_path: Path) -> None:
+    """Test create raises when the file cannot be opened."""
+    with pytest.raises(OSError):
+        await BleCaptureWriter.create(tmp_path / "missing" / "adverts.pcap")
+
+    # the plain constructor opens in the background and drops the records
+    writer = BleCaptureWriter(tmp_path / "missing" / "adverts.pcap", flush_size=1)
+    writer(b"\x55\x44\x33\x22\x11\x00", -80, 0, b"\x02\x01\x06")
+    writer.close()
+    writer.close()
+    assert writer.records == 1
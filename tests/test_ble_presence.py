@@ -0,0 +1,78 @@
+"""Tests for the BLE RSSI presence engine."""
+
+from unittest.mock import Mock
+
+import pytest
+
+from pysmlight.ble_presence import BlePresenceEngine, PresenceChange
+
+MAC = b"\x55\x44\x33\x22\x11\x00"
+
+
+def test_presence_smoothing_matches_ema() -> None:
+    """Test batched smoothing equals a per-sample exponential moving average."""
+    engine = BlePresenceEngine(window=4, alpha=0.5, present_rssi=-100)
+    samples = [-60, -70, -80, -50, -40, -90]
+    for rssi in samples[:2]:
+        engine.add(MAC, "kitchen", rssi, now=0.0)
+    engine.process(now=0.0)
+    # more samples than the window, ring buffer wraps
+    for rssi in samples[2:]:
+        engine.add(MAC, "kitchen", rssi, now=1.0)
+    engine.process(now=1.0)
+
+    expected = float(samples[0])
+    for rssi in samples[1:]:
+        expected = expected * 0.5 + rssi * 0.5
+    slot = engine._slots[(MAC, "kitchen")]
+    assert engine._smoothed[slot] == pytest.approx(expected)
+
+
+def test_presence_changes() -> None:
+    """Test presence, nearest proxy switching with hysteresis and timeout."""
+    on_change = Mock()
+    engine = BlePresenceEngine(
+        on_change, alpha=1.0, present_rssi=-85, timeout=10.0, hysteresis=3.0
+    )
+
+    engine.add(MAC, "kitchen", -60, now=0.0)
+    engine.add(MAC, "hall", -70, now=0.0)
+    assert engine.process(now=0.0) == [PresenceChange(MAC, True, "kitchen", -60.0)]
+
+    # within hysteresis, stay with kitchen
+    engine.add(MAC, "hall", -58, now=1.0)
+    assert engine.process(now=1.0) == []
+
+    engine.add(MAC, "hall", -50, now=2.0)
+    assert engine.process(now=2.0) == [PresenceChange(MAC, True, "hall", -50.0)]
+
+    # too weak everywhere
+    engine.add(MAC, "hall", -95, now=3.0)
+    engine.add(MAC, "kitchen", -95, now=3.0)
+    assert engine.process(now=3.0) == [PresenceChange(MAC, False)]
+
+    engine.add(MAC, "hall", -60, now=4.0)
+    assert engine.process(now=4.0) == [PresenceChange(MAC, True, "hall", -60.0)]
+    # no samples for longer than timeout
+    assert engine.process(now=20.0) == [PresenceChange(MAC, False)]
+    assert on_change.call_count == 5
+
+
+def test_presence_prune_and_callback() -> None:
+    """Test stale buffers are released and reused."""
+    engine = BlePresenceEngine(present_rssi=-100)
+    engine.callback_for("kitchen")(MAC, -60, 0, b"")
+    engine.process()
+    assert (MAC, "kitchen") in engine._slots
+
+    engine.prune(max_age=0.0, now=1e12)
+    assert engine._slots == {}
+    assert engine._by_mac == {}
+
+    other = b"\x01\x02\x03\x04\x05\x06"
+    engine.add(other, "hall", -70, now=0.0)
+    assert engine._slots[(other, "hall")] == 0
+    assert engine.process(now=0.0) == [PresenceChange(other, True, "hall", -70.0)]
+
+    with pytest.raises(ValueError):
+        BlePresenceEngine(alpha=0)
@@ -1,10 +1,18 @@
 import asyncio
 from typing import Any
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
 
 import pytest
 
-from pysmlight.ble_proxy import BLE_PROXY_VERSION, BleProxyClient, BleProxyProtocol
+from pysmlight.ble_proxy import (
+    BLE_PROXY_VERSION,
+    BleActiveScanScheduler,
+    BleAdvertisementRouter,
+    BleProxyClient,
+    BleProxyProtocol,
+    normalize_uuid,
+    parse_adv_data,
+)
 from pysmlight.const import BleProxyMode
 
 
@@ -339,3 +347,273 @@ async def test_ble_proxy_client_ping_exception() -> None:
         client._send_ping()
         mock_warning.assert_called_once()
         assert "Error sending ping" in mock_warning.call_args[0][0]
+
+
+def test_ble_router_address_and_prefix() -> None:
+    """Test advertisements are routed by exact address and address prefix."""
+    router = BleAdvertisementRouter()
+    by_address = Mock()
+    by_prefix = Mock()
+    catch_all = Mock()
+    router.subscribe(by_address, address="00:11:22:33:44:55")
+    remove_prefix = router.subscribe(by_prefix, address_prefix="00:11:22")
+    router.subscribe(catch_all)
+
+    mac_bytes = b"\x55\x44\x33\x22\x11\x00"
+    router(mac_bytes, -60, 0, b"")
+    router(b"\x01\x02\x03\x22\x11\x00", -70, 0, b"")
+    router(b"\x01\x02\x03\x04\x05\x06", -80, 0, b"")
+
+    by_address.assert_called_once_with(mac_bytes, -60, 0, b"")
+    assert by_prefix.call_count == 2
+    assert catch_all.call_count == 3
+
+    remove_prefix()
+    router(mac_bytes, -60, 0, b"")
+    assert by_prefix.call_count == 2
+    assert router._by_prefix == {}
+
+
+def test_ble_router_manufacturer_and_service() -> None:
+    """Test advertisements are routed by company ID and service UUID."""
+    router = BleAdvertisementRouter()
+    apple = Mock()
+    battery = Mock()
+    both = Mock()
+    router.subscribe(apple, manufacturer_id=0x004C)
+    router.subscribe(battery, service_uuid="180F")
+    router.subscribe(both, manufacturer_id=0x004C, service_uuid=0x180F)
+
+    manufacturer = b"\x05\xff\x4c\x00\x01\x02"
+    service_list = b"\x03\x03\x0f\x18"
+    service_data = b"\x04\x16\x0f\x18\x64"
+    mac_bytes = b"\x55\x44\x33\x22\x11\x00"
+
+    router(mac_bytes, -60, 0, manufacturer + service_list)
+    router(mac_bytes, -60, 0, service_data)
+    router(mac_bytes, -60, 0, b"\x02\x01\x06")
+
+    assert apple.call_count == 1
+    assert battery.call_count == 2
+    # OR-ed filters only deliver once per advertisement
+    assert both.call_count == 2
+
+
+def test_ble_router_subscriber_exception() -> None:
+    """Test a failing subscriber does not stop delivery to others."""
+    router = BleAdvertisementRouter()
+    failing = Mock(side_effect=ValueError("boom"))
+    working = Mock()
+    router.subscribe(failing)
+    router.subscribe(working)
+    router(b"\x55\x44\x33\x22\x11\x00", -60, 0, b"")
+    working.assert_called_once()
+
+
+def test_parse_adv_data_uuids() -> None:
+    """Test service UUID extraction for 16, 32 and 128-bit AD structures."""
+    uuid128 = bytes(range(16))
+    raw = (
+        b"\x05\x02\x0f\x18\x0a\x18"
+        + b"\x05\x05\x78\x56\x34\x12"
+        + b"\x11\x07"
+        + uuid128
+        + b"\x09\x09truncated"
+    )
+    company_ids, service_uuids = parse_adv_data(raw)
+    assert company_ids == set()
+    assert service_uuids == {
+        normalize_uuid("180f"),
+        normalize_uuid("180a"),
+        normalize_uuid("0x12345678"),
+        "0f0e0d0c-0b0a-0908-0706-050403020100",
+    }
+    with pytest.raises(ValueError):
+        BleAdvertisementRouter().subscribe(Mock(), address_prefix="00:11:22:33:44:55")
+
+
+def test_ble_proxy_protocol_counters() -> None:
+    """Test protocol counts packets, adverts, parse errors and resyncs."""
+    protocol = BleProxyProtocol(Mock(), Mock())
+    mac_bytes = b"\x55\x44\x33\x22\x11\x00"
+    valid = b"\x00\x03" + mac_bytes + b"\x01\xab\x03\x02\x01\x06"
+    protocol.datagram_received(valid + valid, ("127.0.0.1", 12345))
+    protocol.datagram_received(b"\xff\xff" + valid, ("127.0.0.1", 12345))
+
+    counters = protocol.counters
+    assert counters.packets == 2
+    assert counters.bytes == 2 * len(valid) + len(valid) + 2
+    assert counters.adverts == 3
+    assert counters.parse_errors == 1
+    assert counters.resyncs == 1
+    assert counters.last_seen is not None
+
+
+def test_ble_proxy_client_stats() -> None:
+    """Test PING/ACK round trip and rate tracking in the stats snapshot."""
+    client = BleProxyClient(esp32_ip="127.0.0.1", callback=Mock(), esp32_port=5050)
+    client.transport = Mock()
+    client.local_port = 12345
+
+    with patch("pysmlight.ble_proxy.time.monotonic", side_effect=[10.0, 10.25]):
+        client._send_ping()
+        client._on_ack()
+
+    client.protocol = BleProxyProtocol(Mock(), client._on_ack, client.counters)
+    with patch("pysmlight.ble_proxy.time.monotonic", return_value=20.0):
+        client._update_rates()
+    client.protocol.datagram_received(
+        b"\x00\x03" + b"\x55\x44\x33\x22\x11\x00" + b"\x01\xab\x00",
+        ("127.0.0.1", 12345),
+    )
+    with patch("pysmlight.ble_proxy.time.monotonic", return_value=22.0):
+        client._update_rates()
+
+    stats = client.get_stats()
+    assert stats.connected is True
+    assert stats.rtt == pytest.approx(0.25)
+    assert stats.rtt_avg == pytest.approx(0.25)
+    assert stats.pings_sent == 1
+    assert stats.acks_received == 1
+    assert stats.missed_acks == 0
+    assert stats.adverts == 1
+    assert stats.adverts_per_sec == pytest.approx(0.5)
+    assert stats.packets_per_sec == pytest.approx(0.5)
+    assert stats.last_seen is not None
+
+
+def test_ble_proxy_client_late_ack() -> None:
+    """Test an ACK with several pings outstanding is not timed."""
+    client = BleProxyClient(esp32_ip="127.0.0.1", callback=Mock(), esp32_port=5050)
+    client.transport = Mock()
+    client.local_port = 12345
+
+    with patch("pysmlight.ble_proxy.time.monotonic", side_effect=[10.0, 12.0]):
+        client._send_ping()
+        client._send_ping()
+    client._on_ack()
+    client._on_ack()
+
+    stats = client.get_stats()
+    assert stats.rtt is None
+    assert stats.missed_acks == 1
+    assert stats.acks_received == 2
+
+
+async def test_ble_proxy_client_connect_retry_resets_ping() -> None:
+    """Test pings of a failed connect attempt are not counted as missed."""
+    client = BleProxyClient(esp32_ip="127.0.0.1", callback=Mock(), esp32_port=5050)
+    client.running = True
+    transport = Mock()
+    transport.get_extra_info.return_value = ("0.0.0.0", 12345)
+    attempts = 0
+
+    async def endpoint(*args: Any, **kwargs: Any) -> tuple[Mock, Mock]:
+        return transport, Mock()
+
+    async def wait_for(aw: Any, timeout: float) -> None:
+        nonlocal attempts
+        aw.close()
+        attempts += 1
+        if attempts < 3:
+            raise TimeoutError
+        client.running = False
+        raise TimeoutError
+
+    loop = asyncio.get_running_loop()
+    with (
+        patch.object(loop, "create_datagram_endpoint", side_effect=endpoint),
+        patch("asyncio.wait_for", side_effect=wait_for),
+        patch("asyncio.sleep", new=AsyncMock()),
+    ):
+        await client._connect_loop()
+
+    stats = client.get_stats()
+    assert stats.pings_sent == 3
+    assert stats.missed_acks == 0
+
+
+async def test_ble_proxy_client_missed_acks_reconnect() -> None:
+    """Test the client reconnects after too many PINGs go unanswered."""
+    client = BleProxyClient(
+        esp32_ip="127.0.0.1", callback=Mock(), esp32_port=5050, max_missed_acks=2
+    )
+    client.running = True
+    client.transport = Mock()
+    client.local_port = 12345
+    client._connected_evt.set()
+
+    for _ in range(3):
+        client._send_ping()
+    assert client.get_stats().missed_acks == 2
+
+    original_sleep = asyncio.sleep
+
+    async def mock_sleep(delay: float) -> None:
+        await original_sleep(0)
+
+    with (
+        patch("asyncio.sleep", side_effect=mock_sleep),
+        patch.object(client, "_connect_loop", return_value=None) as connect_loop,
+    ):
+        await client._ping_loop()
+
+    connect_loop.assert_called_once()
+    stats = client.get_stats()
+    assert stats.reconnects == 1
+    assert stats.connected is False
+    assert client.transport is None
+    client.stop()
+
+
+def test_ble_active_scan_scheduler() -> None:
+    """Test active windows are requested for unknown devices and back off."""
+    client = Mock()
+    scheduler = BleActiveScanScheduler(
+        client, window_ms=500, min_interval=5.0, max_interval=20.0, max_attempts=2
+    )
+    unknown = b"\x55\x44\x33\x22\x11\x00"
+    named = b"\xaa\xbb\xcc\xdd\xee\xff"
+
+    # nothing unknown, no window
+    assert scheduler.tick(now=0.0) is False
+    scheduler(named, -60, 0, b"\x05\x09Test")
+    assert scheduler.unresolved == 0
+
+    with patch("pysmlight.ble_proxy.time.monotonic", return_value=1.0):
+        scheduler(unknown, -60, 0, b"\x02\x01\x06")
+    assert scheduler.unresolved == 1
+    assert scheduler.tick(now=1.0) is True
+    client.set_active_window.assert_called_once_with(500)
+
+    # retries back off while no new devices appear
+    assert scheduler.tick(now=5.0) is False
+    assert scheduler.tick(now=6.0) is True
+    assert scheduler.tick(now=15.0) is False
+    assert scheduler.tick(now=16.0) is True
+    # given up after max_attempts
+    assert scheduler.unresolved == 0
+    assert scheduler.windows_requested == 3
+
+    # device seen during an active window is resolved
+    other = b"\x01\x02\x03\x04\x05\x06"
+    with patch("pysmlight.ble_proxy.time.monotonic", return_value=16.5):
+        scheduler(other, -60, 0, b"")
+        scheduler.expire(now=20.0)
+    assert scheduler.unresolved == 0
+    assert other in scheduler._resolved
+    scheduler.expire(now=10000.0)
+    assert scheduler._resolved == {}
+
+
+def test_ble_active_scan_scheduler_error() -> None:
+    """Test a failed window request is retried on the next tick."""
+    from pysmlight.exceptions import SmlightConnectionError
+
+    client = Mock()
+    client.set_active_window.side_effect = SmlightConnectionError("Socket error")
+    scheduler = BleActiveScanScheduler(client)
+    scheduler(b"\x55\x44\x33\x22\x11\x00", -60, 0, b"")
+    assert scheduler.tick(now=100.0) is False
+    assert scheduler.windows_requested == 0
+    assert scheduler.unresolved == 1
@@ -0,0 +1,37 @@
+"""Tests for the device model registry."""
+
+import pytest
+
+from pysmlight.const import Devices
+from pysmlight.devices import DEVICE_MODELS, get_device_model
+
+
+@pytest.mark.parametrize(
+    ("model", "u_device", "esp_fw_type", "radios"),
+    [
+        ("SLZB-06", False, "ESP", ("SLZB-06", "SLZB-06")),
+        ("SLZB-06p10U", True, "ESPs3", ("SLZB-06p10", "SLZB-06p10")),
+        ("SLZB-MR1", False, "ESP", ("SLZB-06M", "SLZB-06p7V2")),
+        ("SLZB-MR5U", True, "ESPs3", ("SLZB-MR3U", "SLZB-MR3U")),
+        ("SLZB-Ultima3", True, "ESPs3", ("SLZB-06Mg24", "SLZB-06p10")),
+        ("SLZB-Ultima9", True, "ESPs3", ("SLZB-Ultima9", "SLZB-Ultima9")),
+    ],
+)
+def test_device_model(
+    model: str, u_device: bool, esp_fw_type: str, radios: tuple[str, str]
+) -> None:
+    device = get_device_model(model)
+    assert device.u_device is u_device
+    assert device.esp_fw_type == esp_fw_type
+    assert (device.radio_model(0), device.radio_model(1)) == radios
+    assert device.peripherals is ("Ultima" in model)
+    assert device.device_id == Devices.get(model)
+
+
+def test_device_model_registry() -> None:
+    assert set(Devices) <= set(DEVICE_MODELS)
+    assert get_device_model("SLZB-06") is get_device_model("SLZB-06")
+    assert get_device_model("SLZB-X1") is get_device_model("SLZB-X1")
+    none = get_device_model(None)
+    assert not none.u_device
+    assert none.esp_fw_type == "ESP"
@@ -4,8 +4,8 @@ from aiohttp import ClientSession
 from aresponses import ResponsesMockServer
 import pytest
 
-from pysmlight import Api2, Firmware
-from pysmlight.const import Actions
+from pysmlight import Api2, Firmware, Info, Radio
+from pysmlight.const import Actions, Devices
 
 from . import load_fixture
 
@@ -348,3 +348,89 @@ async def test_mr3u_device_id() -> None:
     from pysmlight.const import Devices
 
     assert Devices.get("SLZB-MR3U") == 23
+
+
+async def test_get_all_firmware_dedup(aresponses: ResponsesMockServer) -> None:
+    """Test radios sharing a catalog are served by one request."""
+    requested: list[dict[str, str]] = []
+
+    def response_handler(request):
+        params = dict(request.query)
+        requested.append(params)
+        fixture = (
+            "slzb-06-zb2-fw.json" if "device" in params else "slzb-06U-esp-fw.json"
+        )
+        return aresponses.Response(
+            status=200,
+            headers={"Content-Type": "application/json"},
+            text=load_fixture(fixture),
+        )
+
+    for _ in range(2):
+        aresponses.add(
+            "updates.smlight.tech",
+            "/services/api/slzb-06x-ota.php",
+            "GET",
+            response=response_handler,
+        )
+    info = Info(
+        model="SLZB-MR5U",
+        fw_channel="dev",
+        radios=[Radio(zb_type=0), Radio(zb_type=1)],
+    )
+    async with ClientSession() as session:
+        client = Api2(host, session=session)
+        firmware = await client.get_all_firmware(info)
+
+    assert sorted(requested, key=len) == [
+        {"type": "ESPs3"},
+        {"type": "ZB", "format": "slzb", "device": str(Devices["SLZB-MR3U"])},
+    ]
+    assert firmware.esp
+    assert all(fw.mode == "ESPs3" for fw in firmware.esp)
+    assert len(firmware.radios) == 2
+    assert firmware.radios[0]
+    assert all(fw.type == 0 for fw in firmware.radios[0])
+    assert all(fw.type == 1 for fw in firmware.radios[1] or ())
+
+
+async def test_get_all_firmware_partial(aresponses: ResponsesMockServer) -> None:
+    """Test a failing catalog leaves its lists empty, the others are returned."""
+
+    def response_handler(request):
+        if "device" in request.query:
+            return aresponses.Response(status=200, text="<html>busy</html>")
+        return aresponses.Response(
+            status=200,
+            headers={"Content-Type": "application/json"},
+            text=load_fixture("slzb-06U-esp-fw.json"),
+        )
+
+    for _ in range(2):
+        aresponses.add(
+            "updates.smlight.tech",
+            "/services/api/slzb-06x-ota.php",
+            "GET",
+            response=response_handler,
+        )
+    info = Info(model="SLZB-MR5U", fw_channel="dev", radios=[Radio(zb_type=0)])
+    async with ClientSession() as session:
+        client = Api2(host, session=session)
+        firmware = await client.get_all_firmware(info)
+
+    assert firmware.esp
+    assert firmware.radios == [None]
+
+
+async def test_get_all_firmware_all_failed(aresponses: ResponsesMockServer) -> None:
+    """Test the error is raised when no catalog could be fetched."""
+    aresponses.add(
+        "updates.smlight.tech",
+        "/services/api/slzb-06x-ota.php",
+        "GET",
+        aresponses.Response(status=200, text="<html>busy</html>"),
+    )
+    async with ClientSession() as session:
+        client = Api2(host, session=session)
+        with pytest.raises(ValueError):
+            await client.get_all_firmware(Info(model="SLZB-06"))
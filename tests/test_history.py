@@ -0,0 +1,100 @@
+"""Tests for the sensor history store."""
+
+import math
+
+from pysmlight.history import Rollup, SensorHistory, SensorSeries
+from pysmlight.models import Sensors
+
+
+def test_series_ring_and_export() -> None:
+    series = SensorSeries(capacity=3, rollup_interval=10)
+    for t in range(5):
+        series.add(Sensors(esp32_temp=40 + t, ram_usage=100), timestamp=float(t))
+    assert len(series) == 3
+
+    data = series.export()
+    assert data["time"].tolist() == [2.0, 3.0, 4.0]
+    assert data["esp32_temp"].tolist() == [42.0, 43.0, 44.0]
+    assert all(math.isnan(v) for v in data["zb_temp"])
+
+    # out of order samples are dropped
+    series.add(Sensors(esp32_temp=0), timestamp=1.0)
+    assert series.export()["time"].tolist() == [2.0, 3.0, 4.0]
+
+
+def test_series_rollup() -> None:
+    series = SensorSeries()
+    for t, temp in ((0, 40.0), (30, 42.0), (60, 50.0), (300, 44.0)):
+        series.add(Sensors(zb_temp=temp), timestamp=float(t))
+    series.add(Sensors(), timestamp=310.0)
+
+    assert series.rollup("zb_temp", 60) == [
+        Rollup(0.0, 40.0, 42.0, 41.0, 2),
+        Rollup(60.0, 50.0, 50.0, 50.0, 1),
+        Rollup(300.0, 44.0, 44.0, 44.0, 1),
+    ]
+    assert series.rollup("zb_temp", 60, start=60, end=120) == [
+        Rollup(60.0, 50.0, 50.0, 50.0, 1)
+    ]
+
+
+def test_series_downsampling() -> None:
+    series = SensorSeries(capacity=2, rollup_interval=100, rollup_capacity=2)
+    for t in range(0, 400, 10):
+        series.add(Sensors(fs_used=t), timestamp=float(t))
+
+    rollups = series.export_rollups()
+    # buckets 0-2 are complete, the oldest has been overwritten
+    assert rollups["time"].tolist() == [100.0, 200.0]
+    assert rollups["fs_used_min"].tolist() == [100.0, 200.0]
+    assert rollups["fs_used_max"].tolist() == [190.0, 290.0]
+    assert rollups["fs_used_mean"].tolist() == [145.0, 245.0]
+    assert rollups["fs_used_count"].tolist() == [10.0, 10.0]
+    assert math.isnan(rollups["esp32_temp_mean"][0])
+
+    # rollups stand in for overwritten raw samples, samples 300-370 are lost
+    assert series.rollup("fs_used", 100) == [
+        Rollup(100.0, 100.0, 190.0, 145.0, 10),
+        Rollup(200.0, 200.0, 290.0, 245.0, 10),
+        Rollup(300.0, 380.0, 390.0, 385.0, 2),
+    ]
+    assert series.rollup("fs_used", 200) == [
+        Rollup(0.0, 100.0, 190.0, 145.0, 10),
+        Rollup(200.0, 200.0, 390.0, (2450.0 + 770.0) / 12, 12),
+    ]
+    assert series.rollup("fs_used", 100, start=200, end=300) == [
+        Rollup(200.0, 200.0, 290.0, 245.0, 10)
+    ]
+
+
+def test_series_rollup_counts_samples_once() -> None:
+    """Test raw samples of a completed rollup are not counted twice."""
+    series = SensorSeries(capacity=15, rollup_interval=100)
+    for t in range(0, 400, 10):
+        series.add(Sensors(fs_used=t), timestamp=float(t))
+    assert series.export()["time"][0] == 250.0
+
+    assert series.rollup("fs_used", 400) == [Rollup(0.0, 0.0, 390.0, 195.0, 40)]
+
+
+def test_series_precision() -> None:
+    """Test large counters are stored exactly."""
+    series = SensorSeries()
+    series.add(Sensors(fs_used=2**24 + 1, ram_usage=123_456_789), timestamp=0.0)
+    data = series.export()
+    assert data["fs_used"][0] == 2**24 + 1
+    assert data["ram_usage"][0] == 123_456_789
+
+
+def test_history_fleet() -> None:
+    history = SensorHistory(capacity=10)
+    history.add("a", Sensors(esp32_temp=40), timestamp=0.0)
+    history.add("b", Sensors(esp32_temp=50), timestamp=0.0)
+    assert "a" in history
+    assert history.rollup("esp32_temp", 60) == {
+        "a": [Rollup(0.0, 40.0, 40.0, 40.0, 1)],
+        "b": [Rollup(0.0, 50.0, 50.0, 50.0, 1)],
+    }
+    assert set(history.export()) == {"a", "b"}
+    history.remove("a")
+    assert history.get("a") is None
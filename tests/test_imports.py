@@ -0,0 +1,31 @@
+import subprocess
+import sys
+
+import pytest
+
+import pysmlight
+from pysmlight.web import Api2
+
+
+def test_lazy_exports() -> None:
+    """Test package exports resolve to the module attributes."""
+    assert pysmlight.Api2 is Api2
+    assert set(pysmlight.__all__) <= set(dir(pysmlight))
+    for name in pysmlight.__all__:
+        assert getattr(pysmlight, name) is not None
+
+    with pytest.raises(AttributeError):
+        pysmlight.NotAnExport  # noqa: B018
+
+
+def test_ble_proxy_import_skips_web_client() -> None:
+    """Test importing the BLE proxy does not load aiohttp or the models."""
+    code = (
+        "import sys, pysmlight.ble_proxy; "
+        "print(sorted(m for m in ('aiohttp', 'mashumaro', 'pysmlight.web') "
+        "if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, check=True, text=True
+    )
+    assert result.stdout.strip() == "[]"
@@ -1,7 +1,7 @@
 """Tests for retrieving device information from SLZB-06x devices."""
 
 import json
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 
 from aiohttp import ClientSession
 from aiohttp.client_exceptions import ClientConnectionError
@@ -12,6 +12,8 @@ from syrupy.assertion import SnapshotAssertion
 from pysmlight import Api2, Info, Sensors
 from pysmlight.const import Settings
 from pysmlight.exceptions import SmlightAuthError, SmlightConnectionError
+from pysmlight.models import CapabilityProfile
+import pysmlight.web
 
 from . import load_fixture
 
@@ -38,6 +40,66 @@ async def test_info_device_info(
         assert info == snapshot
 
 
+async def test_info_cached_when_unchanged(aresponses: ResponsesMockServer) -> None:
+    """Test an identical info response is not decoded again."""
+    info_json = load_fixture("slzb-06-info.json")
+    changed = json.loads(info_json)
+    changed["Info"]["sw_version"] = "v2.7.5"
+    for text in (info_json, info_json, json.dumps(changed)):
+        aresponses.add(
+            host,
+            "/ha_info",
+            "GET",
+            aresponses.Response(
+                status=200,
+                headers={"Content-Type": "application/json"},
+                text=text,
+            ),
+        )
+    async with ClientSession() as session:
+        client = Api2(host, session=session)
+        with patch(
+            "pysmlight.web.decode_info", wraps=pysmlight.web.decode_info
+        ) as decode:
+            first = await client.get_info()
+            first.radios[0].zb_version = "changed"
+            first.addons["zwave"] = True
+            second = await client.get_info()
+            assert decode.call_count == 1
+            # the cache is not shared with callers
+            assert second is not first
+            assert second.radios[0].zb_version != "changed"
+            assert "zwave" not in second.addons
+
+            third = await client.get_info()
+            assert third.sw_version == "v2.7.5"
+            assert decode.call_count == 2
+
+        client.set_host("slzb-06-2.local")
+        assert client._info_cache is None
+
+
+async def test_info_replaces_seeded_version(aresponses: ResponsesMockServer) -> None:
+    """Test a version seeded from saved state is replaced by get_info."""
+    aresponses.add(
+        host,
+        "/ha_info",
+        "GET",
+        aresponses.Response(
+            status=200,
+            headers={"Content-Type": "application/json"},
+            text=load_fixture("slzb-06-info.json"),
+        ),
+    )
+    async with ClientSession() as session:
+        client = Api2(host, session=session)
+        client.seed_info(Info(sw_version="v2.0.0"))
+        assert client.core_version == "v2.0.0"
+        info = await client.get_info()
+        assert client.core_version == info.sw_version
+        assert client.sse.sw_version == info.sw_version
+
+
 async def test_info_device_mr_info(
     aresponses: ResponsesMockServer, snapshot: SnapshotAssertion
 ) -> None:
@@ -259,6 +321,72 @@ async def test_info_legacy_info2(aresponses: ResponsesMockServer) -> None:
         assert info.legacy_api == 2
 
 
+async def test_info_capability_profile(aresponses: ResponsesMockServer) -> None:
+    """Test legacy endpoints are detected once and reused without probing."""
+    headers = {
+        "Content-Type": "application/json",
+        "respValuesArr": json.dumps(
+            json.loads(load_fixture("slzb-06-resparr-0.9.9.json"))
+        ),
+    }
+    aresponses.add(
+        host,
+        "/ha_info",
+        "GET",
+        aresponses.Response(
+            status=200,
+            headers={"Content-Type": "application/json"},
+            text="URL NOT FOUND",
+        ),
+    )
+    for _ in range(2):
+        aresponses.add(
+            host,
+            "/api",
+            "GET",
+            aresponses.Response(status=200, headers=headers, text="Some html"),
+        )
+    async with ClientSession() as session:
+        client = Api2(host, session=session)
+        await client.get_info()
+        profile = client.profile
+        assert profile == CapabilityProfile(
+            info_api=False,
+            api_path="/api",
+            legacy_api=True,
+            legacy_sse=True,
+            model=profile.model,
+            sw_version="0.9.9",
+        )
+
+        # second call goes straight to the dashboard page
+        info = await client.get_info()
+        assert info.sw_version == "0.9.9"
+        aresponses.assert_plan_strictly_followed()
+
+        # firmware update invalidates the profile, user callbacks still run
+        user_cb = Mock()
+        client.sse.esp_update_cb = user_cb
+        await client.sse._message_handler(Mock(type="ESP_UPD_done", data=""))
+        assert client.profile is None
+        assert client.url == f"http://{host}/api2"
+        assert client.sse.legacy_api is False
+        assert client.sse.legacy_sse is None
+        user_cb.assert_called_once_with()
+
+        # a client created on a shared sse client keeps its callback
+        shared = Api2(host, session=session, sse=client.sse)
+        shared.apply_profile(profile)
+        await client.sse._message_handler(Mock(type="ESP_UPD_done", data=""))
+        assert shared.profile is None
+        assert user_cb.call_count == 2
+
+        restored = Api2(host, session=session)
+        restored.apply_profile(profile)
+        assert restored.url == f"http://{host}/api"
+        assert restored.sse.legacy_sse
+
+
 async def test_info_invalid_versions() -> None:
     """Test conversion of invalid firmware versions (per awesomeVersion)
 
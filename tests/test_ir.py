@@ -0,0 +1,293 @@
+"""Tests for IR code handling."""
+
+import asyncio
+import itertools
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from pysmlight.const import Events, IRProtocol
+from pysmlight.exceptions import SmlightConnectionError
+from pysmlight.ir import (
+    IRCodeLibrary,
+    IRCommand,
+    IRTransmitQueue,
+    _to_ticks,
+    decode_ir,
+    neighbour_signatures,
+    signature_candidates,
+    timing_signature,
+)
+from pysmlight.models import IRPayload
+from pysmlight.web import ActionWrapper
+
+
+def nec_timings(address: int, command: int, jitter: float = 1.0) -> list[int]:
+    """Build NEC timings, optionally stretched to mimic capture jitter."""
+    timings = [9000, 4500]
+    data = address | (~address & 0xFF) << 8 | command << 16 | (~command & 0xFF) << 24
+    for bit in range(32):
+        timings += [560, 1690 if data >> bit & 1 else 560]
+    timings.append(560)
+    return [int(t * jitter) for t in timings]
+
+
+def test_timing_signature() -> None:
+    sig = timing_signature([180, 90, 11, 11, 11, 34])
+    assert sig == (8, 6, 1, 1, 1, 3)
+    assert timing_signature([]) == ()
+
+
+def test_ir_library_match_and_dedup() -> None:
+    library = IRCodeLibrary()
+    assert library.add("power", nec_timings(0x04, 0x08)) == "power"
+    assert library.add("volume_up", IRPayload.from_raw_timings(nec_timings(4, 2)))
+    # near identical capture is not stored twice
+    assert library.add("power_again", nec_timings(0x04, 0x08, 1.08)) == "power"
+    assert len(library) == 2
+    assert "power_again" not in library
+
+    assert library.match(nec_timings(0x04, 0x08, 0.93)) == "power"
+    assert library.match(nec_timings(0x04, 0x02, 1.05)) == "volume_up"
+    assert library.match(nec_timings(0x05, 0x08)) is None
+    assert library.match([]) is None
+
+    # pulse on a quantization boundary still matches
+    timings = nec_timings(0x04, 0x08)
+    timings[3] = 840
+    assert library.match(timings) == "power"
+
+    library.remove("power")
+    assert library.match(nec_timings(0x04, 0x08)) is None
+    assert list(library) == ["volume_up"]
+
+
+def test_ir_library_tolerance_across_signatures() -> None:
+    """Test codes a unit off in one pulse are probed, verified by tolerance."""
+    library = IRCodeLibrary(tolerance=0.25)
+    library.add("stored", [500, 1150, 500, 1150, 500, 500])
+
+    # 1350 us is 2.7 units, it rounds to 3 and is found as a neighbour
+    capture = [500, 1350, 500, 1150, 500, 500]
+    assert library._close(_to_ticks(capture), _to_ticks([500, 1150] * 2 + [500] * 2))
+    assert timing_signature(_to_ticks(capture)) == (1, 3, 1, 2, 1, 1)
+    assert (1, 2, 1, 2, 1, 1) in neighbour_signatures((1, 3, 1, 2, 1, 1))
+    assert library.match(capture) == "stored"
+    assert library.add("near", capture) == "stored"
+    assert "near" not in library
+    # two pulses across the boundary are out of reach
+    assert library.match([500, 1350, 500, 1350, 500, 500]) is None
+
+    # within the signature bucket the tolerance decides
+    stored = [2000, 4600, 2000, 4600, 2000, 2000]
+    capture = [2200, 4200, 1800, 4800, 2000, 2100]
+    library.add("long", stored)
+    assert library.match(capture) == "long"
+    library_strict = IRCodeLibrary(tolerance=0.05)
+    library_strict.add("long", stored)
+    assert library_strict.match(capture) is None
+
+
+def test_ir_library_get_and_replace() -> None:
+    library = IRCodeLibrary()
+    library.add("raw", [500, 1000], freq=36000)
+    assert library.get("raw") == IRPayload(code="0a14", freq=36)
+    library.add("raw", [1500, 500], dedup=False)
+    assert library.get("raw") == IRPayload(code="1e0a", freq=38)
+    assert len(library) == 1
+
+
+async def test_ir_library_sse_and_send() -> None:
+    library = IRCodeLibrary()
+    library.add("power", nec_timings(0x04, 0x08))
+
+    sse = Mock()
+    callback = Mock()
+    library.attach(sse, callback)
+    event, on_ir_code = sse.register_callback.call_args[0]
+    assert event == Events.IR_CODE
+    on_ir_code(nec_timings(0x04, 0x08, 1.1))
+    callback.assert_called_once_with("power", nec_timings(0x04, 0x08, 1.1))
+
+    actions = Mock()
+    actions.send_ir_code = AsyncMock(return_value=True)
+    assert await library.send(actions, "power") is True
+    payload = actions.send_ir_code.call_args[0][0]
+    assert payload.to_raw_timings() == [t // 50 * 50 for t in nec_timings(4, 8)]
+
+
+def test_signature_candidates() -> None:
+    assert signature_candidates([10, 25, 30]) == [(1, 2, 3), (1, 3, 3)]
+    assert signature_candidates([]) == [()]
+
+
+def run_lengths(levels: list[int], unit: int) -> list[int]:
+    """Convert half bit levels to mark/space timings starting with a mark."""
+    while levels and levels[0] == 0:
+        levels = levels[1:]
+    while levels and levels[-1] == 0:
+        levels = levels[:-1]
+    timings: list[int] = []
+    previous = None
+    for level in levels:
+        if level == previous:
+            timings[-1] += unit
+        else:
+            timings.append(unit)
+        previous = level
+    return timings
+
+
+def rc5_timings(address: int, command: int) -> list[int]:
+    bits = [1, 0 if command & 0x40 else 1, 0]
+    bits += [address >> i & 1 for i in range(4, -1, -1)]
+    bits += [command >> i & 1 for i in range(5, -1, -1)]
+    return run_lengths([h for b in bits for h in ((0, 1) if b else (1, 0))], 889)
+
+
+def rc6_timings(address: int, command: int) -> list[int]:
+    levels = [1, 0] + [0, 1] * 3 + [1, 1, 0, 0]
+    data = address << 8 | command
+    for i in range(15, -1, -1):
+        levels += [1, 0] if data >> i & 1 else [0, 1]
+    return [2666, 889] + run_lengths(levels, 444)
+
+
+def sony_timings(value: int, bits: int) -> list[int]:
+    timings = [2400]
+    for i in range(bits):
+        timings += [600, 1200 if value >> i & 1 else 600]
+    return timings
+
+
+@pytest.mark.parametrize(
+    "timings, expected",
+    [
+        (nec_timings(0x04, 0x08), IRCommand(IRProtocol.NEC, 0x04, 0x08)),
+        (nec_timings(0x04, 0x08, 1.1), IRCommand(IRProtocol.NEC, 0x04, 0x08)),
+        (
+            [9000, 4500]
+            + [
+                x
+                for b in range(32)
+                for x in (560, 1690 if 0xF708_3412 >> b & 1 else 560)
+            ]
+            + [560],
+            IRCommand(IRProtocol.NEC_EXT, 0x3412, 0x08),
+        ),
+        (
+            [4500] + nec_timings(0x07, 0x02)[1:],
+            IRCommand(IRProtocol.SAMSUNG, 0xF807, 0x02),
+        ),
+        (
+            [4500, 4500]
+            + [
+                x
+                for b in range(32)
+                for x in (560, 1690 if 0xFD02_0707 >> b & 1 else 560)
+            ]
+            + [560],
+            IRCommand(IRProtocol.SAMSUNG, 0x07, 0x02),
+        ),
+        (sony_timings(0x95, 12), IRCommand(IRProtocol.SONY12, 0x01, 0x15)),
+        (sony_timings(0x1A95, 15), IRCommand(IRProtocol.SONY15, 0x35, 0x15)),
+        (sony_timings(0xB5A95, 20), IRCommand(IRProtocol.SONY20, 0x16B5, 0x15)),
+        (rc5_timings(0x05, 0x35), IRCommand(IRProtocol.RC5, 0x05, 0x35)),
+        (rc5_timings(0x1F, 0x40), IRCommand(IRProtocol.RC5, 0x1F, 0x40)),
+        (rc6_timings(0x00, 0x0C), IRCommand(IRProtocol.RC6, 0x00, 0x0C)),
+        (rc6_timings(0xA5, 0xFF), IRCommand(IRProtocol.RC6, 0xA5, 0xFF)),
+        ([500, 1000, 500], IRCommand(IRProtocol.RAW, raw=[500, 1000, 500])),
+        ([], IRCommand(IRProtocol.RAW, raw=[])),
+    ],
+)
+def test_decode_ir(timings: list[int], expected: IRCommand) -> None:
+    assert decode_ir(timings) == expected
+
+
+def test_decode_ir_tick_quantized() -> None:
+    """Test decoding survives the 50 us tick resolution of device captures."""
+    for timings, protocol in (
+        (rc5_timings(0x05, 0x35), IRProtocol.RC5),
+        (rc6_timings(0x12, 0x34), IRProtocol.RC6),
+        (sony_timings(0x95, 12), IRProtocol.SONY12),
+    ):
+        payload = IRPayload.from_raw_timings(timings)
+        assert decode_ir(payload.to_raw_timings()).protocol == protocol
+
+
+async def test_ir_transmit_queue_pacing_and_merge() -> None:
+    """Test codes are paced, prioritised and merged while pending."""
+    sent: list[tuple[str | None, float]] = []
+    loop = asyncio.get_running_loop()
+
+    async def send_ir_code(payload: IRPayload) -> bool:
+        sent.append((payload.code, loop.time()))
+        return True
+
+    actions = Mock()
+    actions.send_ir_code = send_ir_code
+    queue = IRTransmitQueue(actions, recovery_time=0.05)
+
+    power = IRPayload(code="0a14")
+    mute = IRPayload(code="1e0a")
+    results = await asyncio.gather(
+        queue.send(power),
+        queue.send(mute, priority=5),
+        queue.send(power),
+        queue.send(IRPayload(code="0101"), priority=-1),
+    )
+    assert results == [True, True, True, True]
+    assert [code for code, _ in sent] == ["0101", "0a14", "1e0a"]
+    gaps = [b - a for (_, a), (_, b) in itertools.pairwise(sent)]
+    assert all(gap >= 0.045 for gap in gaps)
+    queue.close()
+
+
+async def test_ir_transmit_queue_batch_and_errors() -> None:
+    """Test batch sends report per item results and errors reach the caller."""
+    actions = Mock()
+    actions.send_ir_code = AsyncMock(
+        side_effect=[True, SmlightConnectionError("timeout"), True, False]
+    )
+    queue = IRTransmitQueue(actions, recovery_time=0)
+
+    results = await queue.send_batch(
+        [IRPayload(code="01"), IRPayload(code="02"), IRPayload(code="01")]
+    )
+    assert results[0] is True
+    assert isinstance(results[1], SmlightConnectionError)
+    assert results[2] is True
+    assert await queue.send_batch([]) == []
+    assert await queue.send(IRPayload(code="03")) is False
+
+    actions.send_ir_code = AsyncMock(side_effect=SmlightConnectionError("down"))
+    with pytest.raises(SmlightConnectionError):
+        await queue.send(IRPayload(code="04"))
+    queue.close()
+
+
+async def test_ir_transmit_queue_close() -> None:
+    """Test closing the queue fails codes still waiting."""
+    started = asyncio.Event()
+
+    async def send_ir_code(payload: IRPayload) -> bool:
+        started.set()
+        await asyncio.sleep(10)
+        return True
+
+    actions = Mock()
+    actions.send_ir_code = send_ir_code
+    queue = IRTransmitQueue(actions)
+    first = asyncio.create_task(queue.send(IRPayload(code="01")))
+    second = asyncio.create_task(queue.send(IRPayload(code="02")))
+    await started.wait()
+    queue.close()
+    for task in (first, second):
+        with pytest.raises(SmlightConnectionError):
+            await task
+
+
+def test_action_wrapper_ir_queue() -> None:
+    actions = ActionWrapper(Mock(), Mock())
+    assert actions.ir_queue is actions.ir_queue
+    assert actions.ir_queue.actions is actions
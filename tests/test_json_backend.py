@@ -0,0 +1,105 @@
+"""Tests for the JSON backend selection."""
+
+import importlib
+import json
+from pathlib import Path
+import sqlite3
+import sys
+from types import ModuleType, SimpleNamespace
+
+import pytest
+
+from pysmlight import json_backend
+from pysmlight.json_backend import model_decoder, select_backend
+from pysmlight.models import Info, Sensors
+from pysmlight.store import DeviceStateStore
+
+
+def test_select_backend_fallback(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test an unavailable backend falls back to the standard library."""
+    monkeypatch.setitem(sys.modules, "msgspec", None)
+    name, loads, errors = select_backend("msgspec")
+    assert name == "json"
+    assert loads is json.loads
+    assert errors == (json.JSONDecodeError, UnicodeDecodeError)
+
+    with pytest.raises(ValueError, match="Unknown JSON backend"):
+        select_backend("yaml")
+
+
+def test_select_backend_default() -> None:
+    """Test the default backend decodes str and bytes alike."""
+    name, loads, errors = select_backend()
+    assert name in ("orjson", "msgspec", "json")
+    assert loads('{"a": [1, 2.5, null]}') == loads(b'{"a": [1, 2.5, null]}')
+    with pytest.raises(errors):
+        loads("{")
+
+
+def test_model_decoder() -> None:
+    decode = model_decoder(Sensors, "Sensors")
+    sensors = decode('{"Sensors": {"uptime": 5, "socket_uptime": 0}}')
+    assert sensors == Sensors(uptime=5)
+
+
+class FakeDecodeError(Exception):
+    """Like msgspec.DecodeError, not a ValueError."""
+
+
+def _fake_msgspec() -> ModuleType:
+    def decode(data: str | bytes) -> object:
+        try:
+            return json.loads(data)
+        except json.JSONDecodeError as err:
+            raise FakeDecodeError(str(err)) from None
+
+    module = ModuleType("msgspec")
+    module.DecodeError = FakeDecodeError  # type: ignore[attr-defined]
+    module.json = SimpleNamespace(decode=decode)  # type: ignore[attr-defined]
+    return module
+
+
+@pytest.mark.parametrize("backend", ["orjson", "msgspec", "json"])
+def test_forced_backend_raises_value_error(
+    monkeypatch: pytest.MonkeyPatch, backend: str
+) -> None:
+    """Test every forced backend reports corrupt input as ValueError."""
+    monkeypatch.setitem(sys.modules, "msgspec", _fake_msgspec())
+    monkeypatch.setenv("PYSMLIGHT_JSON_BACKEND", backend)
+    try:
+        importlib.reload(json_backend)
+        if backend != "orjson" or "orjson" in sys.modules:
+            assert json_backend.BACKEND == backend
+        assert json_backend.loads('{"a": 1}') == {"a": 1}
+        for data in ("{", b"\xff", ""):
+            with pytest.raises(ValueError):
+                json_backend.loads(data)
+            with pytest.raises(json_backend.DECODE_ERRORS):
+                json_backend.loads(data)
+    finally:
+        monkeypatch.undo()
+        importlib.reload(json_backend)
+
+
+async def test_store_skips_corrupt_rows_with_msgspec(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    """Test a corrupt stored row is ignored with the msgspec backend."""
+    monkeypatch.setitem(sys.modules, "msgspec", _fake_msgspec())
+    _, loads, _ = select_backend("msgspec")
+    monkeypatch.setattr("pysmlight.store.loads", loads)
+
+    path = tmp_path / "state.db"
+    store = DeviceStateStore(path)
+    await store.save_info("slzb-06.local", Info(model="SLZB-06"))
+    await store.save_sensors("slzb-06.local", Sensors(uptime=5))
+    await store.close()
+    with sqlite3.connect(path) as db:
+        db.execute("UPDATE device_state SET data = '{' WHERE kind = 'sensors'")
+
+    store = DeviceStateStore(path)
+    state = await store.load("slzb-06.local")
+    await store.close()
+    assert state is not None
+    assert state.info == Info(model="SLZB-06")
+    assert state.sensors is None
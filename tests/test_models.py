@@ -1,6 +1,14 @@
 import pytest
 
-from pysmlight.models import IRPayload
+from pysmlight.models import (
+    AmbilightPayload,
+    BleSession,
+    Firmware,
+    Info,
+    IRPayload,
+    Radio,
+    Sensors,
+)
 
 
 @pytest.mark.parametrize(
@@ -39,3 +47,84 @@ def test_ir_payload_to_raw_timings_empty():
 def test_ir_payload_to_raw_timings(code, expected_timings):
     payload = IRPayload(code=code)
     assert payload.to_raw_timings() == expected_timings
+
+
+def test_ir_payload_batch_round_trip():
+    timings_list = [[500, 1000], [26000, 50], [12750, 12800, 100]]
+    payloads = IRPayload.from_raw_timings_batch(timings_list, freq=36000)
+    assert [p.code for p in payloads] == ["0a14", "ff00ff000a01", "ffff000102"]
+    assert all(p.freq == 36 for p in payloads)
+    assert IRPayload.to_raw_timings_batch(payloads) == [
+        [500, 1000],
+        [26000, 50],
+        [12750, 12800, 100],
+    ]
+
+
+@pytest.mark.parametrize(
+    "code, expected_timings",
+    [
+        ("ffff000a", [12750, 13250]),  # continuation after a plain 255
+        ("0aff00", [500]),  # trailing continuation is dropped
+        ("0a1", [500, 50]),  # odd length, last nibble is a tick
+    ],
+)
+def test_ir_payload_to_raw_timings_edge_cases(code, expected_timings):
+    assert IRPayload(code=code).to_raw_timings() == expected_timings
+
+
+def test_models_are_slotted():
+    info = Info.from_dict({"model": "SLZB-06p7", "radios": [{"zb_version": -1}]})
+    sensors = Sensors.from_dict({"uptime": 10, "socket_uptime": 0})
+    for obj in (info, info.radios[0], sensors, Firmware(), IRPayload()):
+        assert not hasattr(obj, "__dict__")
+    assert info.radios[0].zb_channel == 2
+    assert sensors.socket_uptime is None
+    assert Sensors.from_dict(sensors.to_dict()) == sensors
+    with pytest.raises(AttributeError):
+        sensors.unknown = 1
+
+
+def test_sensors_diff():
+    old = Sensors(uptime=10, ble=BleSession(proxy_connected=True))
+    new = Sensors(
+        uptime=20,
+        ble=BleSession(proxy_connected=False),
+        ambilight=AmbilightPayload(ultLedBri=50),
+    )
+    assert new.diff(old) == {
+        "uptime": 20,
+        "ble": {"proxy_connected": False},
+        "ambilight": AmbilightPayload(ultLedBri=50),
+    }
+    assert old.diff(Sensors(uptime=10, ble=BleSession(proxy_connected=True))) == {}
+    assert old.diff(old) == {}
+    assert old.diff(None)["uptime"] == 10
+
+
+def test_info_diff_radios():
+    old = Info(model="SLZB-MR1", radios=[Radio(zb_version="1"), Radio(zb_type=0)])
+    new = Info(model="SLZB-MR1", radios=[Radio(zb_version="1"), Radio(zb_type=1)])
+    assert new.diff(old) == {"radios": {1: {"zb_type": 1}}}
+
+    fewer = Info(model="SLZB-MR1", radios=[Radio(zb_version="1")])
+    assert fewer.diff(old) == {"radios": fewer.radios}
+
+
+def test_info_copy():
+    info = Info(
+        model="SLZB-MR1",
+        addons={"zwave": False},
+        radios=[Radio(zb_version="1", radioModes=[True, False])],
+    )
+    copied = info.copy()
+    assert copied == info
+    copied.addons["zwave"] = True
+    copied.radios[0].zb_version = "2"
+    copied.radios[0].radioModes[0] = False  # type: ignore[index]
+    copied.radios.append(Radio())
+    assert info == Info(
+        model="SLZB-MR1",
+        addons={"zwave": False},
+        radios=[Radio(zb_version="1", radioModes=[True, False])],
+    )
@@ -0,0 +1,70 @@
+"""Tests for multi-device scenes."""
+
+from unittest.mock import AsyncMock, Mock
+
+from pysmlight.const import AmbiEffect
+from pysmlight.exceptions import SmlightConnectionError
+from pysmlight.models import AmbilightPayload, BuzzerPayload
+from pysmlight.scene import Scene
+
+
+def make_client(host: str, result: bool | Exception = True) -> Mock:
+    client = Mock()
+    client.host = host
+    client.url = f"http://{host}/api2"
+    client.setting_url = f"http://{host}/settings/saveParams"
+    client.check_auth_needed = AsyncMock(return_value=False)
+    if isinstance(result, Exception):
+        client.post = AsyncMock(side_effect=result)
+    else:
+        client.post = AsyncMock(return_value=result)
+    return client
+
+
+async def test_scene_ambilight() -> None:
+    """Test the same prepared body is posted to every device."""
+    clients = [make_client("10.0.0.1"), make_client("10.0.0.2")]
+    scene = Scene(clients)
+    await scene.warm()
+    for client in clients:
+        client.check_auth_needed.assert_awaited_once()
+
+    result = await scene.ambilight(
+        AmbilightPayload(ultLedMode=AmbiEffect.WSULT_SOLID, ultLedColor="#ff0000")
+    )
+
+    assert result.ok
+    assert result.results == {"10.0.0.1": True, "10.0.0.2": True}
+    assert 0 <= result.spread <= result.duration
+    bodies = {c.post.await_args.args[0] for c in clients}
+    assert len(bodies) == 1
+    assert "ultLedColor=%23ff0000" in bodies.pop()
+    for client in clients:
+        assert client.post.await_args.kwargs["url"] == client.setting_url
+
+
+async def test_scene_buzzer_partial_failure() -> None:
+    """Test one unreachable device does not stop the others."""
+    err = SmlightConnectionError("down")
+    clients = [make_client("10.0.0.1"), make_client("10.0.0.2", err)]
+    clients[1].check_auth_needed = AsyncMock(side_effect=err)
+    scene = Scene(clients)
+    await scene.warm()
+
+    result = await scene.buzzer(BuzzerPayload(code="beep"))
+
+    assert not result.ok
+    assert result.results == {"10.0.0.1": True, "10.0.0.2": err}
+    assert clients[0].post.await_args.kwargs["url"] == clients[0].url
+
+
+async def test_scene_unexpected_error() -> None:
+    """Test a non Smlight error of one device is reported with the others."""
+    err = TimeoutError()
+    clients = [make_client("10.0.0.1"), make_client("10.0.0.2", err)]
+    scene = Scene(clients)
+
+    result = await scene.buzzer(BuzzerPayload(code="beep"))
+
+    assert not result.ok
+    assert result.results == {"10.0.0.1": True, "10.0.0.2": err}
@@ -0,0 +1,250 @@
+"""Test the per-host request scheduler."""
+
+from __future__ import annotations
+
+import asyncio
+
+from aiohttp import ClientSession
+from aresponses import ResponsesMockServer
+import pytest
+
+from pysmlight import Api2
+from pysmlight.const import RequestPriority
+from pysmlight.exceptions import SmlightTimeoutError
+from pysmlight.scheduler import RequestScheduler
+
+host = "slzb-06.local"
+
+
+async def _request(
+    scheduler: RequestScheduler,
+    priority: RequestPriority,
+    started: list[str],
+    name: str,
+    release: asyncio.Event | None = None,
+    timeout: float | None = None,
+) -> None:
+    async with scheduler.slot(priority, timeout=timeout):
+        started.append(name)
+        if release is not None:
+            await release.wait()
+
+
+async def _settle() -> None:
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+async def test_priority_order() -> None:
+    """Test queued requests start by priority class, then deadline."""
+    scheduler = RequestScheduler(1, rate=None)
+    started: list[str] = []
+    release = asyncio.Event()
+    blocker = asyncio.create_task(
+        _request(scheduler, RequestPriority.BULK, started, "blocker", release)
+    )
+    await _settle()
+
+    tasks = [
+        asyncio.create_task(_request(scheduler, *args))
+        for args in (
+            (RequestPriority.BULK, started, "bulk"),
+            (RequestPriority.POLLING, started, "poll-late", None, 5.0),
+            (RequestPriority.POLLING, started, "poll-soon", None, 1.0),
+            (RequestPriority.FIRMWARE, started, "firmware"),
+            (RequestPriority.CONTROL, started, "control"),
+        )
+    ]
+    await _settle()
+    assert scheduler.queued == 5
+
+    release.set()
+    await asyncio.gather(blocker, *tasks)
+    assert started == [
+        "blocker",
+        "control",
+        "firmware",
+        "poll-soon",
+        "poll-late",
+        "bulk",
+    ]
+    assert scheduler.active == 0
+
+
+async def test_reserved_slot() -> None:
+    """Test polling cannot take the slot reserved for commands."""
+    scheduler = RequestScheduler(2, rate=None, reserved=1)
+    started: list[str] = []
+    release = asyncio.Event()
+    polls = [
+        asyncio.create_task(
+            _request(scheduler, RequestPriority.POLLING, started, f"poll{i}", release)
+        )
+        for i in range(2)
+    ]
+    await _settle()
+    assert started == ["poll0"]
+
+    await _request(scheduler, RequestPriority.CONTROL, started, "control")
+    assert started == ["poll0", "control"]
+
+    release.set()
+    await asyncio.gather(*polls)
+    assert started == ["poll0", "control", "poll1"]
+
+
+async def test_deadline_exceeded() -> None:
+    """Test a request still queued at its deadline is dropped."""
+    scheduler = RequestScheduler(1, rate=None)
+    started: list[str] = []
+    release = asyncio.Event()
+    blocker = asyncio.create_task(
+        _request(scheduler, RequestPriority.CONTROL, started, "blocker", release)
+    )
+    await _settle()
+
+    with pytest.raises(SmlightTimeoutError):
+        await _request(scheduler, RequestPriority.POLLING, started, "poll", None, 0.01)
+
+    queued = asyncio.create_task(
+        _request(scheduler, RequestPriority.BULK, started, "bulk")
+    )
+    await _settle()
+    assert scheduler.queued == 1
+
+    release.set()
+    await asyncio.gather(blocker, queued)
+    assert started == ["blocker", "bulk"]
+    assert scheduler.active == 0
+
+
+async def test_cancelled_request() -> None:
+    """Test cancelling a queued request does not leak its slot."""
+    scheduler = RequestScheduler(1, rate=None)
+    started: list[str] = []
+    release = asyncio.Event()
+    blocker = asyncio.create_task(
+        _request(scheduler, RequestPriority.CONTROL, started, "blocker", release)
+    )
+    await _settle()
+    cancelled = asyncio.create_task(
+        _request(scheduler, RequestPriority.CONTROL, started, "cancelled")
+    )
+    await _settle()
+    cancelled.cancel()
+    await _settle()
+
+    release.set()
+    await blocker
+    await _request(scheduler, RequestPriority.POLLING, started, "poll")
+    assert started == ["blocker", "poll"]
+    assert scheduler.active == 0
+    assert scheduler.queued == 0
+
+
+async def test_token_bucket() -> None:
+    """Test requests beyond the burst are paced at the refill rate."""
+    scheduler = RequestScheduler(4, rate=50.0, burst=2, reserved=0)
+    started: list[str] = []
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    await asyncio.gather(
+        *(
+            _request(scheduler, RequestPriority.POLLING, started, str(i))
+            for i in range(4)
+        )
+    )
+    # two from the burst, then one token per 20ms
+    assert loop.time() - start >= 0.035
+    assert len(started) == 4
+
+
+async def test_token_bucket_skips_control() -> None:
+    """Test control commands are not paced and leave tokens to polling."""
+    scheduler = RequestScheduler(4, rate=0.001, burst=1, reserved=0)
+    started: list[str] = []
+    for i in range(5):
+        await asyncio.wait_for(
+            _request(scheduler, RequestPriority.CONTROL, started, f"control{i}"), 1
+        )
+    await asyncio.wait_for(
+        _request(scheduler, RequestPriority.POLLING, started, "poll"), 1
+    )
+    assert len(started) == 6
+
+
+async def test_defaults_and_configured_deadlines() -> None:
+    """Test the defaults do not cap, rate limit or drop, configured deadlines do."""
+    scheduler = RequestScheduler()
+    assert scheduler.max_concurrent is None
+    assert scheduler.rate is None
+    assert scheduler.deadlines == {}
+    started: list[str] = []
+    release = asyncio.Event()
+    polls = [
+        asyncio.create_task(
+            _request(scheduler, RequestPriority.POLLING, started, f"poll{i}", release)
+        )
+        for i in range(5)
+    ]
+    await _settle()
+    assert len(started) == 5
+    assert scheduler.queued == 0
+    release.set()
+    await asyncio.gather(*polls)
+    assert scheduler.active == 0
+
+    scheduler = RequestScheduler(1, deadlines={RequestPriority.POLLING: 0.01})
+    started.clear()
+    release = asyncio.Event()
+    blocker = asyncio.create_task(
+        _request(scheduler, RequestPriority.CONTROL, started, "blocker", release)
+    )
+    await _settle()
+    with pytest.raises(SmlightTimeoutError):
+        await _request(scheduler, RequestPriority.POLLING, started, "poll")
+    bulk = asyncio.create_task(
+        _request(scheduler, RequestPriority.BULK, started, "bulk")
+    )
+    await asyncio.sleep(0.02)
+    release.set()
+    await asyncio.gather(blocker, bulk)
+    assert started == ["blocker", "bulk"]
+
+
+async def test_client_priorities(aresponses: ResponsesMockServer) -> None:
+    """Test client requests are scheduled by kind."""
+    for _ in range(2):
+        aresponses.add(
+            host,
+            "/api2",
+            "GET",
+            aresponses.Response(status=200, text="ok"),
+        )
+    aresponses.add(
+        host,
+        "/ha_sensors",
+        "GET",
+        aresponses.Response(status=200, text='{"Sensors": {}}'),
+    )
+
+    async with ClientSession() as session:
+        client = Api2(host, session=session)
+        priorities: list[RequestPriority] = []
+        slot = client.scheduler.slot
+
+        def record(priority: RequestPriority, **kwargs):
+            priorities.append(priority)
+            return slot(priority, **kwargs)
+
+        client.scheduler.slot = record  # type: ignore[method-assign]
+
+        await client.cmds.reboot()
+        await client.get_sensors()
+        await client.get_param("zbRev")
+
+    assert priorities == [
+        RequestPriority.CONTROL,
+        RequestPriority.POLLING,
+        RequestPriority.BULK,
+    ]
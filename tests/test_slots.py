@@ -0,0 +1,28 @@
+"""Test the flat array row allocator."""
+
+import math
+
+from pysmlight._slots import SlotTable
+
+
+def test_slot_table_reuses_rows() -> None:
+    """Test removed rows are reset to the defaults and reused."""
+    table: SlotTable[str] = SlotTable({"ring": ("b", 3, 0), "avg": ("d", 1, math.nan)})
+    ring = table.columns["ring"]
+    avg = table.columns["avg"]
+
+    assert table.add("a") == 0
+    assert table.add("b") == 1
+    ring[3:6] = ring.__class__("b", [1, 2, 3])
+    avg[1] = -60.0
+    assert len(ring) == 6
+    assert "b" in table
+
+    assert table.remove("b") == 1
+    assert table.remove("b") is None
+    assert table.get("b") is None
+    assert table.add("c") == 1
+    assert ring.tolist() == [0] * 6
+    assert math.isnan(avg[1])
+    assert table.keys[1] == "c"
+    assert len(table) == 2
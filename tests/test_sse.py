@@ -8,8 +8,9 @@ from aiohttp import ClientSession, web
 from aiohttp.client_exceptions import ClientConnectionError, SocketTimeoutError
 from aresponses import ResponsesMockServer
 
-from pysmlight.const import Actions, Events, Pages, Settings
-from pysmlight.models import SettingsEvent
+from pysmlight.const import Actions, Events, IRProtocol, Pages, Settings
+from pysmlight.ir import IRCommand
+from pysmlight.models import IRPayload, SettingsEvent
 from pysmlight.sse import LEGACY_SSE_VERSION, MessageEvent, sseClient
 from pysmlight.web import Api2
 
@@ -311,3 +312,28 @@ async def test_sse_ir_code_event_bad_data() -> None:
         await client._message_handler(event)
 
         ir_message_handler.assert_not_called()
+
+
+async def test_sse_ir_command_event() -> None:
+    """Test IR_CODE events are decoded for IR command callbacks."""
+    async with ClientSession() as session:
+        client = sseClient(host, session)
+        ir_command_handler = Mock()
+        remove_cb = client.register_ir_command_cb(ir_command_handler)
+
+        timings = [2400]
+        for i in range(12):
+            timings += [600, 1200 if 0x95 >> i & 1 else 600]
+        event = Mock()
+        event.type = "IR_CODE"
+        event.data = json.dumps(
+            {"raw": IRPayload.from_raw_timings(timings).code, "freq": 40000}
+        )
+
+        await client._message_handler(event)
+        ir_command_handler.assert_called_once_with(
+            IRCommand(IRProtocol.SONY12, 0x01, 0x15)
+        )
+
+        remove_cb()
+        assert client.ir_command_cb is None
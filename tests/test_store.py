@@ -0,0 +1,90 @@
+"""Tests for the persistent device state store."""
+
+from pathlib import Path
+import sqlite3
+from unittest.mock import AsyncMock
+
+from aiohttp import ClientSession
+from awesomeversion import AwesomeVersion
+
+from pysmlight import Api2
+from pysmlight.exceptions import SmlightConnectionError
+from pysmlight.models import (
+    CapabilityProfile,
+    DeviceFirmware,
+    Firmware,
+    Info,
+    Sensors,
+)
+from pysmlight.store import DeviceStateStore
+
+host = "slzb-06.local"
+
+
+async def test_store_round_trip(tmp_path: Path) -> None:
+    path = tmp_path / "state.db"
+    info = Info(model="SLZB-06p7", sw_version="v2.7.5")
+    sensors = Sensors(esp32_temp=40.5, uptime=100)
+    firmware = [Firmware(mode="ESP", ver="v2.8.0")]
+
+    store = DeviceStateStore(path)
+    await store.save_info(host, info)
+    await store.save_sensors(host, sensors)
+    await store.save_firmware(host, "esp32", firmware)
+    await store.save_capabilities(host, {"api": 2})
+    await store.save_info("other.local", Info(model="SLZB-06"))
+    await store.close()
+
+    store = DeviceStateStore(path)
+    state = await store.load(host)
+    assert state is not None
+    assert state.info == info
+    assert state.sensors == sensors
+    assert state.firmware == {"esp32": firmware}
+    assert state.capabilities == {"api": 2}
+    assert state.updated > 0
+    assert set(await store.load_all()) == {host, "other.local"}
+
+    await store.delete(host)
+    assert await store.load(host) is None
+    await store.close()
+
+
+async def test_store_restore_and_refresh(tmp_path: Path) -> None:
+    store = DeviceStateStore(tmp_path / "state.db")
+    await store.save_info(host, Info(model="SLZB-06p7", sw_version="v2.5.0"))
+    await store.save_capabilities(host, CapabilityProfile(info_api=False).to_dict())
+
+    async with ClientSession() as session:
+        client = Api2(host, session=session)
+        state = await store.restore(client)
+        assert state is not None
+        assert client.core_version == AwesomeVersion("v2.5.0")
+        assert client.sse.sw_version == AwesomeVersion("v2.5.0")
+        assert client.profile == CapabilityProfile(info_api=False)
+
+        esp = [Firmware(mode="ESP", ver="v2.8.0")]
+        client.get_info = AsyncMock(return_value=Info(sw_version="v2.7.5"))
+        client.get_sensors = AsyncMock(return_value=Sensors(uptime=5))
+        client.get_all_firmware = AsyncMock(
+            return_value=DeviceFirmware(esp=esp, radios=[None])
+        )
+        state = await store.refresh(client)
+        assert state.sensors == Sensors(uptime=5)
+        assert state.firmware == {"esp32": esp}
+        saved = await store.load(host)
+        assert saved.sensors == Sensors(uptime=5)
+        assert saved.firmware == {"esp32": esp}
+        # every part was written in one transaction
+        with sqlite3.connect(tmp_path / "state.db") as db:
+            rows = dict(db.execute("SELECT kind, updated FROM device_state"))
+        assert set(rows) == {"info", "capabilities", "sensors", "firmware:esp32"}
+        assert len(set(rows.values())) == 1
+
+        client.get_sensors = AsyncMock(side_effect=SmlightConnectionError("down"))
+        state = await store.refresh(client)
+        assert state.sensors is None
+        # the info fetched before the failure is still saved
+        assert (await store.load(host)).info == Info(sw_version="v2.7.5")
+    await store.close()
+    await store.close()
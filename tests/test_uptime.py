@@ -0,0 +1,46 @@
+"""Tests for uptime reset detection."""
+
+from pysmlight.const import UptimeEventType
+from pysmlight.models import Sensors
+from pysmlight.uptime import UptimeEvent, UptimeMonitor
+
+
+def test_uptime_reboot_and_reconnects() -> None:
+    events: list[UptimeEvent] = []
+    monitor = UptimeMonitor(events.append)
+
+    assert monitor.update("a", Sensors(uptime=1000, socket_uptime=500), 0.0) == []
+    # counters advanced with the clock
+    assert monitor.update("a", Sensors(uptime=1060, socket_uptime=560), 60.0) == []
+
+    # socket reset, then OTBR started
+    changes = monitor.update(
+        "a", Sensors(uptime=1120, socket_uptime=10, otbr_uptime=20), 120.0
+    )
+    assert [(e.type, e.counter, e.timestamp) for e in changes] == [
+        (UptimeEventType.SOCKET_RECONNECT, "socket_uptime", 110.0),
+        (UptimeEventType.OTBR_RESTART, "otbr_uptime", 100.0),
+    ]
+
+    # rebooted and ran longer than the previous uptime before the next poll
+    changes = monitor.update(
+        "a", Sensors(uptime=1500, socket_uptime=1400, otbr_uptime=1450), 5000.0
+    )
+    assert changes == [UptimeEvent("a", UptimeEventType.REBOOT, "uptime", 3500.0, 1500)]
+    assert events[-1] == changes[0]
+
+    # baseline after the reboot is the new counters
+    assert monitor.update("a", Sensors(uptime=1560, socket_uptime=1460), 5060.0) == []
+
+
+def test_uptime_fleet_batch() -> None:
+    monitor = UptimeMonitor()
+    monitor.update_many([("a", Sensors(uptime=100)), ("b", Sensors(uptime=100))], 0.0)
+    changes = monitor.update_many(
+        [("a", Sensors(uptime=130)), ("b", Sensors(uptime=5))], 30.0
+    )
+    assert [(e.host, e.type) for e in changes] == [("b", UptimeEventType.REBOOT)]
+
+    monitor.remove("b")
+    assert monitor.update("c", Sensors(uptime=1), 40.0) == []
+    assert monitor.update("c", Sensors(uptime=20), 60.0) == []